@@ -0,0 +1,84 @@
+import os
+import sys
+import time
+import random
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from card_planner import plan_cards, priority_function, allocated_size, usable_capacity, CARD_SIZES
+from synthetic import synthetic_games
+
+LIBRARY_SIZES = [1000, 5000, 10000]
+CAPACITY = CARD_SIZES['32 GB']
+GENRE_WEIGHTS = {'racing': 3, 'party': 2}
+
+
+def synthetic_metadata(count):
+    rng = random.Random(0)
+    games = []
+    for i, (name, entry) in enumerate(synthetic_games(count)):
+        entry = entry or {}
+        genre = entry.get('genre', 'Unknown')
+        games.append({
+            'path': f"/games/{i:05d} {name}",
+            'size': rng.choice([rng.randint(50, 400), 1459]) * 1024 * 1024,
+            'input_players': entry.get('input', {}).get('players', '1'),
+            'release_date': entry.get('release_date', '2000-01-01'),
+            'genre_list': [g.strip() for g in genre.split(',')],
+        })
+    return games
+
+
+def density_greedy(games, value_of, room):
+    # Sort by value per byte and take whatever still fits.
+    used, value = 0, 0.0
+    for m in sorted(games, key=lambda m: -value_of(m) / allocated_size(m['size'])):
+        size = allocated_size(m['size'])
+        if used + size <= room:
+            used += size
+            value += value_of(m)
+    return value
+
+
+def fractional_bound(games, value_of, room):
+    # LP relaxation: no 0/1 solution can beat it.
+    value = 0.0
+    for m in sorted(games, key=lambda m: -value_of(m) / allocated_size(m['size'])):
+        size = allocated_size(m['size'])
+        take = min(1.0, room / size)
+        value += take * value_of(m)
+        room -= take * size
+        if room <= 0:
+            break
+    return value
+
+
+def main():
+    ok = True
+    for count in LIBRARY_SIZES:
+        games = synthetic_metadata(count)
+        print(f"games: {count}, card: 32 GB")
+        for priority in ('count', 'players', 'genre'):
+            value_of = priority_function(priority, GENRE_WEIGHTS)
+            start = time.perf_counter()
+            plan = plan_cards(games, CAPACITY, priority, genre_weights=GENRE_WEIGHTS)[0]
+            elapsed = time.perf_counter() - start
+            room = usable_capacity(CAPACITY)
+            greedy = density_greedy(games, value_of, room)
+            bound = fractional_bound(games, value_of, room)
+            fits = plan.free_bytes() >= 0
+            ok = ok and fits and plan.value >= greedy
+            print(f"  {priority:<8} {elapsed * 1000:7.1f} ms  value {plan.value:9.2f}  greedy {greedy:9.2f}  "
+                  f"bound {bound:9.2f}  free {plan.free_bytes() / 1024**2:7.1f} MB")
+        start = time.perf_counter()
+        plans = plan_cards(games, CAPACITY, 'count', cards=4)
+        elapsed = time.perf_counter() - start
+        placed = [m['path'] for plan in plans for m in plan.copy]
+        ok = ok and len(placed) == len(set(placed)) and all(plan.free_bytes() >= 0 for plan in plans)
+        print(f"  4 cards  {elapsed * 1000:7.1f} ms  games per card {[len(plan.copy) for plan in plans]}")
+    print("plans valid" if ok else "PLAN INVALID")
+    return 0 if ok else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
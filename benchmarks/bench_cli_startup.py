@@ -0,0 +1,35 @@
+import os
+import sys
+import time
+import subprocess
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RUNS = 5
+
+
+def best_of(args):
+    best = None
+    for _ in range(RUNS):
+        start = time.perf_counter()
+        subprocess.run(args, cwd=REPO_ROOT, check=True, stdout=subprocess.DEVNULL)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    # cli.py must stay importable without Tk so it can run on headless prep machines.
+    check = "import sys, cli; print('tkinter' in sys.modules)"
+    loaded = subprocess.run([sys.executable, '-c', check], cwd=REPO_ROOT, check=True,
+                            capture_output=True, text=True).stdout.strip()
+    bare = best_of([sys.executable, '-c', 'pass'])
+    cli = best_of([sys.executable, 'cli.py', '--help'])
+    print(f"python startup:      {bare * 1000:8.1f} ms")
+    print(f"cli.py --help:       {cli * 1000:8.1f} ms")
+    ok = loaded == 'False'
+    print("tkinter not imported" if ok else "TKINTER IMPORTED")
+    return 0 if ok else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,90 @@
+import os
+import sys
+import time
+import random
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from content_hash import HashCache, hash_files, find_duplicates, duplicate_groups, full_hash, QUICK, FULL
+
+FILES = 24
+FILE_SIZE = 8 * 1024 * 1024
+DUPLICATES = 3
+
+
+def write_library(folder):
+    rng = random.Random(0)
+    metadata = []
+    for i in range(FILES):
+        path = os.path.join(folder, f"game {i:02d}.iso")
+        # Pairs of files share a size so the size prefilter alone can't settle them.
+        size = FILE_SIZE + (i // 2) * 4096
+        with open(path, 'wb') as f:
+            f.write(rng.randbytes(size))
+        metadata.append({'path': path, 'size': size, 'gcid': 'UNKNOWN'})
+    for i in range(DUPLICATES):
+        src = metadata[i * 2]['path']
+        path = os.path.join(folder, f"copy {i}.nkit.iso")
+        with open(src, 'rb') as fsrc, open(path, 'wb') as fdst:
+            fdst.write(fsrc.read())
+        metadata.append({'path': path, 'size': metadata[i * 2]['size'], 'gcid': 'UNKNOWN'})
+    return metadata
+
+
+def check_multi_disc():
+    # Two discs of one game share the ID but aren't duplicates; a second dump of disc 1 is.
+    discs = [{'path': 'Game (Disc 1).iso', 'size': 1000, 'gcid': 'GXXE01', 'disc': 0},
+             {'path': 'Game (Disc 2).iso', 'size': 1000, 'gcid': 'GXXE01', 'disc': 1},
+             {'path': 'Game (Disc 1).nkit.iso', 'size': 600, 'gcid': 'GXXE01', 'disc': 0},
+             {'path': 'Game (Disc 1).rvz', 'size': 900, 'gcid': 'GXXE01', 'disc': None},
+             {'path': 'Game (Disc 2).rvz', 'size': 800, 'gcid': 'GXXE01', 'disc': None},
+             {'path': 'Game (Europe) (Disc 2).iso', 'size': 1100, 'gcid': 'GXXP01', 'disc': 1}]
+    groups = duplicate_groups(discs)
+    return sorted((sorted(paths), reasons) for paths, reasons in groups) == \
+        [(['Game (Disc 1).iso', 'Game (Disc 1).nkit.iso'], ['same ID']),
+         (['Game (Disc 2).iso', 'Game (Europe) (Disc 2).iso'], ['region variant'])]
+
+
+def main():
+    with tempfile.TemporaryDirectory() as folder:
+        metadata = write_library(folder)
+        paths = [m['path'] for m in metadata]
+        total = sum(m['size'] for m in metadata)
+
+        start = time.perf_counter()
+        serial = {path: full_hash(path) for path in paths}
+        serial_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        pooled = hash_files(paths, FULL)
+        pool_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        hash_files(paths, QUICK)
+        quick_time = time.perf_counter() - start
+
+        cache = HashCache(os.path.join(folder, 'hashes.sqlite'))
+        start = time.perf_counter()
+        groups = find_duplicates(metadata, cache)
+        dup_time = time.perf_counter() - start
+        start = time.perf_counter()
+        again = find_duplicates(metadata, cache)
+        cached_time = time.perf_counter() - start
+        cache.close()
+
+    mb = total / 1024 / 1024
+    print(f"files: {len(paths)}, {mb:.0f} MB")
+    print(f"full hash, serial:          {serial_time * 1000:8.1f} ms ({mb / serial_time:6.0f} MB/s)")
+    print(f"full hash, process pool:    {pool_time * 1000:8.1f} ms ({mb / pool_time:6.0f} MB/s)")
+    print(f"quick hash, process pool:   {quick_time * 1000:8.1f} ms")
+    print(f"find_duplicates, cold:      {dup_time * 1000:8.1f} ms")
+    print(f"find_duplicates, cached:    {cached_time * 1000:8.1f} ms")
+    ok = pooled == serial and len(groups) == DUPLICATES and sorted(map(sorted, (g for g, r in groups))) == \
+        sorted(map(sorted, (g for g, r in again))) and check_multi_disc()
+    print("results match" if ok else "RESULTS DIFFER")
+    return 0 if ok else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
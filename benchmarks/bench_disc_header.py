@@ -0,0 +1,71 @@
+import os
+import re
+import sys
+import time
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from disc_header import read_game_id, index_by_game_id
+from title_index import TitleIndex
+from synthetic import load_wiitdb, write_fake_library, write_fake_disc, disc_header
+
+LIBRARY_SIZE = 2000
+
+
+def write_bad_corpus(folder):
+    # Files the header reader must reject so extract_metadata falls back to titles.
+    cases = {
+        'truncated.iso': disc_header('GALE01')[:0x10],
+        'no magic.gcm': b'GALE01' + bytes(0x40),
+        'lowercase id.iso': disc_header('gale01'),
+        'empty.iso': b'',
+        'plain nkit.nkit.iso': b'GALE01' + bytes(0x40),
+        'archive.rvz': disc_header('GALE01'),
+    }
+    for name, data in cases.items():
+        with open(os.path.join(folder, name), 'wb') as f:
+            f.write(data)
+    return [os.path.join(folder, name) for name in cases]
+
+
+def main():
+    database = load_wiitdb()
+    gcid_index = index_by_game_id(database)
+    failures = 0
+    with tempfile.TemporaryDirectory() as folder:
+        library = write_fake_library(folder, LIBRARY_SIZE)
+        nkit_path = os.path.join(folder, 'nkit only marker.nkit.iso')
+        write_fake_disc(nkit_path, 'GM4P01')
+        with open(nkit_path, 'r+b') as f:
+            f.seek(0x1C)
+            f.write(bytes(4))
+        library.append((nkit_path, 'GM4P01'))
+
+        start = time.perf_counter()
+        resolved = [(gcid_index.get(read_game_id(path)), gcid) for path, gcid in library]
+        elapsed = time.perf_counter() - start
+        title_index = TitleIndex(database, lambda name: re.sub(r'[^a-zA-Z0-9]', '', name).lower())
+        start = time.perf_counter()
+        for path, gcid in library:
+            title_index.best_match(re.sub(r'[^a-zA-Z0-9]', '', os.path.basename(path)).lower())
+        title_elapsed = time.perf_counter() - start
+
+        for key, gcid in resolved:
+            if gcid in gcid_index and (key is None or database[key]['gcid'] != gcid):
+                failures += 1
+
+        for path in write_bad_corpus(folder):
+            if read_game_id(path) is not None:
+                print(f"accepted bad header: {os.path.basename(path)}")
+                failures += 1
+
+    print(f"files: {len(library)}, header lookups: {elapsed * 1000:.1f} ms "
+          f"({elapsed / len(library) * 1e6:.1f} us/file)")
+    print(f"title matching for the same files: {title_elapsed * 1000:.1f} ms")
+    print(f"failures: {failures}")
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
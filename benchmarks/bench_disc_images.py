@@ -0,0 +1,70 @@
+import os
+import sys
+import time
+import random
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from disc_images import DiscImageIndex
+from synthetic import synthetic_games
+
+ASSETS = 3000
+GAMES = 1000
+
+
+def listdir_lookup(folder, gcid):
+    # find_disc_image as it was in main_grid: exists check, then listdir + commonprefix.
+    image_path = os.path.join(folder, f"{gcid}.png")
+    if os.path.exists(image_path):
+        return image_path
+    best_match = None
+    best_score = 0
+    for fname in os.listdir(folder):
+        if fname.lower().endswith('.png'):
+            current_score = len(os.path.commonprefix([gcid.lower(), os.path.splitext(fname)[0].lower()]))
+            if current_score > best_score:
+                best_score = current_score
+                best_match = fname
+    return os.path.join(folder, best_match) if best_match else None
+
+
+def fake_gcid(rng):
+    letters = 'ABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789'
+    return 'G' + ''.join(rng.choice(letters) for _ in range(3)) + rng.choice('EPJ') + '01'
+
+
+def main():
+    rng = random.Random(0)
+    known = [entry['gcid'] for name, entry in synthetic_games(GAMES, seed=4) if entry and entry.get('gcid')]
+    gcids = [gcid if rng.random() < 0.5 else gcid[:4] + 'X' + gcid[5:] for gcid in known]
+    gcids += [fake_gcid(rng) for _ in range(GAMES - len(gcids))]
+    with tempfile.TemporaryDirectory() as folder:
+        for gcid in set(known[::2]) | {fake_gcid(rng) for _ in range(ASSETS)}:
+            open(os.path.join(folder, f"{gcid}.png"), 'wb').close()
+        open(os.path.join(folder, 'readme.txt'), 'wb').close()
+        assets = len(os.listdir(folder))
+
+        start = time.perf_counter()
+        expected = [listdir_lookup(folder, gcid) for gcid in gcids]
+        listdir_time = time.perf_counter() - start
+
+        index = DiscImageIndex(folder)
+        start = time.perf_counter()
+        indexed = [index.find(gcid) for gcid in gcids]
+        index_time = time.perf_counter() - start
+
+        time.sleep(0.01)
+        open(os.path.join(folder, 'ZZZZZZ.png'), 'wb').close()
+        refreshed = index.find('ZZZZZZ') == os.path.join(folder, 'ZZZZZZ.png')
+
+    print(f"assets: {assets}, lookups: {len(gcids)}")
+    print(f"listdir + commonprefix per game: {listdir_time * 1000:8.1f} ms")
+    print(f"trie index (build + lookups):    {index_time * 1000:8.1f} ms")
+    ok = indexed == expected and refreshed
+    print("results match" if ok else "RESULTS DIFFER")
+    return 0 if ok else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,69 @@
+import os
+import sys
+import time
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from external_snapshot import ExternalSnapshot
+from copy_engine import CopyJob, is_already_copied
+from synthetic import write_fake_library
+
+LIBRARY_SIZE = 3000
+COPIED_SHARE = 2
+
+
+def per_game_stats(folder, games):
+    # What update_transfer_status_column / apply_filters did before: exists + getsize per game.
+    return {name for name, size in games
+            if os.path.exists(os.path.join(folder, name)) and os.path.getsize(os.path.join(folder, name)) == size}
+
+
+def main():
+    with tempfile.TemporaryDirectory() as workdir:
+        games_folder = os.path.join(workdir, 'games')
+        card = os.path.join(workdir, 'card')
+        os.mkdir(games_folder)
+        os.mkdir(card)
+        library = write_fake_library(games_folder, LIBRARY_SIZE, size=4096)
+        games = [(os.path.basename(path), os.path.getsize(path)) for path, gcid in library]
+        for name, size in games[::COPIED_SHARE]:
+            with open(os.path.join(card, name), 'wb') as f:
+                f.truncate(size)
+
+        start = time.perf_counter()
+        expected = per_game_stats(card, games)
+        stat_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        snapshot = ExternalSnapshot.scan(card)
+        scanned = {name for name, size in games if snapshot.has_copy(name, size)}
+        scan_time = time.perf_counter() - start
+
+        snapshot.write_manifest()
+        start = time.perf_counter()
+        from_manifest = ExternalSnapshot.load(card, use_manifest=True)
+        manifest_ok = from_manifest.entries == snapshot.entries
+        manifest_time = time.perf_counter() - start
+
+        # Rewriting a file in place keeps the folder's mtime, so the manifest still loads and
+        # vouches for it; the copy engine's own check must not skip it.
+        with open(os.path.join(card, games[2][0]), 'r+b') as f:
+            f.truncate(games[2][1] // 2)
+        rewritten = ExternalSnapshot.load(card, use_manifest=True)
+        jobs = [CopyJob(os.path.join(games_folder, name), os.path.join(card, name)) for name, _ in games[2:5:2]]
+        stale_rejected = [is_already_copied(job, rewritten) for job in jobs] == [False, True]
+        os.remove(os.path.join(card, games[0][0]))
+        stale_rejected = stale_rejected and ExternalSnapshot.from_manifest(card) is None
+
+    print(f"games: {LIBRARY_SIZE}, on card: {len(expected)}")
+    print(f"exists + getsize per game: {stat_time * 1000:8.1f} ms")
+    print(f"one scandir snapshot:      {scan_time * 1000:8.1f} ms")
+    print(f"manifest read:             {manifest_time * 1000:8.1f} ms")
+    ok = scanned == expected and manifest_ok and stale_rejected
+    print("results match" if ok else "RESULTS DIFFER")
+    return 0 if ok else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,121 @@
+import os
+import sys
+import time
+import random
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from filter_index import FilterIndex, DEFAULT_BRANDS, in_brand
+from synthetic import synthetic_games
+
+LIBRARY_SIZE = 20000
+QUERIES = 200
+# Changes applied to a built index, like a folder watcher reporting games one at a time.
+CHANGES = 200
+REGIONS = ['NTSC-U', 'PAL', 'NTSC-J', 'Unknown']
+
+
+def synthetic_metadata(count):
+    rng = random.Random(0)
+    metadata = []
+    for i, (name, entry) in enumerate(synthetic_games(count)):
+        entry = entry or {}
+        genre = entry.get('genre', 'Unknown')
+        metadata.append({
+            'path': f"/games/{i:05d} {name}",
+            'title': rng.choice(["Disney ", "Nickelodeon ", ""]) + name,
+            'input_players': entry.get('input', {}).get('players', '1'),
+            'region': rng.choice(REGIONS),
+            'genre_list': [g.strip() for g in genre.split(',')],
+            'size': rng.randint(100, 1500) * 1024 * 1024,
+        })
+    return metadata
+
+
+def linear_filter(metadata, external, filters):
+    # The per-game loop apply_filters used before the index.
+    filtered, total = [], 0
+    for m in metadata:
+        if m['input_players'] not in filters['players']:
+            continue
+        if m['region'] not in filters['regions']:
+            continue
+        if filters['genres'] and not any(g in filters['genres'] for g in m['genre_list']):
+            continue
+        if any(brand not in filters['brands'] and in_brand(m, rule) for brand, rule in DEFAULT_BRANDS.items()):
+            continue
+        exists = m['path'] in external
+        if not filters['main_folder'] and not exists:
+            continue
+        if not filters['external_folder'] and exists:
+            continue
+        filtered.append(m['path'])
+        total += m['size']
+    return filtered, total
+
+
+def random_filters(rng, genres):
+    return {
+        'players': set(rng.sample(['0', '1', '2', '4'], rng.randint(1, 4))),
+        'regions': set(rng.sample(REGIONS, rng.randint(1, 4))),
+        'genres': set(rng.sample(genres, rng.choice([0, 0, 1, 2]))),
+        'brands': set(rng.sample(list(DEFAULT_BRANDS), rng.randint(0, 2))),
+        'main_folder': rng.random() < 0.8,
+        'external_folder': rng.random() < 0.8,
+    }
+
+
+def main():
+    rng = random.Random(1)
+    metadata = synthetic_metadata(LIBRARY_SIZE)
+    external = {m['path'] for m in metadata if rng.random() < 0.3}
+    genres = sorted({g for m in metadata for g in m['genre_list']})
+    queries = [random_filters(rng, genres) for _ in range(QUERIES)]
+
+    start = time.perf_counter()
+    index = FilterIndex(metadata, external)
+    build_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    expected = [linear_filter(metadata, external, filters) for filters in queries]
+    linear_time = (time.perf_counter() - start) / QUERIES
+
+    start = time.perf_counter()
+    actual = [index.selection(index.query(filters)) for filters in queries]
+    index_time = (time.perf_counter() - start) / QUERIES
+
+    start = time.perf_counter()
+    for filters in queries:
+        index.counts(filters)
+    counts_time = (time.perf_counter() - start) / QUERIES
+
+    # Rewrite, rename and remove games in place, then compare with a fresh index.
+    changed = list(metadata)
+    start = time.perf_counter()
+    for i in range(0, CHANGES * 3, 3):
+        changed[i] = dict(changed[i], region=rng.choice(REGIONS))
+        index.update([changed[i]], external)
+        renamed = dict(changed[i + 1], path=changed[i + 1]['path'] + '.renamed')
+        index.rename(changed[i + 1]['path'], renamed['path'])
+        index.update([renamed], external)
+        changed[i + 1] = renamed
+        index.remove(changed[i + 2]['path'])
+        changed[i + 2] = None
+    update_time = (time.perf_counter() - start) / (CHANGES * 3)
+    changed = [m for m in changed if m is not None]
+    rebuilt = FilterIndex(changed, external)
+    mismatches = sum(1 for a, b in zip(actual, expected) if a != b)
+    mismatches += sum(1 for filters in queries
+                      if index.selection(index.query(filters)) != rebuilt.selection(rebuilt.query(filters)))
+    print(f"games: {LIBRARY_SIZE}, genres: {len(genres)}, queries: {QUERIES}")
+    print(f"index build:          {build_time * 1000:8.1f} ms")
+    print(f"linear filter:        {linear_time * 1000:8.2f} ms/query")
+    print(f"bitset filter:        {index_time * 1000:8.2f} ms/query (rows + total size)")
+    print(f"live checkbox counts: {counts_time * 1000:8.2f} ms/query")
+    print(f"in-place update:      {update_time * 1000:8.2f} ms/change")
+    print(f"mismatches: {mismatches}")
+    return 1 if mismatches else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,112 @@
+import os
+import sys
+import time
+import queue
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from folder_watch import FolderWatcher, snapshot_folder, diff_snapshots, open_inotify
+from synthetic import write_fake_library, write_fake_disc
+
+LIBRARY_SIZE = 5000
+EVENT_TIMEOUT = 10.0
+
+
+def is_game_file(name):
+    return name.lower().endswith(('.iso', '.gcm'))
+
+
+def next_changes(events):
+    folder, changes = events.get(timeout=EVENT_TIMEOUT)
+    return changes
+
+
+def exercise_watcher(folder, use_inotify):
+    events = queue.Queue()
+    start = time.perf_counter()
+    watcher = FolderWatcher([folder], lambda f, c: events.put((f, c)), accept=is_game_file,
+                            interval=0.2, use_inotify=use_inotify).start()
+    start_time = time.perf_counter() - start
+    watcher.ready.wait()
+    failures = []
+    try:
+        added = os.path.join(folder, 'Added Game (USA).iso')
+        write_fake_disc(added, 'GALE01')
+        changes = next_changes(events)
+        if changes.added != [added]:
+            failures.append(f"add: {changes}")
+
+        renamed = os.path.join(folder, 'Renamed Game (USA).iso')
+        os.rename(added, renamed)
+        changes = next_changes(events)
+        if changes.renamed != [(added, renamed)] or changes.added or changes.removed:
+            failures.append(f"rename: {changes}")
+
+        with open(renamed, 'ab') as f:
+            f.write(b'\0' * 16)
+        changes = next_changes(events)
+        if changes.modified != [renamed]:
+            failures.append(f"modify: {changes}")
+
+        subfolder = os.path.join(folder, 'inotify' if use_inotify else 'polling')
+        os.mkdir(subfolder)
+        time.sleep(0.5)
+        nested = os.path.join(subfolder, 'Nested (Europe).gcm')
+        write_fake_disc(nested, 'GM4P01')
+        changes = next_changes(events)
+        while not changes.added:
+            changes = next_changes(events)
+        if changes.added != [nested]:
+            failures.append(f"nested add: {changes}")
+
+        os.remove(renamed)
+        changes = next_changes(events)
+        if changes.removed != [renamed]:
+            failures.append(f"remove: {changes}")
+
+        with open(os.path.join(folder, 'notes.txt'), 'w') as f:
+            f.write('ignored')
+        try:
+            changes = events.get(timeout=1.0)
+            failures.append(f"unexpected event: {changes}")
+        except queue.Empty:
+            pass
+    except queue.Empty:
+        failures.append("timed out waiting for a change")
+    finally:
+        start = time.perf_counter()
+        watcher.stop()
+        stop_time = time.perf_counter() - start
+    print(f"{'inotify' if use_inotify else 'polling'} start: {start_time * 1000:.1f} ms, "
+          f"stop: {stop_time * 1000:.1f} ms")
+    return failures
+
+
+def main():
+    failures = []
+    with tempfile.TemporaryDirectory() as folder:
+        write_fake_library(folder, LIBRARY_SIZE)
+        start = time.perf_counter()
+        before, dirs = snapshot_folder(folder, is_game_file)
+        snapshot_time = time.perf_counter() - start
+        start = time.perf_counter()
+        diff_snapshots(before, snapshot_folder(folder, is_game_file)[0])
+        diff_time = time.perf_counter() - start
+
+        modes = [False] + ([True] if open_inotify() else [])
+        for use_inotify in modes:
+            label = 'inotify' if use_inotify else 'polling'
+            mode_failures = exercise_watcher(folder, use_inotify)
+            print(f"{label}: {'ok' if not mode_failures else 'FAILED'}")
+            failures.extend(f"{label} {failure}" for failure in mode_failures)
+
+    print(f"files: {LIBRARY_SIZE}, snapshot: {snapshot_time * 1000:.1f} ms, "
+          f"snapshot + diff: {diff_time * 1000:.1f} ms")
+    for failure in failures:
+        print(failure)
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
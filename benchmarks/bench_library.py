@@ -0,0 +1,54 @@
+import os
+import sys
+import time
+import tempfile
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+# library loads wiitdb_parsed.json relative to the working directory, like the app.
+os.chdir(REPO_ROOT)
+
+from library import WIITDB, TITLE_INDEX, Library, scan_gamecube_files, extract_metadata, clean_filename
+from title_index import TitleIndex
+from synthetic import write_fake_library, synthetic_filenames
+
+LIBRARY_SIZE = 2000
+
+
+def grid_clean_filename(name):
+    # The variant main_grid used to carry.
+    return ''.join(c for c in name if c.isalnum()).lower()
+
+
+def main():
+    with tempfile.TemporaryDirectory() as folder:
+        write_fake_library(folder, LIBRARY_SIZE)
+        library = Library()
+        generation = library.begin_load()
+        library.publish(folder, [extract_metadata(path) for path in scan_gamecube_files(folder)], generation)
+
+        # Opening the grid before: its own walk and a full re-match of every file.
+        start = time.perf_counter()
+        rescanned = {path: extract_metadata(path) for path in scan_gamecube_files(folder)}
+        rescan_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        shared = sorted(library.by_path, key=lambda path: library.by_path[path]['title'].lower())
+        shared_time = time.perf_counter() - start
+
+    names = [os.path.splitext(name)[0] for name in synthetic_filenames(LIBRARY_SIZE, seed=7)]
+    grid_index = TitleIndex(WIITDB, grid_clean_filename)
+    differing = sum(TITLE_INDEX.best_match(clean_filename(name)) != grid_index.best_match(grid_clean_filename(name))
+                    for name in names)
+
+    print(f"games: {LIBRARY_SIZE}")
+    print(f"grid open, own scan + match: {rescan_time * 1000:8.1f} ms")
+    print(f"grid open, shared library:   {shared_time * 1000:8.1f} ms")
+    print(f"titles the two matchers disagreed on: {differing} of {len(names)}")
+    ok = rescanned == library.by_path and len(shared) == LIBRARY_SIZE
+    print("results match" if ok else "RESULTS DIFFER")
+    return 0 if ok else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,89 @@
+import os
+import re
+import sys
+import time
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from disc_header import read_game_id, index_by_game_id
+from scan_cache import ScanCache, database_fingerprint
+from scan_pipeline import stream_scan
+from title_index import TitleIndex
+from synthetic import WIITDB_FILE, load_wiitdb, write_fake_library
+
+LIBRARY_SIZE = 5000
+
+
+def clean_filename(name):
+    return re.sub(r'[^a-zA-Z0-9]', '', name).lower()
+
+
+def make_extractor(database):
+    # Same lookups extract_metadata does, without importing the Tk app.
+    title_index = TitleIndex(database, clean_filename)
+    gcid_index = index_by_game_id(database)
+
+    def extract(path):
+        filename = os.path.splitext(os.path.basename(path))[0]
+        key = gcid_index.get(read_game_id(path)) or title_index.best_match(clean_filename(filename))
+        entry = database.get(key, {}) if key else {}
+        return {'gcid': entry.get('gcid', 'UNKNOWN'), 'title': filename, 'path': path, 'size': os.path.getsize(path)}
+    return extract
+
+
+def walk(folder):
+    return [os.path.join(root, name) for root, dirs, files in os.walk(folder) for name in files]
+
+
+def timed_scan(cache_file, folder, extract):
+    # The app's cached scan; extract() here is a closure, so it runs inline rather than on
+    # a process pool.
+    start = time.perf_counter()
+    cache = ScanCache(cache_file, database_fingerprint(WIITDB_FILE))
+    try:
+        results = stream_scan(folder, lambda name: True, extract, cache, workers=1)
+    finally:
+        cache.close()
+    return results, time.perf_counter() - start
+
+
+def main():
+    extract = make_extractor(load_wiitdb())
+    with tempfile.TemporaryDirectory() as workdir:
+        folder = os.path.join(workdir, 'games')
+        os.mkdir(folder)
+        write_fake_library(folder, LIBRARY_SIZE, size=1024 * 1024)
+        cache_file = os.path.join(workdir, 'scan_cache.sqlite')
+
+        start = time.perf_counter()
+        paths = walk(folder)
+        for path in paths:
+            os.stat(path)
+        stat_only = time.perf_counter() - start
+
+        start = time.perf_counter()
+        uncached = [extract(path) for path in walk(folder)]
+        uncached_time = time.perf_counter() - start
+
+        cold, cold_time = timed_scan(cache_file, folder, extract)
+        warm, warm_time = timed_scan(cache_file, folder, extract)
+
+        os.remove(paths[0])
+        with open(paths[1], 'ab') as f:
+            f.write(b'\0')
+        changed, changed_time = timed_scan(cache_file, folder, extract)
+
+    print(f"files: {LIBRARY_SIZE}")
+    print(f"walk + stat only:     {stat_only * 1000:.1f} ms")
+    print(f"no cache:             {uncached_time * 1000:.1f} ms")
+    print(f"cold cache:           {cold_time * 1000:.1f} ms")
+    print(f"warm cache:           {warm_time * 1000:.1f} ms")
+    print(f"warm, 1 del 1 change: {changed_time * 1000:.1f} ms")
+    ok = cold == uncached and warm == uncached and len(changed) == LIBRARY_SIZE - 1
+    print("results match" if ok else "RESULTS DIFFER")
+    return 0 if ok else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,138 @@
+import os
+import sys
+import time
+import tempfile
+import threading
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+# library loads wiitdb_parsed.json relative to the working directory, like the app.
+os.chdir(REPO_ROOT)
+
+from library import Library, scan_gamecube_files, extract_metadata, is_game_file, WIITDB_FILE
+from scan_cache import ScanCache, database_fingerprint
+from scan_pipeline import stream_scan, ScanCancelled, SCAN_WORKERS
+from ui_events import UiEvents, BATCH
+from synthetic import write_fake_library
+
+LIBRARY_SIZE = 10000
+
+
+class Frames:
+    # Stands in for the Tk widget: after() just keeps the next frame for the caller to run.
+    def __init__(self):
+        self.errors = []
+
+    def after(self, ms, callback):
+        self.next_frame = callback
+
+    def report_callback_exception(self, kind, error, traceback):
+        self.errors.append(error)
+
+
+def timed_stream(folder, cache=None, workers=None, processes=True, cancel_after=None):
+    # Returns (results, total seconds, seconds to the first batch, batches).
+    cancelled = threading.Event()
+    batches, first = [], []
+    start = time.perf_counter()
+
+    def on_batch(batch):
+        if not first:
+            first.append(time.perf_counter() - start)
+        batches.append(batch)
+        if cancel_after is not None and sum(map(len, batches)) >= cancel_after:
+            cancelled.set()
+    results = stream_scan(folder, is_game_file, extract_metadata, cache, on_batch, cancelled, workers, processes)
+    return results, time.perf_counter() - start, first[0] if first else None, batches
+
+
+def check_stream_order(folder, expected, frame_per_batch):
+    # The way the GUI wires a scan to the library, with each batch in its own UI frame or
+    # every batch and scan_done in one, then a straggling batch after the publish: each game
+    # must appear once, and the subscriber must load and finish exactly once.
+    library, frames = Library(), Frames()
+    ui = UiEvents(frames)
+    generation = library.begin_load()
+    calls = []
+    library.subscribe(lambda library: calls.append('loaded'), lambda touched, removed, renamed: None,
+                      lambda library: calls.append('finished'))
+    ui.subscribe('scan_batch', lambda batches: library.stream(folder, [m for batch in batches for m in batch],
+                                                              generation), BATCH)
+    ui.subscribe('scan_done', lambda metadata: library.publish(folder, metadata, generation))
+    ui.start()
+
+    def on_batch(batch):
+        ui.post('scan_batch', batch)
+        if frame_per_batch:
+            frames.next_frame()
+    metadata = stream_scan(folder, is_game_file, extract_metadata, on_batch=on_batch)
+    ui.post('scan_done', metadata)
+    frames.next_frame()
+    ui.post('scan_batch', metadata[-10:])
+    frames.next_frame()
+    return library.metadata == expected and len(library.by_path) == len(expected) and calls == ['loaded', 'finished']
+
+
+def check_failing_handler():
+    # A handler that raises is reported, and the calls queued behind it in the same frame
+    # still run.
+    frames = Frames()
+    ui = UiEvents(frames)
+    handled = []
+    ui.subscribe('row_status', lambda payload: 1 / 0)
+    ui.subscribe('scan_done', handled.append)
+    ui.start()
+    ui.post('row_status', 'Copied')
+    ui.post('scan_done', 'done')
+    frames.next_frame()
+    return handled == ['done'] and len(frames.errors) == 1
+
+
+def main():
+    with tempfile.TemporaryDirectory() as workdir:
+        folder = os.path.join(workdir, 'games')
+        os.mkdir(folder)
+        write_fake_library(folder, LIBRARY_SIZE)
+
+        start = time.perf_counter()
+        serial = [extract_metadata(path) for path in scan_gamecube_files(folder)]
+        serial_time = time.perf_counter() - start
+
+        default, default_time, default_first, batches = timed_stream(folder)
+        threads, thread_time, thread_first, _ = timed_stream(folder, workers=SCAN_WORKERS, processes=False)
+        processes, process_time, process_first, _ = timed_stream(folder, workers=SCAN_WORKERS)
+
+        cache_file = os.path.join(workdir, 'scan_cache.sqlite')
+        cache = ScanCache(cache_file, database_fingerprint(WIITDB_FILE))
+        timed_stream(folder, cache)
+        warm, warm_time, warm_first, _ = timed_stream(folder, cache)
+        cache.close()
+
+        start = time.perf_counter()
+        try:
+            timed_stream(folder, cancel_after=500)
+            stopped = False
+        except ScanCancelled:
+            stopped = True
+        cancel_time = time.perf_counter() - start
+        ordered = check_stream_order(folder, serial, True) and check_stream_order(folder, serial, False)
+        survived = check_failing_handler()
+
+    print(f"games: {LIBRARY_SIZE}, cpus: {os.cpu_count()}")
+    print(f"serial walk + extract:         {serial_time * 1000:8.1f} ms (first row after everything)")
+    print(f"pipeline, default workers:     {default_time * 1000:8.1f} ms, first batch {default_first * 1000:6.1f} ms")
+    print(f"pipeline, {SCAN_WORKERS} threads:           {thread_time * 1000:8.1f} ms, first batch {thread_first * 1000:6.1f} ms")
+    print(f"pipeline, {SCAN_WORKERS} processes:         {process_time * 1000:8.1f} ms, first batch {process_first * 1000:6.1f} ms")
+    print(f"pipeline, warm cache:          {warm_time * 1000:8.1f} ms, first batch {warm_first * 1000:6.1f} ms")
+    print(f"cancelled after 500 games:     {cancel_time * 1000:8.1f} ms")
+    streamed = [m for batch in batches for m in batch]
+    print(f"library after streaming:       {'every game once' if ordered else 'GAMES REPEATED OR MISSING'}")
+    print(f"frame after a failing handler: {'still handled' if survived else 'CALLS DROPPED'}")
+    ok = default == serial and threads == serial and processes == serial and warm == serial and streamed == serial
+    ok = ok and stopped and ordered and survived
+    print("results match" if ok else "RESULTS DIFFER")
+    return 0 if ok else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,144 @@
+import os
+import sys
+import time
+import random
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from filter_index import FilterIndex, DEFAULT_BRANDS
+from search_index import SearchIndex, SEARCH_FIELDS, FUZZY_MIN_LENGTH, tokenize, within_one_edit
+from synthetic import synthetic_games
+
+LIBRARY_SIZE = 10000
+REGIONS = ['NTSC-U', 'PAL', 'NTSC-J', 'Unknown']
+# Typed one key at a time, typos included.
+SEARCHES = ['legend of zelda wind waker', 'mario kart double dash', 'pokemon colosseum', 'zlda',
+            'metriod prime', 'capcom fighting', 'racing', 'harvest moon nintendo', 'sonic adventure sega']
+
+
+def synthetic_metadata(count):
+    rng = random.Random(0)
+    metadata, descriptions = [], {}
+    for i, (name, entry) in enumerate(synthetic_games(count)):
+        entry = entry or {}
+        path = f"/games/{i:05d} {name}"
+        metadata.append({
+            'path': path,
+            'title': os.path.splitext(name)[0],
+            'wiitdb_key': entry.get('gcid'),
+            'developer': entry.get('developer', 'Unknown'),
+            'publisher': entry.get('publisher', 'Unknown'),
+            'genre': entry.get('genre', 'Unknown'),
+            'genre_list': [g.strip() for g in entry.get('genre', 'Unknown').split(',')],
+            'input_players': entry.get('input', {}).get('players', '1'),
+            'region': rng.choice(REGIONS),
+            'size': rng.randint(100, 1500) * 1024 * 1024,
+        })
+        descriptions[path] = entry.get('description', '')
+    return metadata, descriptions
+
+
+def linear_search(metadata, describe, text):
+    # Every game's words checked against every term.
+    terms = set(tokenize(text))
+    found = set()
+    for i, m in enumerate(metadata):
+        words = set()
+        for field in SEARCH_FIELDS:
+            words.update(tokenize(m[field]))
+        words.update(tokenize(describe(m)))
+        if all(any(word.startswith(term) or (len(term) >= FUZZY_MIN_LENGTH and within_one_edit(term, word))
+                   for word in words) for term in terms):
+            found.add(i)
+    return found
+
+
+def main():
+    metadata, descriptions = synthetic_metadata(LIBRARY_SIZE)
+    describe = lambda m: descriptions[m['path']]
+
+    start = time.perf_counter()
+    index = SearchIndex(metadata, describe)
+    build_time = time.perf_counter() - start
+
+    keystrokes, worst, total = 0, 0.0, 0.0
+    for text in SEARCHES:
+        index.cache.clear()
+        for end in range(1, len(text) + 1):
+            start = time.perf_counter()
+            index.positions(text[:end])
+            elapsed = time.perf_counter() - start
+            keystrokes += 1
+            total += elapsed
+            worst = max(worst, elapsed)
+
+    filters = {'players': {'1', '2', '4'}, 'regions': set(REGIONS), 'genres': set(), 'brands': set(DEFAULT_BRANDS),
+               'main_folder': True, 'external_folder': True}
+    filter_index = FilterIndex(metadata, (), DEFAULT_BRANDS, describe)
+    filter_index.search('warmup')
+    start = time.perf_counter()
+    for text in SEARCHES:
+        for end in range(1, len(text) + 1):
+            filters['search'] = text[:end]
+            filter_index.selection(filter_index.query(filters), filters['search'])
+            filter_index.counts(filters)
+    combined = (time.perf_counter() - start) / keystrokes
+
+    # Title matches are listed before games only matched through their other fields.
+    filters['search'] = 'mario'
+    ranked = filter_index.selection(filter_index.query(filters), 'mario')[0]
+    in_title = [any(word.startswith('mario') or within_one_edit('mario', word)
+                    for word in tokenize(filter_index.metadata_list[filter_index.positions[path]]['title']))
+                for path in ranked]
+    ranking_ok = in_title == sorted(in_title, reverse=True)
+
+    # A rebuild over the same games keeps the search index; streamed batches and changes
+    # update it in place instead of dropping it.
+    start = time.perf_counter()
+    rebuilt = FilterIndex(metadata, (), DEFAULT_BRANDS, describe, previous=filter_index)
+    rebuilt.search('mario')
+    rebuild_time = time.perf_counter() - start
+    half = len(metadata) // 2
+    streamed = FilterIndex(metadata[:half], (), DEFAULT_BRANDS, describe)
+    streamed.search('warmup')
+    start = time.perf_counter()
+    for i in range(half, len(metadata), 250):
+        streamed.update(metadata[i:i + 250])
+        streamed.search('mario')
+    stream_time = time.perf_counter() - start
+    changed = dict(metadata[0], title='Zelda Kart')
+    streamed.update([changed])
+    streamed.remove(metadata[1]['path'])
+    expected_index = SearchIndex([changed] + metadata[2:], describe)
+    # An index built elsewhere is only taken over while the games are the ones it indexed.
+    handed = FilterIndex(metadata, (), DEFAULT_BRANDS, describe)
+    stale = FilterIndex(metadata, (), DEFAULT_BRANDS, describe)
+    stale.update([changed])
+    handoff_ok = handed.adopt_search_index(metadata, index) and not stale.adopt_search_index(metadata, index)
+    incremental_ok = handoff_ok and rebuilt.search_index is filter_index.search_index and all(
+        {streamed.paths[i] for i in streamed.indices(streamed.search(text))} ==
+        {([changed] + metadata[2:])[i]['path'] for i in expected_index.positions(text)}
+        for text in SEARCHES + ['zelda kart'] if expected_index.positions(text))
+
+    start = time.perf_counter()
+    expected = [linear_search(metadata, describe, text) for text in SEARCHES]
+    linear_time = (time.perf_counter() - start) / len(SEARCHES)
+    found = [index.positions(text) for text in SEARCHES]
+
+    print(f"games: {LIBRARY_SIZE}, words indexed: {len(index.words)}")
+    print(f"index build:                   {build_time * 1000:8.1f} ms")
+    print(f"linear search:                 {linear_time * 1000:8.1f} ms/query")
+    print(f"search as you type:            {total / keystrokes * 1000:8.2f} ms/keystroke (worst {worst * 1000:.2f} ms)")
+    print(f"  with facets, rows and counts:{combined * 1000:8.2f} ms/keystroke")
+    print(f"rebuild keeping the index:     {rebuild_time * 1000:8.1f} ms")
+    print(f"streamed batches of 250:       {stream_time * 1000:8.1f} ms (searched after each)")
+    for text, positions in zip(SEARCHES, found):
+        print(f"  {text!r}: {len(positions)} games")
+    print(f"title matches first: {'yes' if ranking_ok else 'NO'}, incremental index: {'ok' if incremental_ok else 'DIFFERS'}")
+    ok = found == expected and ranking_ok and incremental_ok
+    print("results match" if ok else "RESULTS DIFFER")
+    return 0 if ok else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
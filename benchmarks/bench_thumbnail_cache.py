@@ -0,0 +1,98 @@
+import os
+import sys
+import time
+import random
+import tempfile
+from concurrent.futures import wait
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PIL import Image
+from thumbnail_cache import ThumbnailCache, THUMBNAIL_SIZE
+
+COVERS = 300
+COVER_SIZE = (512, 512)
+
+
+def write_covers(folder, count):
+    rng = random.Random(0)
+    gcids = []
+    for i in range(count):
+        gcid = f"G{i:04d}01"
+        img = Image.new('RGB', COVER_SIZE, (rng.randrange(256), rng.randrange(256), rng.randrange(256)))
+        img.paste((rng.randrange(256), 0, 0), (64, 64, 448, 448))
+        img.save(os.path.join(folder, f"{gcid}.png"))
+        gcids.append(gcid)
+    return gcids
+
+
+def synchronous_resize(folder, gcids):
+    # What make_tile did for every tile on every refresh.
+    return [Image.open(os.path.join(folder, f"{gcid}.png")).resize(THUMBNAIL_SIZE) for gcid in gcids]
+
+
+def load_all(cache, gcids):
+    ready = {}
+    futures = [cache.request(gcid, ready.__setitem__) for gcid in gcids]
+    wait(futures)
+    return ready
+
+
+def main():
+    with tempfile.TemporaryDirectory() as workdir:
+        covers = os.path.join(workdir, 'discs')
+        thumbs = os.path.join(workdir, 'thumbnails')
+        os.mkdir(covers)
+        gcids = write_covers(covers, COVERS)
+        resolve = lambda gcid: os.path.join(covers, f"{gcid}.png")
+
+        start = time.perf_counter()
+        expected = synchronous_resize(covers, gcids)
+        sync_time = time.perf_counter() - start
+
+        cache = ThumbnailCache(resolve, thumbs)
+        start = time.perf_counter()
+        cold = load_all(cache, gcids)
+        cold_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        warm = load_all(cache, gcids)
+        memory_time = time.perf_counter() - start
+        cache.close()
+
+        disk_cache = ThumbnailCache(resolve, thumbs)
+        start = time.perf_counter()
+        from_disk = load_all(disk_cache, gcids)
+        disk_time = time.perf_counter() - start
+
+        small = ThumbnailCache(resolve, thumbs, max_items=50)
+        load_all(small, gcids)
+        bounded = len(small.memory) == 50
+        disk_cache.close()
+        small.close()
+
+        # Tiles scrolled out of view cancel their requests; only those a worker already
+        # picked up still decode.
+        scrolled = ThumbnailCache(resolve, os.path.join(workdir, 'scrolled'), workers=1)
+        decoded = {}
+        futures = [scrolled.request(gcid, decoded.__setitem__) for gcid in gcids]
+        cancelled = sum(future.cancel() for future in futures[1:])
+        wait(futures)
+        skipped = cancelled > 0 and len(decoded) == COVERS - cancelled
+        scrolled.close()
+
+    print(f"covers: {COVERS} at {COVER_SIZE[0]}x{COVER_SIZE[1]}")
+    print(f"synchronous open + resize: {sync_time * 1000:8.1f} ms")
+    print(f"pool, cold (decode+store): {cold_time * 1000:8.1f} ms")
+    print(f"pool, disk tier:           {disk_time * 1000:8.1f} ms")
+    print(f"pool, memory tier:         {memory_time * 1000:8.1f} ms")
+    print(f"scrolled past:             {cancelled} of {COVERS} decodes cancelled")
+    ok = (len(cold) == len(warm) == len(from_disk) == COVERS and bounded
+          and all(cold[gcid].size == from_disk[gcid].size == img.size for gcid, img in zip(gcids, expected))
+          and all(warm[gcid] is cold[gcid] for gcid in gcids) and skipped)
+    print("results match" if ok else "RESULTS DIFFER")
+    return 0 if ok else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
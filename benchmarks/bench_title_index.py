@@ -0,0 +1,56 @@
+import os
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from title_index import TitleIndex
+from synthetic import load_wiitdb, synthetic_filenames
+
+LIBRARY_SIZE = 10000
+
+
+def clean_filename(name):
+    return re.sub(r'[^a-zA-Z0-9]', '', name).lower()
+
+
+def linear_best_match(database, clean_name):
+    best_match, best_score = None, 0
+    for key in database:
+        key_clean = clean_filename(key)
+        if clean_name in key_clean or key_clean in clean_name:
+            score = len(os.path.commonprefix([clean_name, key_clean]))
+            if score > best_score:
+                best_score = score
+                best_match = key
+    return best_match
+
+
+def main():
+    database = load_wiitdb()
+    names = [clean_filename(os.path.splitext(name)[0]) for name in synthetic_filenames(LIBRARY_SIZE)]
+
+    start = time.perf_counter()
+    index = TitleIndex(database, clean_filename)
+    build_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    indexed = [index.best_match(name) for name in names]
+    indexed_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    linear = [linear_best_match(database, name) for name in names]
+    linear_time = time.perf_counter() - start
+
+    mismatches = sum(1 for a, b in zip(indexed, linear) if a != b)
+    print(f"files: {len(names)}, database entries: {len(database)}")
+    print(f"index build: {build_time * 1000:.1f} ms")
+    print(f"linear scan: {linear_time:.2f} s")
+    print(f"indexed:     {indexed_time:.2f} s ({linear_time / max(indexed_time, 1e-9):.0f}x faster)")
+    print(f"mismatches:  {mismatches}")
+    return 1 if mismatches else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
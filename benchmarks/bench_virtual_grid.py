@@ -0,0 +1,73 @@
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import tkinter as tk
+
+LIBRARY_SIZES = [1000, 5000]
+SCROLL_STEPS = 50
+
+
+def label_grid(root, count, photo):
+    # What refresh_grid did: one Label per game, gridded into a frame on a Canvas.
+    canvas = tk.Canvas(root)
+    canvas.pack(fill='both', expand=True)
+    inner = tk.Frame(canvas)
+    canvas.create_window((0, 0), window=inner, anchor='nw')
+    inner.bind('<Configure>', lambda e: canvas.configure(scrollregion=canvas.bbox('all')))
+    columns = max(canvas.winfo_width() // 100, 1)
+    for i in range(count):
+        tk.Label(inner, image=photo, width=100, height=100).grid(row=i // columns, column=i % columns, padx=1, pady=1)
+    root.update()
+    return canvas
+
+
+def scroll(root, yview):
+    start = time.perf_counter()
+    for step in range(SCROLL_STEPS):
+        yview('moveto', step / SCROLL_STEPS)
+        root.update()
+    return (time.perf_counter() - start) / SCROLL_STEPS
+
+
+def main():
+    try:
+        root = tk.Tk()
+    except tk.TclError as e:
+        print(f"skipping grid timings, no display: {e}")
+        return 0
+    from virtual_grid import VirtualGrid
+
+    root.geometry("1000x800")
+    photo = tk.PhotoImage(width=100, height=100)
+    root.update()
+    for count in LIBRARY_SIZES:
+        start = time.perf_counter()
+        canvas = label_grid(root, count, photo)
+        build_time = time.perf_counter() - start
+        label_scroll = scroll(root, canvas.yview)
+        widgets = len(canvas.winfo_children()[0].winfo_children())
+        canvas.destroy()
+
+        grid = VirtualGrid(root, lambda key: photo)
+        grid.pack(fill='both', expand=True)
+        root.update()
+        start = time.perf_counter()
+        grid.set_items(range(count))
+        root.update()
+        virtual_time = time.perf_counter() - start
+        virtual_scroll = scroll(root, grid.canvas.yview)
+        items = len(grid.pool)
+        grid.destroy()
+
+        print(f"games: {count}")
+        print(f"  label grid:   build {build_time * 1000:8.1f} ms, scroll {label_scroll * 1000:6.1f} ms/step, {widgets} widgets")
+        print(f"  virtual grid: build {virtual_time * 1000:8.1f} ms, scroll {virtual_scroll * 1000:6.1f} ms/step, {items} canvas items")
+    root.destroy()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
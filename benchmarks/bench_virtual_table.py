@@ -0,0 +1,105 @@
+import os
+import sys
+import json
+import time
+import random
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import tkinter as tk
+from tkinter import ttk
+
+from synthetic import synthetic_games
+
+LIBRARY_SIZE = 20000
+COLUMNS = [
+    'In External Folder', 'GameCube ID', 'Game Title', 'Console', 'Region', 'Developer', 'Publisher', 'genre',
+    'Game Description', 'Release Date', 'ESRB Rating', 'online_players',
+    'Max Players', 'Controls', 'path', 'size'
+]
+REGIONS = ['NTSC-U', 'PAL', 'NTSC-J', 'Unknown']
+
+
+def synthetic_rows(count):
+    rng = random.Random(0)
+    rows = {}
+    for i, (name, entry) in enumerate(synthetic_games(count)):
+        entry = entry or {}
+        path = f"/games/{i:05d} {name}"
+        rows[path] = {
+            'players': entry.get('input', {}).get('players', '1'),
+            'region': rng.choice(REGIONS),
+            'values': ("", entry.get('gcid', 'UNKNOWN'), name, 'GameCube', 'NTSC-U', entry.get('developer', ''),
+                       entry.get('publisher', ''), entry.get('genre', ''), entry.get('description', ''),
+                       entry.get('release_date', ''), entry.get('esrb_rating', ''), '0',
+                       entry.get('input', {}).get('players', '1'), json.dumps(entry.get('input', {}).get('controls', [])),
+                       path, '1.35 GB'),
+        }
+    return rows
+
+
+def filter_toggles():
+    # Uncheck and re-check each player count and region, like clicking through the filter boxes.
+    players, regions = {'1', '2', '3', '4', '6', '8', '9'}, set(REGIONS)
+    steps = []
+    for value in ['1', '2', '4']:
+        steps.append((players - {value}, regions))
+        steps.append((players, regions))
+    for value in REGIONS:
+        steps.append((players, regions - {value}))
+        steps.append((players, regions))
+    return steps
+
+
+def filtered_keys(rows, players, regions):
+    return [path for path, row in rows.items() if row['players'] in players and row['region'] in regions]
+
+
+def main():
+    rows = synthetic_rows(LIBRARY_SIZE)
+    steps = filter_toggles()
+    start = time.perf_counter()
+    for players, regions in steps:
+        filtered_keys(rows, players, regions)
+    model_time = (time.perf_counter() - start) / len(steps)
+    print(f"rows: {LIBRARY_SIZE}, toggles: {len(steps)}")
+    print(f"filter pass only:       {model_time * 1000:8.1f} ms/toggle")
+
+    try:
+        root = tk.Tk()
+    except tk.TclError as e:
+        print(f"skipping Treeview timings, no display: {e}")
+        return 0
+    from virtual_table import VirtualTable
+
+    root.geometry("1500x900")
+    tree = ttk.Treeview(root, columns=COLUMNS, show='headings')
+    tree.pack(fill='both', expand=True)
+    root.update()
+    start = time.perf_counter()
+    for players, regions in steps:
+        for item in tree.get_children():
+            tree.delete(item)
+        for path in filtered_keys(rows, players, regions):
+            tree.insert('', 'end', values=rows[path]['values'])
+        root.update()
+    rebuild_time = (time.perf_counter() - start) / len(steps)
+    tree.destroy()
+
+    table = VirtualTable(root, COLUMNS, lambda path: rows[path]['values'])
+    table.pack(fill='both', expand=True)
+    root.update()
+    start = time.perf_counter()
+    for players, regions in steps:
+        table.set_rows(filtered_keys(rows, players, regions))
+        root.update()
+    virtual_time = (time.perf_counter() - start) / len(steps)
+    root.destroy()
+
+    print(f"delete + reinsert:      {rebuild_time * 1000:8.1f} ms/toggle")
+    print(f"virtual table:          {virtual_time * 1000:8.1f} ms/toggle ({len(table.pool)} live rows)")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
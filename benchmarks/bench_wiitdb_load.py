@@ -0,0 +1,68 @@
+import os
+import sys
+import json
+import time
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from wiitdb_store import load_wiitdb, build, genre_vocabulary
+from synthetic import WIITDB_FILE
+
+REPEATS = 20
+
+
+def json_startup():
+    # What main.py did at import time before the compiled store.
+    with open(WIITDB_FILE, 'r', encoding='utf-8') as f:
+        database = json.load(f)
+    genre_set = set()
+    for entry in database.values():
+        if 'genre' in entry and isinstance(entry['genre'], str):
+            for g in entry['genre'].split(','):
+                genre_set.add(g.strip())
+    return database, sorted(genre_set)
+
+
+def best_of(fn, *args):
+    best = float('inf')
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        result = fn(*args)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    with tempfile.TemporaryDirectory() as workdir:
+        compiled = os.path.join(workdir, 'wiitdb.sqlite')
+        start = time.perf_counter()
+        build(WIITDB_FILE, compiled)
+        build_time = time.perf_counter() - start
+
+        json_time, (database, genres) = best_of(json_startup)
+        store_time, store = best_of(load_wiitdb, WIITDB_FILE, compiled)
+
+        keys = list(database)
+        start = time.perf_counter()
+        described = [store.description(key) for key in keys[:40]]
+        describe_time = time.perf_counter() - start
+
+        json_size = os.path.getsize(WIITDB_FILE)
+        compiled_size = os.path.getsize(compiled)
+
+    same_entries = all({k: v for k, v in database[key].items() if k != 'description'} == store[key] for key in keys)
+    same_descriptions = described == [database[key].get('description') for key in keys[:40]]
+    ok = list(store) == keys and same_entries and same_descriptions and store.genres == genres
+    ok = ok and genre_vocabulary(database.values()) == genres
+    print(f"entries: {len(keys)}, json: {json_size / 1024:.0f} KB, compiled: {compiled_size / 1024:.0f} KB")
+    print(f"compile step:            {build_time * 1000:7.1f} ms")
+    print(f"json.load + genre walk:  {json_time * 1000:7.1f} ms")
+    print(f"compiled store load:     {store_time * 1000:7.1f} ms")
+    print(f"40 lazy descriptions:    {describe_time * 1000:7.1f} ms")
+    print("contents match" if ok else "CONTENTS DIFFER")
+    return 0 if ok else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,217 @@
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import tempfile
+import statistics
+import subprocess
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+# library loads wiitdb_parsed.json relative to the working directory, like the app.
+os.chdir(REPO_ROOT)
+
+from library import scan_gamecube_files, extract_metadata, is_game_file, WIITDB_FILE
+from scan_cache import ScanCache, database_fingerprint
+from scan_pipeline import stream_scan
+from filter_index import FilterIndex, DEFAULT_BRANDS
+from external_snapshot import ExternalSnapshot
+from disc_images import DiscImageIndex
+from copy_engine import CopyEngine, jobs_for_folder
+from synthetic import write_fake_library
+
+# Runs every hot path against synthetic libraries of fake ISOs (a real header, then
+# zeros) and writes the timings as JSON, so two commits can be compared:
+#   python benchmarks/run_suite.py --output before.json
+#   python benchmarks/run_suite.py --output after.json --compare before.json
+
+SIZES = [100, 1000, 10000]
+FILE_SIZE = 64 * 1024
+COPY_FILES = 100
+REPEAT = 3
+RESULTS_FOLDER = os.path.join(REPO_ROOT, 'benchmarks', 'results')
+
+
+def timed(work, repeat=REPEAT):
+    # Median of `repeat` runs, and the last run's return value.
+    times, result = [], None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = work()
+        times.append(time.perf_counter() - start)
+    return statistics.median(times), result
+
+
+def all_filters(index):
+    return {'players': set(index.players), 'regions': set(index.regions), 'genres': set(),
+            'brands': set(DEFAULT_BRANDS), 'main_folder': True, 'external_folder': True}
+
+
+def filter_toggles(index):
+    # Drop each player count and region in turn, like clicking through the checkboxes.
+    base = all_filters(index)
+    steps = [dict(base, players=base['players'] - {value}) for value in base['players']]
+    steps += [dict(base, regions=base['regions'] - {value}) for value in base['regions']]
+    return steps or [base]
+
+
+def bench_library(count, workdir, root=None):
+    folder = os.path.join(workdir, 'games')
+    card = os.path.join(workdir, 'card')
+    assets = os.path.join(workdir, 'assets')
+    for path in (folder, card, assets):
+        os.mkdir(path)
+    library = write_fake_library(folder, count, size=FILE_SIZE)
+    for path, gcid in library[::2]:
+        with open(os.path.join(card, os.path.basename(path)), 'wb') as f:
+            f.truncate(FILE_SIZE)
+    for path, gcid in library[1::3]:
+        open(os.path.join(assets, f"{gcid}.png"), 'wb').close()
+    results = {}
+
+    seconds, paths = timed(lambda: scan_gamecube_files(folder))
+    results['scan_gamecube_files'] = seconds
+
+    seconds, metadata = timed(lambda: [extract_metadata(path) for path in paths], repeat=1)
+    results['extract_metadata'] = seconds
+    results['stream_scan'], _ = timed(lambda: stream_scan(folder, is_game_file, extract_metadata), repeat=1)
+
+    cache_file = os.path.join(workdir, 'scan_cache.sqlite')
+
+    def cached_scan():
+        # Library.scan: the streamed scan over a scan cache opened for it.
+        cache = ScanCache(cache_file, database_fingerprint(WIITDB_FILE))
+        try:
+            return stream_scan(folder, is_game_file, extract_metadata, cache)
+        finally:
+            cache.close()
+    cached_scan()
+    results['scan_cache_warm'], _ = timed(cached_scan)
+
+    def transfer_status():
+        # update_transfer_status_column: one snapshot of the card, then a lookup per game.
+        snapshot = ExternalSnapshot.scan(card)
+        return [m['path'] for m in metadata if snapshot.has_copy(os.path.basename(m['path']), m['size'])]
+    results['update_transfer_status_column'], present = timed(transfer_status)
+
+    index = FilterIndex(metadata, present)
+    steps = filter_toggles(index)
+
+    def filter_clicks():
+        for filters in steps:
+            index.selection(index.query(filters))
+            index.counts(filters)
+    seconds, _ = timed(filter_clicks)
+    results['apply_filters'] = seconds / len(steps)
+    results['filter_index_build'], _ = timed(lambda: FilterIndex(metadata, present))
+
+    gcids = [gcid for path, gcid in library]
+
+    def disc_images():
+        # Index the assets folder once, then look up every game, as the grid does.
+        images = DiscImageIndex(assets)
+        return [images.find(gcid) for gcid in gcids]
+    results['find_closest_disc_image'], _ = timed(disc_images)
+
+    copy_paths = paths[:COPY_FILES]
+
+    def copy():
+        output = tempfile.mkdtemp(dir=workdir)
+        CopyEngine().run(jobs_for_folder(copy_paths, output))
+    seconds, _ = timed(copy)
+    results['copy_files'] = seconds
+    results['copy_mb_per_s'] = len(copy_paths) * FILE_SIZE / 1024 / 1024 / seconds if seconds else None
+
+    if root is not None:
+        results.update(bench_table(root, metadata, index, steps))
+    return results
+
+
+def bench_table(root, metadata, index, steps):
+    from virtual_table import VirtualTable
+    by_path = {m['path']: m for m in metadata}
+    columns = ['GameCube ID', 'Game Title', 'Region', 'path', 'size']
+    table = VirtualTable(root, columns, lambda path: tuple(by_path[path][col] for col in
+                                                           ('gcid', 'title', 'region', 'path', 'size')))
+    table.pack(fill='both', expand=True)
+    root.update()
+
+    def filter_clicks():
+        for filters in steps:
+            table.set_rows(index.selection(index.query(filters))[0])
+            root.update()
+    seconds, _ = timed(filter_clicks)
+    table.destroy()
+    return {'apply_filters_with_table': seconds / len(steps)}
+
+
+def open_display():
+    try:
+        import tkinter as tk
+        root = tk.Tk()
+    except Exception as e:
+        print(f"skipping Tk timings, no display: {e}")
+        return None
+    root.geometry("1500x900")
+    return root
+
+
+def git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=REPO_ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(old, new):
+    for size, results in new['results'].items():
+        print(f"{size} files vs {old.get('commit') or 'baseline'}:")
+        for name, seconds in results.items():
+            before = old['results'].get(size, {}).get(name)
+            if before and seconds and not name.endswith('_per_s'):
+                print(f"  {name:<32} {before * 1000:10.2f} ms -> {seconds * 1000:10.2f} ms  ({before / seconds:5.2f}x)")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Time the hot paths on synthetic libraries.")
+    parser.add_argument('--sizes', default=','.join(map(str, SIZES)), help="comma-separated library sizes")
+    parser.add_argument('--output', help="results file (default benchmarks/results/<commit>.json)")
+    parser.add_argument('--compare', help="earlier results file to compare against")
+    parser.add_argument('--no-tk', action='store_true', help="skip the Treeview timings even with a display")
+    args = parser.parse_args(argv)
+
+    root = None if args.no_tk else open_display()
+    report = {
+        'commit': git_revision(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'file_size': FILE_SIZE,
+        'results': {},
+    }
+    for count in (int(size) for size in args.sizes.split(',')):
+        with tempfile.TemporaryDirectory() as workdir:
+            results = bench_library(count, workdir, root)
+        report['results'][str(count)] = results
+        print(f"{count} files:")
+        for name, value in results.items():
+            unit = 'MB/s' if name.endswith('_per_s') else 'ms'
+            print(f"  {name:<32} {value if unit == 'MB/s' else value * 1000:10.2f} {unit}")
+    if root is not None:
+        root.destroy()
+
+    output = args.output or os.path.join(RESULTS_FOLDER, f"{report['commit'] or 'results'}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    print(f"wrote {output}")
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            compare(json.load(f), report)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,70 @@
+import os
+import json
+import random
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+WIITDB_FILE = os.path.join(REPO_ROOT, 'wiitdb_parsed.json')
+REGION_TAGS = ['(USA)', '(Europe)', '(Japan)', '']
+EXTENSIONS = ['.iso', '.gcm', '.nkit.iso']
+
+
+def load_wiitdb():
+    with open(WIITDB_FILE, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def safe_filename(name):
+    return ''.join(c for c in name if c not in '<>:"/\\|?*')
+
+
+def synthetic_games(count, seed=0):
+    # (filename, WiiTDB entry or None) pairs; None marks a title the database doesn't know.
+    rng = random.Random(seed)
+    entries = [entry for entry in load_wiitdb().values() if entry.get('title')]
+    games = []
+    for i in range(count):
+        roll = rng.random()
+        entry = rng.choice(entries)
+        if roll < 0.8:
+            title = entry['title']
+        elif roll < 0.9:
+            title = entry['title'] + f" (Disc {rng.randint(1, 2)})"
+        else:
+            title, entry = f"Homebrew Demo {i}", None
+        tag = rng.choice(REGION_TAGS)
+        name = f"{title} {tag}".strip() if tag else title
+        games.append((safe_filename(name) + rng.choice(EXTENSIONS), entry))
+    return games
+
+
+def synthetic_filenames(count, seed=0):
+    return [name for name, entry in synthetic_games(count, seed)]
+
+
+def disc_header(gcid, title='', nkit=False):
+    header = bytearray(0x440)
+    header[0:6] = gcid.encode('ascii')
+    header[0x1C:0x20] = b'\xc2\x33\x9f\x3d'
+    name = title.encode('ascii', errors='replace')[:0x3DF]
+    header[0x20:0x20 + len(name)] = name
+    if nkit:
+        header[0x200:0x204] = b'NKIT'
+    return bytes(header)
+
+
+def write_fake_disc(path, gcid, title='', size=0):
+    # Header-only image; `size` extends it sparsely so size checks see a real-looking file.
+    with open(path, 'wb') as f:
+        f.write(disc_header(gcid, title, nkit=path.lower().endswith('.nkit.iso')))
+        if size:
+            f.truncate(size)
+
+
+def write_fake_library(folder, count, seed=0, size=0):
+    paths = []
+    for i, (name, entry) in enumerate(synthetic_games(count, seed)):
+        path = os.path.join(folder, f"{i:05d} {name}")
+        gcid = entry['gcid'] if entry else f"H{i % 1000:03d}01"
+        write_fake_disc(path, gcid, entry['title'] if entry else name, size)
+        paths.append((path, gcid))
+    return paths
@@ -0,0 +1,193 @@
+import os
+import json
+import datetime
+from copy_engine import jobs_for_folder
+
+# Cards are sold in decimal gigabytes.
+CARD_SIZES = {'32 GB': 32 * 1000 ** 3, '64 GB': 64 * 1000 ** 3, '128 GB': 128 * 1000 ** 3}
+# exFAT's default allocation unit on 32-256 GB SDXC cards; every file is rounded up to it.
+CLUSTER_SIZE = 128 * 1024
+# Allocation tables, directory entries and the like.
+RESERVED_FRACTION = 0.01
+# The exact solve only covers the items around the greedy cut-off, quantized to this many steps.
+CORE_ITEMS = 40
+DP_RESOLUTION = 2000
+
+PRIORITIES = ('count', 'players', 'newest', 'genre')
+EPOCH = datetime.date(2000, 1, 1)
+
+
+def allocated_size(size, cluster_size=CLUSTER_SIZE):
+    return -(-size // cluster_size) * cluster_size
+
+
+def usable_capacity(capacity):
+    return int(capacity * (1 - RESERVED_FRACTION))
+
+
+def release_value(m):
+    try:
+        released = datetime.date.fromisoformat(m.get('release_date', ''))
+    except ValueError:
+        return 1.0
+    return 1.0 + max(0, (released - EPOCH).days) / 365
+
+
+def players_value(m):
+    try:
+        return float(max(1, int(m.get('input_players', 1))))
+    except (TypeError, ValueError):
+        return 1.0
+
+
+def priority_function(priority, genre_weights=None):
+    # Every game is worth at least 1, so spare room still goes to the most games.
+    if priority == 'players':
+        return players_value
+    if priority == 'newest':
+        return release_value
+    if priority == 'genre':
+        weights = genre_weights or {}
+        return lambda m: 1.0 + sum(weights.get(genre, 0) for genre in m.get('genre_list', []))
+    return lambda m: 1.0
+
+
+def choose_subset(items, capacity):
+    # Items are (weight, value, payload). Sorting by value density and filling greedily gets
+    # everything but the items around the cut-off right, so only those (the "core") are
+    # solved exactly with a 0/1 knapsack DP; whatever the DP's rounding leaves free is
+    # filled greedily afterwards.
+    order = sorted(items, key=lambda item: (-item[1] / item[0] if item[0] else float('-inf'), item[0]))
+    used, cut = 0, len(order)
+    for i, (weight, value, payload) in enumerate(order):
+        if used + weight > capacity:
+            cut = i
+            break
+        used += weight
+    if cut == len(order):
+        return [payload for weight, value, payload in order]
+
+    start, end = max(0, cut - CORE_ITEMS), min(len(order), cut + CORE_ITEMS)
+    chosen = order[:start]
+    used = sum(weight for weight, value, payload in chosen)
+    core = order[start:end]
+    picked = set(_knapsack(core, capacity - used))
+    for i, item in enumerate(core):
+        if i in picked:
+            chosen.append(item)
+            used += item[0]
+    for i, item in enumerate(order[start:], start):
+        if i - start not in picked and used + item[0] <= capacity:
+            chosen.append(item)
+            used += item[0]
+    return [payload for weight, value, payload in chosen]
+
+
+def _knapsack(items, capacity):
+    if capacity <= 0 or not items:
+        return []
+    # Rounding weights up keeps every DP answer feasible in real bytes.
+    unit = max(1, -(-capacity // DP_RESOLUTION))
+    slots = capacity // unit
+    units = [-(-weight // unit) for weight, value, payload in items]
+    best = [0.0] * (slots + 1)
+    keep = []
+    for (weight, value, payload), size in zip(items, units):
+        row = bytearray(slots + 1)
+        for c in range(slots, size - 1, -1):
+            candidate = best[c - size] + value
+            if candidate > best[c]:
+                best[c] = candidate
+                row[c] = 1
+        keep.append(row)
+    picked, c = [], slots
+    for i in range(len(items) - 1, -1, -1):
+        if keep[i][c]:
+            picked.append(i)
+            c -= units[i]
+    return picked
+
+
+class CardPlan:
+    # One card's worth of games: `copy` still has to go on the card, `present` is already there.
+
+    def __init__(self, capacity, copy, present, other_bytes, cluster_size, value):
+        self.capacity = capacity
+        self.copy = copy
+        self.present = present
+        self.other_bytes = other_bytes
+        self.cluster_size = cluster_size
+        self.value = value
+
+    def games(self):
+        return self.present + self.copy
+
+    def copy_bytes(self):
+        return sum(m['size'] for m in self.copy)
+
+    def used_bytes(self):
+        return self.other_bytes + sum(allocated_size(m['size'], self.cluster_size) for m in self.games())
+
+    def free_bytes(self):
+        return usable_capacity(self.capacity) - self.used_bytes()
+
+    def jobs(self, output_folder):
+        return jobs_for_folder([m['path'] for m in self.copy], output_folder)
+
+    def to_dict(self):
+        return {
+            'capacity': self.capacity,
+            'used': self.used_bytes(),
+            'free': self.free_bytes(),
+            'value': self.value,
+            'copy': [m['path'] for m in self.copy],
+            'present': [m['path'] for m in self.present],
+        }
+
+
+def plan_cards(games, capacity, priority='count', cards=1, genre_weights=None, snapshot=None,
+               cluster_size=CLUSTER_SIZE):
+    # `snapshot` (an ExternalSnapshot) describes the first card: games already on it are kept
+    # and cost nothing to copy, and anything else on it counts against the space. Later
+    # cards are planned empty from whatever the earlier ones left over.
+    value_of = priority_function(priority, genre_weights)
+    present, remaining, other_bytes = [], [], 0
+    if snapshot is not None and snapshot.folder:
+        present_names = set()
+        for m in games:
+            name = os.path.basename(m['path'])
+            if snapshot.has_copy(name, m['size']):
+                present.append(m)
+                present_names.add(name)
+            else:
+                remaining.append(m)
+        other_bytes = sum(allocated_size(size, cluster_size)
+                          for name, (size, mtime) in snapshot.entries.items() if name not in present_names)
+    else:
+        remaining = list(games)
+
+    plans = []
+    for _ in range(max(1, cards)):
+        room = usable_capacity(capacity) - other_bytes - sum(allocated_size(m['size'], cluster_size) for m in present)
+        items = [(allocated_size(m['size'], cluster_size), value_of(m), m) for m in remaining]
+        copy = choose_subset(items, room) if room > 0 else []
+        copied = {id(m) for m in copy}
+        order = {id(m): i for i, m in enumerate(remaining)}
+        copy.sort(key=lambda m: order[id(m)])
+        plans.append(CardPlan(capacity, copy, present, other_bytes, cluster_size,
+                              sum(value_of(m) for m in present + copy)))
+        remaining = [m for m in remaining if id(m) not in copied]
+        present, other_bytes = [], 0
+        if not remaining:
+            break
+    return plans
+
+
+def save_plans(plans, path):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({'cards': [plan.to_dict() for plan in plans]}, f, indent=2)
+
+
+def load_plan_paths(path, card=0):
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)['cards'][card]['copy']
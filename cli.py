@@ -0,0 +1,291 @@
+import os
+import sys
+import csv
+import json
+import signal
+import argparse
+import instrument
+from library import Library, load_config, load_brands, game_description
+from filter_index import FilterIndex
+from external_snapshot import ExternalSnapshot
+from copy_engine import CopyEngine, WORKER_PRESETS, COPIED, SKIPPED, jobs_for_folder
+from card_planner import plan_cards, save_plans, load_plan_paths, CARD_SIZES, PRIORITIES
+from content_hash import HashCache, hash_files, find_duplicates, QUICK, FULL
+
+# Headless entry point: the same scan, match and filter logic as the table, without Tk.
+#   python cli.py list --players 2 --players 4 --format csv --output games.csv
+#   python cli.py list --search "zelda nintendo" --exclude-brand Disney
+#   python cli.py copy /media/sdcard --region PAL --budget 32G --target "SD card"
+#   python cli.py plan --card-size "64 GB" --priority players --cards 2 --format json --output plan.json
+#   python cli.py copy /media/sdcard --plan plan.json --plan-card 0 --verify quick
+#   python cli.py verify /media/sdcard --full
+#   python cli.py duplicates --format json
+
+EXPORT_FIELDS = ['gcid', 'title', 'type', 'region', 'developer', 'publisher', 'genre', 'release_date',
+                 'esrb_rating', 'online_players', 'input_players', 'path', 'size']
+SIZE_UNITS = {'K': 1024, 'M': 1024 ** 2, 'G': 1024 ** 3, 'T': 1024 ** 4}
+BRANDS = load_brands()
+
+
+def parse_size(text):
+    text = text.strip().upper().rstrip('B')
+    if text and text[-1] in SIZE_UNITS:
+        return int(float(text[:-1]) * SIZE_UNITS[text[-1]])
+    return int(text)
+
+
+def load_games(folder):
+    library = Library()
+    library.publish(folder, library.scan(folder), library.begin_load())
+    return library.metadata
+
+
+def build_filters(args, index):
+    return {
+        'players': set(args.players) if args.players else set(index.players),
+        'regions': set(args.region) if args.region else set(index.regions),
+        'genres': set(args.genre or []),
+        'brands': set(BRANDS) - set(args.exclude_brand or []),
+        'search': args.search,
+        'main_folder': not args.only_copied,
+        'external_folder': not args.skip_copied,
+    }
+
+
+def within_budget(games, budget):
+    # First fit in listing order: games that don't fit are skipped, smaller ones may still go in.
+    chosen, used = [], 0
+    for m in games:
+        if used + m['size'] <= budget:
+            chosen.append(m)
+            used += m['size']
+    return chosen
+
+
+def select_games(args):
+    folder = args.folder or load_config()
+    if not folder or not os.path.isdir(folder):
+        raise SystemExit(f"GameCube folder not found: {folder!r} (pass --folder)")
+    with instrument.profile_once('scan'):
+        metadata = load_games(folder)
+    card = getattr(args, 'card', None)
+    snapshot = ExternalSnapshot.load(card, args.manifest) if card else ExternalSnapshot(None)
+    present = [m['path'] for m in metadata if snapshot.has_copy(os.path.basename(m['path']), m['size'])]
+    index = FilterIndex(metadata, present, BRANDS, game_description)
+    paths = index.selection(index.query(build_filters(args, index)), args.search)[0]
+    by_path = {m['path']: m for m in metadata}
+    games = [by_path[path] for path in paths]
+    if args.budget is not None:
+        games = within_budget(games, args.budget)
+    return games, snapshot
+
+
+def parse_weight(text):
+    genre, _, weight = text.rpartition('=')
+    if not genre:
+        raise argparse.ArgumentTypeError(f"expected GENRE=WEIGHT, got {text!r}")
+    return genre, float(weight)
+
+
+def write_selection(games, fmt, out):
+    if fmt == 'json':
+        json.dump([{field: m[field] for field in EXPORT_FIELDS} for m in games], out, indent=2)
+        out.write('\n')
+    elif fmt == 'csv':
+        writer = csv.DictWriter(out, fieldnames=EXPORT_FIELDS, extrasaction='ignore', lineterminator='\n')
+        writer.writeheader()
+        writer.writerows(games)
+    else:
+        for m in games:
+            out.write(f"{m['gcid']:<8} {m['region']:<8} {m['size'] / (1024**3):6.2f} GB  {m['title']}\n")
+        total_size = sum(m['size'] for m in games)
+        out.write(f"{len(games)} games, {total_size / (1024**3):.2f} GB\n")
+
+
+def emit(event, **fields):
+    # One JSON object per line, so scripts can follow a copy as it runs.
+    print(json.dumps(dict(event=event, **fields)), flush=True)
+
+
+def run_list(args):
+    games, snapshot = select_games(args)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8', newline='') as f:
+            write_selection(games, args.format, f)
+    else:
+        write_selection(games, args.format, sys.stdout)
+    return 0
+
+
+def write_plans(plans, out):
+    for number, plan in enumerate(plans, 1):
+        out.write(f"Card {number}: {len(plan.copy)} to copy ({plan.copy_bytes() / (1024**3):.2f} GB), "
+                  f"{len(plan.present)} already present, {plan.free_bytes() / (1024**3):.2f} GB free\n")
+        for m in plan.copy:
+            out.write(f"  {m['gcid']:<8} {m['size'] / (1024**3):6.2f} GB  {m['title']}\n")
+
+
+def run_plan(args):
+    games, snapshot = select_games(args)
+    capacity = args.capacity or CARD_SIZES[args.card_size]
+    plans = plan_cards(games, capacity, args.priority, cards=args.cards, genre_weights=dict(args.genre_weight or []),
+                       snapshot=snapshot if args.card else None)
+    if args.format == 'json':
+        if args.output:
+            save_plans(plans, args.output)
+        else:
+            json.dump({'cards': [plan.to_dict() for plan in plans]}, sys.stdout, indent=2)
+            sys.stdout.write('\n')
+    elif args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            write_plans(plans, f)
+    else:
+        write_plans(plans, sys.stdout)
+    return 0
+
+
+def run_copy(args):
+    os.makedirs(args.destination, exist_ok=True)
+    args.card = args.destination
+    games, snapshot = select_games(args)
+    if args.plan:
+        planned = set(load_plan_paths(args.plan, args.plan_card))
+        games = [m for m in games if m['path'] in planned]
+    failed = []
+
+    def on_file_done(job):
+        if job.status == COPIED:
+            snapshot.refresh(os.path.basename(job.dst))
+        elif job.status != SKIPPED:
+            failed.append(job)
+        emit('file', src=job.src, dst=job.dst, status=job.status, error=str(job.error) if job.error else None)
+
+    workers = args.workers or WORKER_PRESETS[args.target]
+    engine = CopyEngine(workers=workers, on_progress=lambda progress: emit('progress', **progress),
+                        on_file_done=on_file_done, verify=args.verify)
+    # Ctrl+C lets in-flight files stop cleanly and keep their .part for the next run.
+    signal.signal(signal.SIGINT, lambda signum, frame: engine.cancel())
+    emit('start', files=len(games), bytes=sum(m['size'] for m in games), workers=workers)
+    engine.run(jobs_for_folder([m['path'] for m in games], args.destination), existing=snapshot)
+    if args.manifest:
+        snapshot.write_manifest()
+    emit('done', files=len(games), failed=len(failed))
+    return 1 if failed else 0
+
+
+def run_verify(args):
+    # Re-reads every library game that has a same-named file on the card and compares hashes.
+    args.card = args.destination
+    games, snapshot = select_games(args)
+    pairs = [(m['path'], os.path.join(args.destination, os.path.basename(m['path'])))
+             for m in games if os.path.basename(m['path']) in snapshot.entries]
+    mode = FULL if args.full else QUICK
+    cache = HashCache()
+    try:
+        sources = hash_files([src for src, dst in pairs], mode, cache)
+        copies = hash_files([dst for src, dst in pairs], mode, cache)
+    finally:
+        cache.close()
+    bad = 0
+    for src, dst in pairs:
+        ok = src in sources and sources.get(src) == copies.get(dst)
+        bad += not ok
+        emit('verify', src=src, dst=dst, ok=ok, digest=copies.get(dst))
+    emit('done', files=len(pairs), failed=bad)
+    return 1 if bad else 0
+
+
+def run_duplicates(args):
+    games, snapshot = select_games(args)
+    cache = HashCache()
+    try:
+        groups = find_duplicates(games, cache)
+    finally:
+        cache.close()
+    if args.format == 'json':
+        json.dump([{'reasons': reasons, 'paths': paths} for paths, reasons in groups], sys.stdout, indent=2)
+        sys.stdout.write('\n')
+    else:
+        for number, (paths, reasons) in enumerate(groups, 1):
+            sys.stdout.write(f"#{number} {', '.join(reasons)}\n")
+            for path in paths:
+                sys.stdout.write(f"  {path}\n")
+    return 0
+
+
+def add_filter_arguments(parser):
+    parser.add_argument('--folder', help="GameCube folder (defaults to the one saved by the GUI)")
+    parser.add_argument('--players', action='append', help="keep games for this many players (repeatable)")
+    parser.add_argument('--region', action='append', choices=['NTSC-U', 'PAL', 'NTSC-J', 'Unknown'],
+                        help="keep games from this region (repeatable)")
+    parser.add_argument('--genre', action='append', help="keep games in this genre (repeatable)")
+    parser.add_argument('--exclude-brand', action='append', choices=list(BRANDS),
+                        help="drop this brand's games (brands are configured in config.json)")
+    parser.add_argument('--search', help="keep games whose title, developer, publisher, genre or description "
+                                         "match every word (prefixes and single typos allowed)")
+    parser.add_argument('--budget', type=parse_size, help="keep only what fits in this size, e.g. 32G")
+    parser.add_argument('--manifest', action='store_true', help="trust the card manifest instead of scanning it")
+    parser.add_argument('--skip-copied', action='store_true', help="leave out games already on the card")
+    parser.add_argument('--only-copied', action='store_true', help="keep only games already on the card")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Scan, filter and export a GameCube library without the GUI.")
+    parser.add_argument('--profile', metavar='REPORT', help="write per-stage timings and counters to this JSON file")
+    parser.add_argument('--cprofile', metavar='PREFIX', help="also dump a cProfile of the scan to PREFIX-scan.prof")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    list_parser = commands.add_parser('list', help="print or export the filtered selection")
+    add_filter_arguments(list_parser)
+    list_parser.add_argument('--card', help="card folder used by --skip-copied / --only-copied")
+    list_parser.add_argument('--format', choices=['text', 'json', 'csv'], default='text')
+    list_parser.add_argument('--output', help="write to this file instead of stdout")
+    list_parser.set_defaults(run=run_list)
+
+    copy_parser = commands.add_parser('copy', help="copy the filtered selection, printing JSON progress lines")
+    copy_parser.add_argument('destination')
+    add_filter_arguments(copy_parser)
+    copy_parser.add_argument('--target', choices=list(WORKER_PRESETS), default='SD card')
+    copy_parser.add_argument('--workers', type=int, help="overrides the --target preset")
+    copy_parser.add_argument('--plan', help="copy only the games a saved plan puts on this card")
+    copy_parser.add_argument('--plan-card', type=int, default=0, help="which card of the plan (from 0)")
+    copy_parser.add_argument('--verify', choices=[QUICK, FULL], help="re-read each copy and compare it with its source")
+    copy_parser.set_defaults(run=run_copy)
+
+    verify_parser = commands.add_parser('verify', help="check the copies on a card against the library")
+    verify_parser.add_argument('destination')
+    add_filter_arguments(verify_parser)
+    verify_parser.add_argument('--full', action='store_true', help="hash whole files (CRC32 + SHA-1), not samples")
+    verify_parser.set_defaults(run=run_verify)
+
+    duplicates_parser = commands.add_parser('duplicates', help="group games that are the same dump or the same game")
+    add_filter_arguments(duplicates_parser)
+    duplicates_parser.add_argument('--card', help="card folder used by --skip-copied / --only-copied")
+    duplicates_parser.add_argument('--format', choices=['text', 'json'], default='text')
+    duplicates_parser.set_defaults(run=run_duplicates)
+
+    plan_parser = commands.add_parser('plan', help="pick the best set of games for one or more cards")
+    add_filter_arguments(plan_parser)
+    plan_parser.add_argument('--card', help="the first card's folder; games on it are kept and its files count")
+    plan_parser.add_argument('--card-size', choices=list(CARD_SIZES), default='32 GB')
+    plan_parser.add_argument('--capacity', type=parse_size, help="exact capacity instead of --card-size")
+    plan_parser.add_argument('--priority', choices=PRIORITIES, default='count')
+    plan_parser.add_argument('--genre-weight', type=parse_weight, action='append',
+                             help="GENRE=WEIGHT for --priority genre (repeatable)")
+    plan_parser.add_argument('--cards', type=int, default=1, help="split the selection across this many cards")
+    plan_parser.add_argument('--format', choices=['text', 'json'], default='text')
+    plan_parser.add_argument('--output', help="write to this file instead of stdout")
+    plan_parser.set_defaults(run=run_plan)
+
+    args = parser.parse_args(argv)
+    card = getattr(args, 'card', None) or getattr(args, 'destination', None)
+    if (args.skip_copied or args.only_copied) and not card:
+        # Without a card every game counts as not copied, which would silently ignore the flag.
+        commands.choices[args.command].error("--skip-copied and --only-copied need --card")
+    if args.profile or args.cprofile:
+        instrument.enable(args.profile, args.cprofile)
+    return args.run(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
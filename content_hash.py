@@ -0,0 +1,196 @@
+import os
+import json
+import zlib
+import sqlite3
+import hashlib
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+
+HASH_CACHE_FILE = 'hash_cache.sqlite'
+CHUNK_SIZE = 4 * 1024 * 1024
+# Quick mode hashes the size plus this much from the start, middle and end of the file.
+SAMPLE_SIZE = 1024 * 1024
+HASH_WORKERS = min(4, os.cpu_count() or 1)
+
+FULL = 'full'
+QUICK = 'quick'
+
+
+def full_hash(path):
+    # CRC32 and SHA-1 of the whole file, comparable to the Redump datfiles.
+    crc, sha1 = 0, hashlib.sha1()
+    buf = bytearray(CHUNK_SIZE)
+    view = memoryview(buf)
+    with open(path, 'rb', buffering=0) as f:
+        while True:
+            n = f.readinto(buf)
+            if not n:
+                break
+            crc = zlib.crc32(view[:n], crc)
+            sha1.update(view[:n])
+    return {'crc32': f"{crc:08x}", 'sha1': sha1.hexdigest()}
+
+
+def quick_hash(path):
+    # Catches truncated or half-written copies and most corruption near the disc header
+    # without reading the whole image; not a substitute for a full hash.
+    size = os.path.getsize(path)
+    sha1 = hashlib.sha1(str(size).encode('ascii'))
+    offsets = sorted({0, max(0, size // 2 - SAMPLE_SIZE // 2), max(0, size - SAMPLE_SIZE)})
+    with open(path, 'rb') as f:
+        for offset in offsets:
+            f.seek(offset)
+            sha1.update(f.read(SAMPLE_SIZE))
+    return {'quick': sha1.hexdigest()}
+
+
+def hash_file(path, mode=FULL):
+    return full_hash(path) if mode == FULL else quick_hash(path)
+
+
+def digest_key(digest):
+    return digest.get('sha1') or digest.get('quick')
+
+
+class HashCache:
+    # Hashes keyed by path+size+mtime for each mode, so unchanged files are read once.
+
+    def __init__(self, cache_file=HASH_CACHE_FILE):
+        self.conn = sqlite3.connect(cache_file, check_same_thread=False)
+        self.lock = threading.Lock()
+        self.conn.execute(
+            'CREATE TABLE IF NOT EXISTS hashes ('
+            'path TEXT, mode TEXT, size INTEGER, mtime INTEGER, digest TEXT, PRIMARY KEY (path, mode))'
+        )
+        self.conn.commit()
+
+    def close(self):
+        self.conn.close()
+
+    def get(self, path, mode, stat):
+        with self.lock:
+            row = self.conn.execute('SELECT size, mtime, digest FROM hashes WHERE path = ? AND mode = ?',
+                                    (path, mode)).fetchone()
+        if row and row[0] == stat.st_size and row[1] == stat.st_mtime_ns:
+            return json.loads(row[2])
+        return None
+
+    def put(self, path, mode, stat, digest):
+        with self.lock:
+            self.conn.execute('INSERT OR REPLACE INTO hashes VALUES (?, ?, ?, ?, ?)',
+                              (path, mode, stat.st_size, stat.st_mtime_ns, json.dumps(digest)))
+            self.conn.commit()
+
+
+def hash_files(paths, mode=FULL, cache=None, workers=HASH_WORKERS, processes=True, on_done=None, cancelled=None):
+    # Returns {path: digest}, hashing only files the cache doesn't already know, on a
+    # process pool by default. Pass processes=False where spawning interpreters isn't safe
+    # (on Windows they re-import the main script); hashlib and zlib release the GIL on
+    # large buffers, so threads still hash in parallel.
+    on_done = on_done or (lambda path, digest: None)
+    results, pending = {}, []
+    for path in paths:
+        try:
+            stat = os.stat(path)
+        except OSError:
+            continue
+        digest = cache.get(path, mode, stat) if cache else None
+        if digest is not None:
+            results[path] = digest
+            on_done(path, digest)
+        else:
+            pending.append((path, stat))
+    if not pending:
+        return results
+
+    executor = ProcessPoolExecutor if processes else ThreadPoolExecutor
+    with executor(max_workers=workers) as pool:
+        futures = {pool.submit(hash_file, path, mode): (path, stat) for path, stat in pending}
+        for future in as_completed(futures):
+            if cancelled is not None and cancelled.is_set():
+                pool.shutdown(wait=False, cancel_futures=True)
+                break
+            path, stat = futures[future]
+            try:
+                digest = future.result()
+            except OSError:
+                continue
+            results[path] = digest
+            if cache:
+                cache.put(path, mode, stat, digest)
+            on_done(path, digest)
+    return results
+
+
+def verify_copy(src, dst, mode=QUICK, cache=None):
+    try:
+        src_stat, dst_stat = os.stat(src), os.stat(dst)
+    except OSError:
+        return False
+    if src_stat.st_size != dst_stat.st_size:
+        return False
+    src_digest = cache.get(src, mode, src_stat) if cache else None
+    if src_digest is None:
+        src_digest = hash_file(src, mode)
+        if cache:
+            cache.put(src, mode, src_stat, src_digest)
+    return hash_file(dst, mode) == src_digest
+
+
+def duplicate_groups(metadata_list, digests=None):
+    # Paths that hold the same game, as [(paths, reasons)]: identical content, the same
+    # game ID (e.g. an .iso and its .nkit.iso), or the same game code in another region.
+    # Keys that share a path are merged into one group. Every disc of a multi-disc game has
+    # the same ID, so it only counts with the same disc number (or, when the header couldn't
+    # be read, the same size).
+    digests = digests or {}
+    parent = {}
+
+    def find(path):
+        while parent[path] != path:
+            parent[path] = parent[parent[path]]
+            path = parent[path]
+        return path
+
+    members, gcids = {}, {}
+    for m in metadata_list:
+        path = m['path']
+        parent.setdefault(path, path)
+        keys = []
+        if path in digests:
+            keys.append(('same content', digest_key(digests[path])))
+        if m.get('gcid', 'UNKNOWN') != 'UNKNOWN':
+            gcids[path] = m['gcid']
+            disc = ('disc', m['disc']) if m.get('disc') is not None else ('size', m['size'])
+            keys.append(('same ID', (m['gcid'], disc)))
+            keys.append(('region variant', (m['gcid'][:3], m.get('disc'))))
+        for key in keys:
+            members.setdefault(key, []).append(path)
+    members = {(reason, value): paths for (reason, value), paths in members.items()
+               if len(paths) > 1 and (reason != 'region variant' or len({gcids[path] for path in paths}) > 1)}
+    for paths in members.values():
+        for path in paths[1:]:
+            parent[find(path)] = find(paths[0])
+
+    groups, group_reasons = {}, {}
+    for path in parent:
+        groups.setdefault(find(path), []).append(path)
+    for (reason, value), paths in members.items():
+        group_reasons.setdefault(find(paths[0]), set()).add(reason)
+    return [(paths, sorted(group_reasons[root])) for root, paths in groups.items() if len(paths) > 1]
+
+
+def find_duplicates(metadata_list, cache=None, workers=HASH_WORKERS, processes=True, cancelled=None):
+    # Only files that share a size can be identical, and only quick-hash collisions get a
+    # full hash, so most of the library is never read.
+    by_size = {}
+    for m in metadata_list:
+        by_size.setdefault(m['size'], []).append(m['path'])
+    candidates = [path for paths in by_size.values() if len(paths) > 1 for path in paths]
+    quick = hash_files(candidates, QUICK, cache, workers, processes, cancelled=cancelled)
+    by_quick = {}
+    for path, digest in quick.items():
+        by_quick.setdefault(digest['quick'], []).append(path)
+    colliding = [path for paths in by_quick.values() if len(paths) > 1 for path in paths]
+    full = hash_files(colliding, FULL, cache, workers, processes, cancelled=cancelled)
+    return duplicate_groups(metadata_list, full)
@@ -0,0 +1,285 @@
+import os
+import sys
+import json
+import time
+import errno
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from content_hash import verify_copy
+import instrument
+
+ALIGNMENT = 1024 * 1024
+BUFFER_SIZE = 8 * ALIGNMENT
+PART_SUFFIX = '.part'
+# Written next to a .part file when it's started: the source's size and mtime, so a .part
+# left over from a different version of the game is never resumed.
+PART_INFO_SUFFIX = '.part.json'
+# How much already-written data is compared with the source before resuming a .part file.
+RESUME_VERIFY_SIZE = ALIGNMENT
+PROGRESS_INTERVAL = 0.2
+# SD cards slow down badly with interleaved writes; SSDs and fast USB drives like some parallelism.
+WORKER_PRESETS = {'SD card': 1, 'USB drive': 2, 'SSD': 4}
+
+COPIED = 'copied'
+SKIPPED = 'skipped'
+FAILED = 'failed'
+CANCELLED = 'cancelled'
+
+
+class CopyCancelled(Exception):
+    pass
+
+
+class CopyJob:
+    def __init__(self, src, dst):
+        self.src = src
+        self.dst = dst
+        self.size = os.path.getsize(src)
+        self.status = None
+        self.error = None
+
+
+def jobs_for_folder(paths, output_folder):
+    return [CopyJob(path, os.path.join(output_folder, os.path.basename(path))) for path in paths]
+
+
+def is_already_copied(job, existing=None):
+    # `existing` is an ExternalSnapshot of the destination folder, saving a stat per job.
+    # A copy a manifest vouches for is still stat'ed here, on the copy thread, before it's
+    # skipped, so one rewritten in place since the manifest was written gets copied again.
+    if existing is not None:
+        if not existing.has_copy(os.path.basename(job.dst), job.size):
+            return False
+        if not existing.trusted:
+            return True
+    try:
+        return os.path.getsize(job.dst) == job.size
+    except OSError:
+        return False
+
+
+def source_signature(src):
+    stat = os.stat(src)
+    return {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+
+
+def write_part_info(src, part):
+    with open(part + PART_INFO_SUFFIX, 'w', encoding='utf-8') as f:
+        json.dump(source_signature(src), f)
+
+
+def resume_offset(src, part, size):
+    # Keep an existing .part file only if it was started from this same source, and only
+    # up to an aligned offset whose last block still matches; anything after that may be
+    # a torn write.
+    try:
+        part_size = os.path.getsize(part)
+        with open(part + PART_INFO_SUFFIX, 'r', encoding='utf-8') as f:
+            if json.load(f) != source_signature(src):
+                return 0
+    except (OSError, ValueError):
+        return 0
+    if part_size > size:
+        return 0
+    offset = part_size - part_size % ALIGNMENT
+    if offset < RESUME_VERIFY_SIZE:
+        return 0
+    with open(src, 'rb') as fsrc, open(part, 'rb') as fpart:
+        fsrc.seek(offset - RESUME_VERIFY_SIZE)
+        fpart.seek(offset - RESUME_VERIFY_SIZE)
+        if fsrc.read(RESUME_VERIFY_SIZE) != fpart.read(RESUME_VERIFY_SIZE):
+            return 0
+    return offset
+
+
+def _kernel_copy(method, src_fd, dst_fd, offset, count):
+    if method == 'copy_file_range':
+        return os.copy_file_range(src_fd, dst_fd, count, offset, offset)
+    os.lseek(dst_fd, offset, os.SEEK_SET)
+    return os.sendfile(dst_fd, src_fd, offset, count)
+
+
+def kernel_copy_methods():
+    methods = []
+    if hasattr(os, 'copy_file_range'):
+        methods.append('copy_file_range')
+    # sendfile only accepts a regular file as the destination on Linux.
+    if hasattr(os, 'sendfile') and sys.platform.startswith('linux'):
+        methods.append('sendfile')
+    return methods
+
+
+def copy_range(fsrc, fdst, offset, size, buffer_size, on_bytes, cancelled, methods=None):
+    src_fd, dst_fd = fsrc.fileno(), fdst.fileno()
+    methods = list(kernel_copy_methods() if methods is None else methods)
+    while offset < size and methods:
+        if cancelled.is_set():
+            raise CopyCancelled()
+        try:
+            copied = _kernel_copy(methods[0], src_fd, dst_fd, offset, min(buffer_size, size - offset))
+        except OSError as e:
+            if e.errno not in (errno.EXDEV, errno.ENOSYS, errno.EINVAL, errno.EOPNOTSUPP, errno.ENOTSUP):
+                raise
+            methods.pop(0)
+            continue
+        if copied == 0:
+            break
+        offset += copied
+        on_bytes(copied)
+
+    buffer = bytearray(buffer_size)
+    view = memoryview(buffer)
+    fsrc.seek(offset)
+    fdst.seek(offset)
+    while offset < size:
+        if cancelled.is_set():
+            raise CopyCancelled()
+        read = fsrc.readinto(buffer)
+        if not read:
+            break
+        fdst.write(view[:read])
+        offset += read
+        on_bytes(read)
+    return offset
+
+
+def _ignore_bytes(count, resumed=False):
+    pass
+
+
+def copy_file(job, buffer_size=BUFFER_SIZE, on_bytes=_ignore_bytes, cancelled=None, methods=None):
+    # Copies into `<dst>.part`, resuming a verified prefix if one exists, then renames it into place.
+    cancelled = cancelled or threading.Event()
+    part = job.dst + PART_SUFFIX
+    offset = resume_offset(job.src, part, job.size)
+    if offset:
+        on_bytes(offset, resumed=True)
+    else:
+        write_part_info(job.src, part)
+    with open(job.src, 'rb') as fsrc, open(part, 'r+b' if offset else 'wb') as fdst:
+        fdst.truncate(offset)
+        written = copy_range(fsrc, fdst, offset, job.size, buffer_size, on_bytes, cancelled, methods)
+        if written != job.size:
+            raise OSError(f"{os.path.basename(job.src)} changed size during copy")
+        fdst.flush()
+        os.fsync(fdst.fileno())
+    os.replace(part, job.dst)
+    try:
+        os.remove(part + PART_INFO_SUFFIX)
+    except OSError:
+        pass
+
+
+class CopyEngine:
+    # Runs CopyJobs on `workers` threads. on_progress(progress) gets aggregate totals at most
+    # every PROGRESS_INTERVAL; on_file_done(job) fires once per job with job.status set.
+    # With `verify` (content_hash.QUICK or FULL) each copy is re-read and compared with its
+    # source; a mismatch fails the job and removes the copy so the next run starts over.
+
+    def __init__(self, workers=1, buffer_size=BUFFER_SIZE, on_progress=None, on_file_done=None, verify=None):
+        self.workers = max(1, workers)
+        self.buffer_size = buffer_size - buffer_size % ALIGNMENT or ALIGNMENT
+        self.on_progress = on_progress or (lambda progress: None)
+        self.on_file_done = on_file_done or (lambda job: None)
+        self.verify = verify
+        self.cancelled = threading.Event()
+        self.lock = threading.Lock()
+
+    def cancel(self):
+        self.cancelled.set()
+
+    def run(self, jobs, existing=None):
+        pending = []
+        for job in jobs:
+            if is_already_copied(job, existing):
+                job.status = SKIPPED
+                self.on_file_done(job)
+            else:
+                pending.append(job)
+
+        self.files_total = len(pending)
+        self.files_done = 0
+        self.bytes_total = sum(job.size for job in pending)
+        self.bytes_done = 0
+        self.bytes_transferred = 0
+        self.current = ''
+        self.started = time.monotonic()
+        self.last_report = 0.0
+        with instrument.stage('copy'), ThreadPoolExecutor(max_workers=self.workers) as pool:
+            list(pool.map(self._run_job, pending))
+        self._report(force=True)
+        progress = self.progress()
+        instrument.count('bytes copied', self.bytes_transferred)
+        instrument.count('copy jobs finished', self.files_done)
+        instrument.gauge('copy MB/s', round(progress['speed'] / 1024 / 1024, 2))
+        return jobs
+
+    def _run_job(self, job):
+        if self.cancelled.is_set():
+            job.status = CANCELLED
+            self.on_file_done(job)
+            return
+        with self.lock:
+            self.current = os.path.basename(job.src)
+        done = [0]
+
+        def on_bytes(count, resumed=False):
+            done[0] += count
+            with self.lock:
+                self.bytes_done += count
+                if not resumed:
+                    self.bytes_transferred += count
+            self._report()
+
+        try:
+            copy_file(job, self.buffer_size, on_bytes, self.cancelled)
+            if self.verify and not verify_copy(job.src, job.dst, self.verify):
+                os.remove(job.dst)
+                raise OSError(f"verification failed for {os.path.basename(job.dst)}")
+            job.status = COPIED
+        except CopyCancelled:
+            job.status = CANCELLED
+        except OSError as e:
+            job.status = FAILED
+            job.error = e
+        if job.status != COPIED:
+            with self.lock:
+                self.bytes_done -= done[0]
+                self.bytes_total -= job.size
+        with self.lock:
+            self.files_done += 1
+        self.on_file_done(job)
+        self._report()
+
+    def progress(self):
+        with self.lock:
+            elapsed = time.monotonic() - self.started
+            speed = self.bytes_transferred / elapsed if elapsed > 0 else 0.0
+            remaining = self.bytes_total - self.bytes_done
+            return {
+                'file': self.current,
+                'files_done': self.files_done,
+                'files_total': self.files_total,
+                'bytes_done': self.bytes_done,
+                'bytes_total': self.bytes_total,
+                'elapsed': elapsed,
+                'speed': speed,
+                'eta': remaining / speed if speed > 0 else None,
+            }
+
+    def _report(self, force=False):
+        now = time.monotonic()
+        with self.lock:
+            if not force and now - self.last_report < PROGRESS_INTERVAL:
+                return
+            self.last_report = now
+        self.on_progress(self.progress())
+
+
+def format_progress(progress):
+    text = (f"{progress['file']} ({progress['files_done']}/{progress['files_total']}) - "
+            f"{progress['speed'] / 1024 / 1024:.2f} MB/s")
+    if progress['eta'] is not None:
+        minutes, seconds = divmod(int(progress['eta']), 60)
+        text += f" - ETA {minutes}:{seconds:02d}"
+    return text
@@ -0,0 +1,52 @@
+GAME_ID_LENGTH = 6
+# Discs of a multi-disc game share the game ID; this byte tells them apart (0 = disc 1).
+DISC_NUMBER_OFFSET = 6
+GC_MAGIC_OFFSET = 0x1C
+GC_MAGIC = b'\xc2\x33\x9f\x3d'
+NKIT_MAGIC_OFFSET = 0x200
+NKIT_MAGIC = b'NKIT'
+HEADER_READ_SIZE = GC_MAGIC_OFFSET + len(GC_MAGIC)
+HEADER_EXTENSIONS = ('.nkit.iso', '.iso', '.gcm')
+
+
+def is_valid_game_id(game_id):
+    return len(game_id) == GAME_ID_LENGTH and all(c.isdigit() or 'A' <= c <= 'Z' for c in game_id)
+
+
+def read_game_id(file_path):
+    # Returns the 6-character ID from the disc header, or None when the file
+    # is not a readable GameCube image (the caller then falls back to titles).
+    disc_id = read_disc_id(file_path)
+    return disc_id[0] if disc_id else None
+
+
+def read_disc_id(file_path):
+    # (game ID, disc number) from the disc header, or None like read_game_id.
+    lower = file_path.lower()
+    if not lower.endswith(HEADER_EXTENSIONS):
+        return None
+    try:
+        with open(file_path, 'rb') as f:
+            header = f.read(HEADER_READ_SIZE)
+            nkit_marker = b''
+            if lower.endswith('.nkit.iso'):
+                f.seek(NKIT_MAGIC_OFFSET)
+                nkit_marker = f.read(len(NKIT_MAGIC))
+    except OSError:
+        return None
+    if len(header) < HEADER_READ_SIZE:
+        return None
+    # NKit keeps the original boot.bin at offset 0 and stamps its own marker at 0x200.
+    if header[GC_MAGIC_OFFSET:] != GC_MAGIC and nkit_marker != NKIT_MAGIC:
+        return None
+    game_id = header[:GAME_ID_LENGTH].decode('ascii', errors='replace')
+    return (game_id, header[DISC_NUMBER_OFFSET]) if is_valid_game_id(game_id) else None
+
+
+def index_by_game_id(database):
+    index = {}
+    for key, entry in database.items():
+        gcid = entry.get('gcid')
+        if gcid:
+            index.setdefault(gcid.upper(), key)
+    return index
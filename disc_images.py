@@ -0,0 +1,63 @@
+import os
+import threading
+
+
+class DiscImageIndex:
+    # Cover lookup for a folder of <gcid>.png files. Gives the same answer as scoring
+    # every PNG with commonprefix against the gcid and keeping the first best in listdir
+    # order: a trie over the lowercased basenames, where each node remembers the first
+    # file below it, so the deepest node the gcid reaches is the winner. Rebuilt when the
+    # folder's mtime changes (files added, removed or renamed).
+
+    def __init__(self, folder):
+        self.folder = folder
+        self.stamp = None
+        self.names = set()
+        self.trie = {}
+        self.lock = threading.Lock()
+
+    def _current(self):
+        try:
+            stamp = os.stat(self.folder).st_mtime_ns
+        except OSError:
+            stamp = None
+        with self.lock:
+            if stamp is None or stamp != self.stamp:
+                self._build(stamp)
+            return self.names, self.trie
+
+    def _build(self, stamp):
+        names, trie = set(), {}
+        try:
+            listing = os.listdir(self.folder)
+        except OSError:
+            listing = []
+        for fname in listing:
+            if not fname.lower().endswith('.png'):
+                continue
+            names.add(fname)
+            node = trie
+            for ch in os.path.splitext(fname)[0].lower():
+                node = node.setdefault(ch, {})
+                node.setdefault(None, fname)
+        self.stamp, self.names, self.trie = stamp, names, trie
+
+    def closest(self, gcid):
+        names, trie = self._current()
+        return self._closest(trie, gcid)
+
+    def _closest(self, node, gcid):
+        best_match = None
+        for ch in gcid.lower():
+            node = node.get(ch)
+            if node is None:
+                break
+            best_match = node[None]
+        return os.path.join(self.folder, best_match) if best_match else None
+
+    def find(self, gcid):
+        # <gcid>.png if it exists, otherwise the closest match.
+        names, trie = self._current()
+        if f"{gcid}.png" in names:
+            return os.path.join(self.folder, f"{gcid}.png")
+        return self._closest(trie, gcid)
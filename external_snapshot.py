@@ -0,0 +1,85 @@
+import os
+import json
+import instrument
+
+MANIFEST_FILE = '.minidisc_manifest.json'
+MANIFEST_VERSION = 1
+IGNORED_SUFFIXES = ('.part', '.part.json')
+
+
+class ExternalSnapshot:
+    # name -> (size, mtime_ns) for the files directly inside the external folder, taken with
+    # one scandir (or read back from the card's manifest) and shared by every status check.
+    # Entries read from a manifest are taken on trust (`trusted`); a file rewritten in place
+    # keeps the folder's mtime, so the copy engine re-checks those before skipping a game.
+
+    def __init__(self, folder, entries=None, trusted=False):
+        self.folder = folder
+        self.entries = dict(entries or {})
+        self.trusted = trusted
+
+    @classmethod
+    def scan(cls, folder):
+        entries = {}
+        if folder and os.path.isdir(folder):
+            instrument.count('external scans')
+            with os.scandir(folder) as it:
+                for entry in it:
+                    if entry.name == MANIFEST_FILE or entry.name.endswith(IGNORED_SUFFIXES):
+                        continue
+                    try:
+                        if entry.is_file():
+                            stat = entry.stat()
+                            instrument.count('external stat calls')
+                            entries[entry.name] = (stat.st_size, stat.st_mtime_ns)
+                    except OSError:
+                        continue
+        return cls(folder, entries)
+
+    @classmethod
+    def load(cls, folder, use_manifest=False):
+        if use_manifest:
+            snapshot = cls.from_manifest(folder)
+            if snapshot is not None:
+                return snapshot
+        return cls.scan(folder)
+
+    @classmethod
+    def from_manifest(cls, folder):
+        # The manifest records the folder's mtime when it was written; adding, removing or
+        # renaming anything on the card since then changes it and forces a real scan.
+        try:
+            with open(os.path.join(folder, MANIFEST_FILE), 'r', encoding='utf-8') as f:
+                manifest = json.load(f)
+            if manifest.get('version') != MANIFEST_VERSION:
+                return None
+            if manifest.get('folder_mtime') != os.stat(folder).st_mtime_ns:
+                return None
+            return cls(folder, {name: tuple(entry) for name, entry in manifest['files'].items()}, trusted=True)
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
+
+    def write_manifest(self):
+        path = os.path.join(self.folder, MANIFEST_FILE)
+        folder_mtime = None
+        # Rewriting an existing file in place leaves the folder's mtime alone, so after the
+        # first write (which creates the entry) the recorded mtime stays valid.
+        for _ in range(2):
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump({'version': MANIFEST_VERSION, 'folder_mtime': folder_mtime,
+                           'files': {name: list(entry) for name, entry in self.entries.items()}}, f)
+            current = os.stat(self.folder).st_mtime_ns
+            if current == folder_mtime:
+                break
+            folder_mtime = current
+
+    def has_copy(self, filename, size):
+        entry = self.entries.get(filename)
+        return entry is not None and entry[0] == size
+
+    def refresh(self, filename):
+        try:
+            stat = os.stat(os.path.join(self.folder, filename))
+            self.entries[filename] = (stat.st_size, stat.st_mtime_ns)
+        except OSError:
+            self.entries.pop(filename, None)
@@ -0,0 +1,231 @@
+from search_index import SearchIndex
+
+# Brand facet rules, overridable under "brands" in config.json: a game belongs to a brand
+# when its title starts with, or its developer or publisher contains, one of the terms.
+# Unticking a brand hides its games.
+DEFAULT_BRANDS = {
+    'Disney': {'title': ['disney']},
+    'Nickelodeon': {'title': ['nickelodeon']},
+}
+
+
+def popcount(mask):
+    return bin(mask).count('1')
+
+
+def in_brand(metadata, rule):
+    if any(metadata['title'].lower().startswith(term.lower()) for term in rule.get('title', [])):
+        return True
+    return any(term.lower() in str(metadata.get(field, '')).lower()
+               for field in ('developer', 'publisher') for term in rule.get(field, []))
+
+
+class FilterIndex:
+    # Per-facet bitsets over a metadata list (bit i = metadata_list[i]) so a filter change
+    # is a handful of integer AND/ORs instead of a Python pass over every game.
+    # update(), rename() and remove() patch the bits of just the games that changed; new
+    # games get the next free bit and removed ones leave a gap, cleared from `all`.
+    # A rebuild over the same games in the same order can take over `previous`'s search index,
+    # and one built on a worker can be handed over with adopt_search_index().
+
+    def __init__(self, metadata_list, external_paths=(), brands=DEFAULT_BRANDS, describe=None, previous=None):
+        self.metadata_list = list(metadata_list)
+        self.describe = describe
+        self.brand_rules = brands
+        self.paths = [m['path'] for m in metadata_list]
+        self.sizes = [m['size'] for m in metadata_list]
+        self.positions = {path: i for i, path in enumerate(self.paths)}
+        self.all = (1 << len(self.paths)) - 1
+        # Built on the first search unless one built elsewhere is adopted first.
+        self.search_index = None
+        if previous is not None and previous.describe is describe and previous.paths == self.paths:
+            self.search_index = previous.search_index
+        self.last_search = (None, self.all)
+        self.last_title_search = (None, self.all)
+
+        players, regions, genres = {}, {}, {}
+        brand_members = {brand: [] for brand in brands}
+        for i, m in enumerate(metadata_list):
+            players.setdefault(m['input_players'], []).append(i)
+            regions.setdefault(m['region'], []).append(i)
+            for genre in m.get('genre_list', []):
+                genres.setdefault(genre, []).append(i)
+            for brand, rule in brands.items():
+                if in_brand(m, rule):
+                    brand_members[brand].append(i)
+        self.players = {value: self._mask(indices) for value, indices in players.items()}
+        self.regions = {value: self._mask(indices) for value, indices in regions.items()}
+        self.genres = {value: self._mask(indices) for value, indices in genres.items()}
+        self.brands = {value: self._mask(indices) for value, indices in brand_members.items()}
+        self.external = self._mask(self.positions[path] for path in external_paths if path in self.positions)
+
+    def _mask(self, indices):
+        bits = bytearray(b'0' * len(self.paths))
+        for i in indices:
+            bits[-1 - i] = ord('1')
+        return int(bits, 2) if bits else 0
+
+    def set_external(self, path, present):
+        bit = 1 << self.positions[path]
+        self.external = self.external | bit if present else self.external & ~bit
+
+    def set_external_paths(self, paths):
+        self.external = self._mask(self.positions[path] for path in paths if path in self.positions)
+
+    def _facet_values(self, m):
+        values = [(self.players, m['input_players']), (self.regions, m['region'])]
+        values += [(self.genres, genre) for genre in m.get('genre_list', [])]
+        values += [(self.brands, brand) for brand, rule in self.brand_rules.items() if in_brand(m, rule)]
+        return values
+
+    def _clear(self, position):
+        bit = 1 << position
+        for facet in (self.players, self.regions, self.genres, self.brands):
+            for value, mask in facet.items():
+                if mask & bit:
+                    facet[value] = mask & ~bit
+        self.external &= ~bit
+
+    def _changed(self):
+        self.last_search = (None, self.all)
+        self.last_title_search = (None, self.all)
+
+    def update(self, metadata_list, external_paths=()):
+        # Re-indexes games already in the index in place and adds new ones at the end.
+        external = set(external_paths)
+        for m in metadata_list:
+            path = m['path']
+            position = self.positions.get(path)
+            if position is None:
+                position = len(self.paths)
+                self.positions[path] = position
+                self.paths.append(path)
+                self.sizes.append(m['size'])
+                self.metadata_list.append(m)
+            else:
+                self._clear(position)
+                if self.search_index is not None:
+                    self.search_index.remove(position, self.metadata_list[position])
+                self.sizes[position] = m['size']
+                self.metadata_list[position] = m
+            if self.search_index is not None:
+                self.search_index.add(position, m)
+            bit = 1 << position
+            for facet, value in self._facet_values(m):
+                facet[value] = facet.get(value, 0) | bit
+            if path in external:
+                self.external |= bit
+            self.all |= bit
+        self._changed()
+
+    def rename(self, old_path, new_path):
+        # Keeps the game's bit, so it stays where it was in the selection order.
+        position = self.positions.pop(old_path, None)
+        if position is not None:
+            self.positions[new_path] = position
+            self.paths[position] = new_path
+            self._changed()
+
+    def remove(self, path):
+        position = self.positions.pop(path, None)
+        if position is not None:
+            self._clear(position)
+            if self.search_index is not None:
+                self.search_index.remove(position, self.metadata_list[position])
+            self.all &= ~(1 << position)
+            self._changed()
+
+    def search(self, text):
+        # Mask of the games matching a free-text search; the last one is kept, since the
+        # counts query it once per facet.
+        if self.last_search[0] != text:
+            positions = self._search_index().positions(text)
+            self.last_search = (text, self.all if positions is None else self._mask(positions) & self.all)
+        return self.last_search[1]
+
+    def search_titles(self, text):
+        # Mask of the games whose titles alone match the search.
+        if self.last_title_search[0] != text:
+            positions = self._search_index().positions(text, titles_only=True)
+            self.last_title_search = (text, self.all if positions is None else self._mask(positions) & self.all)
+        return self.last_title_search[1]
+
+    def adopt_search_index(self, metadata_list, search_index):
+        # Takes `search_index`, built over `metadata_list` off the Tk thread, unless a game was
+        # added or re-read since; removed games are masked out of every search anyway.
+        if self.search_index is None and len(metadata_list) == len(self.metadata_list) and all(
+                built is current for built, current in zip(metadata_list, self.metadata_list)):
+            self.search_index = search_index
+        return self.search_index is search_index
+
+    def _search_index(self):
+        if self.search_index is None:
+            self.search_index = SearchIndex(self.metadata_list, self.describe)
+        return self.search_index
+
+    def query(self, filters, skip=None):
+        # `skip` leaves one facet out, which is what the live count next to its checkboxes needs.
+        mask = self.all
+        if filters.get('search'):
+            mask &= self.search(filters['search'])
+        if skip != 'players':
+            mask &= self._union(self.players, filters['players'])
+        if skip != 'regions':
+            mask &= self._union(self.regions, filters['regions'])
+        if skip != 'genres' and filters['genres']:
+            mask &= self._union(self.genres, filters['genres'])
+        if skip != 'brands':
+            for brand, brand_mask in self.brands.items():
+                if brand not in filters['brands']:
+                    mask &= ~brand_mask
+        if skip != 'games_list':
+            if not filters['main_folder']:
+                mask &= self.external
+            if not filters['external_folder']:
+                mask &= ~self.external
+        return mask & self.all
+
+    @staticmethod
+    def _union(facet, selected):
+        mask = 0
+        for value in selected:
+            mask |= facet.get(value, 0)
+        return mask
+
+    def matches(self, mask, path):
+        position = self.positions.get(path)
+        return position is not None and bool(mask >> position & 1)
+
+    def indices(self, mask):
+        bits = bin(mask)[:1:-1]
+        i = bits.find('1')
+        while i != -1:
+            yield i
+            i = bits.find('1', i + 1)
+
+    def selection(self, mask, search=None):
+        # With a search, games it matches by title come first, then those only matched by
+        # developer, publisher, genre or description; both keep library order.
+        parts = [mask]
+        if search:
+            titles = self.search_titles(search)
+            parts = [mask & titles, mask & ~titles]
+        paths, total_size = [], 0
+        for part in parts:
+            for i in self.indices(part):
+                paths.append(self.paths[i])
+                total_size += self.sizes[i]
+        return paths, total_size
+
+    def counts(self, filters):
+        counts = {}
+        for facet, values in (('players', self.players), ('regions', self.regions),
+                              ('genres', self.genres), ('brands', self.brands)):
+            base = self.query(filters, skip=facet)
+            counts[facet] = {value: popcount(base & value_mask) for value, value_mask in values.items()}
+        base = self.query(filters, skip='games_list')
+        counts['games_list'] = {
+            'main_folder': popcount(base & ~self.external & self.all),
+            'external_folder': popcount(base & self.external),
+        }
+        return counts
@@ -0,0 +1,283 @@
+import os
+import sys
+import time
+import select
+import struct
+import ctypes
+import ctypes.util
+import threading
+
+POLL_INTERVAL = 2.0
+# With inotify the periodic re-check is only a safety net for missed events.
+INOTIFY_POLL_INTERVAL = 30.0
+# Events are gathered until the folder has been quiet this long (or MAX_SETTLE has passed),
+# so a copy or a batch rename is handled once.
+SETTLE_DELAY = 0.25
+MAX_SETTLE = 2.0
+STOP_CHECK_INTERVAL = 0.5
+
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+WATCH_MASK = IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE | IN_DELETE_SELF | IN_MOVE_SELF
+EVENT_HEADER = struct.Struct('iIII')
+
+
+class FolderChanges:
+    def __init__(self, added=(), removed=(), renamed=(), modified=()):
+        self.added = list(added)
+        self.removed = list(removed)
+        self.renamed = list(renamed)
+        self.modified = list(modified)
+
+    def __bool__(self):
+        return bool(self.added or self.removed or self.renamed or self.modified)
+
+    def __repr__(self):
+        return (f"FolderChanges(added={self.added}, removed={self.removed}, "
+                f"renamed={self.renamed}, modified={self.modified})")
+
+
+def snapshot_folder(folder, accept=None):
+    # path -> (size, mtime_ns, inode) for matching files, plus every directory seen.
+    files, dirs = {}, [folder]
+    pending = [folder]
+    while pending:
+        current = pending.pop()
+        try:
+            entries = list(os.scandir(current))
+        except OSError:
+            continue
+        for entry in entries:
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    dirs.append(entry.path)
+                    pending.append(entry.path)
+                elif accept is None or accept(entry.name):
+                    stat = entry.stat()
+                    files[entry.path] = (stat.st_size, stat.st_mtime_ns, stat.st_ino)
+            except OSError:
+                continue
+    return files, dirs
+
+
+def diff_snapshots(old, new):
+    removed = [path for path in old if path not in new]
+    added = [path for path in new if path not in old]
+    modified = [path for path in new if path in old and new[path][:2] != old[path][:2]]
+    # A rename shows up as one path vanishing and another appearing with the same inode and size.
+    vanished = {}
+    for path in removed:
+        vanished.setdefault((old[path][2], old[path][0]), []).append(path)
+    renamed = []
+    for path in list(added):
+        candidates = vanished.get((new[path][2], new[path][0]))
+        if new[path][2] and candidates:
+            old_path = candidates.pop(0)
+            renamed.append((old_path, path))
+            removed.remove(old_path)
+            added.remove(path)
+    return FolderChanges(added, removed, renamed, modified)
+
+
+class _Inotify:
+    def __init__(self):
+        libc = ctypes.CDLL(ctypes.util.find_library('c'), use_errno=True)
+        self._add_watch = libc.inotify_add_watch
+        self._add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        self.fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), 'inotify_init1 failed')
+        self.watched = set()
+        self.dirs = {}
+
+    def watch(self, dirs):
+        for path in dirs:
+            if path not in self.watched:
+                wd = self._add_watch(self.fd, os.fsencode(path), WATCH_MASK)
+                if wd >= 0:
+                    self.watched.add(path)
+                    self.dirs[wd] = path
+
+    def wait(self, timeout):
+        # [(directory, name, mask)] read within `timeout`; directory is None for a queue overflow.
+        readable, _, _ = select.select([self.fd], [], [], timeout)
+        return self.read() if readable else []
+
+    def read(self):
+        events = []
+        try:
+            while True:
+                data = os.read(self.fd, 64 * 1024)
+                if not data:
+                    break
+                offset = 0
+                while offset < len(data):
+                    wd, mask, cookie, length = EVENT_HEADER.unpack_from(data, offset)
+                    offset += EVENT_HEADER.size
+                    name = os.fsdecode(data[offset:offset + length].rstrip(b'\0'))
+                    offset += length
+                    directory = self.dirs.get(wd)
+                    if mask & IN_IGNORED:
+                        # The kernel dropped the watch (the directory went away).
+                        self.dirs.pop(wd, None)
+                        self.watched.discard(directory)
+                    elif directory is not None or mask & IN_Q_OVERFLOW:
+                        events.append((directory, name, mask))
+        except BlockingIOError:
+            pass
+        return events
+
+    def close(self):
+        os.close(self.fd)
+
+
+def open_inotify():
+    if not sys.platform.startswith('linux'):
+        return None
+    try:
+        return _Inotify()
+    except (OSError, AttributeError):
+        return None
+
+
+class FolderWatcher:
+    # Reports added/removed/renamed/modified files under `folders` to `on_change(folder, changes)`
+    # from a background thread. Uses inotify where available, stat-diff polling otherwise.
+    # start() and stop() return straight away: the first snapshot is taken on the watcher's
+    # thread (`ready` is set once it's done), and a stopped watcher winds down on its own.
+
+    def __init__(self, folders, on_change, accept=None, interval=POLL_INTERVAL, use_inotify=True):
+        self.folders = [folder for folder in dict.fromkeys(folders) if folder and os.path.isdir(folder)]
+        self.on_change = on_change
+        self.accept = accept
+        self.interval = interval
+        self.inotify = open_inotify() if use_inotify else None
+        self.snapshots = {}
+        self.ready = threading.Event()
+        self.stopped = threading.Event()
+        self.thread = None
+
+    def start(self):
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.stopped.set()
+
+    def check(self, folders=None):
+        for folder in folders or self.folders:
+            files, dirs = snapshot_folder(folder, self.accept)
+            changes = diff_snapshots(self.snapshots[folder], files)
+            self.snapshots[folder] = files
+            if self.inotify:
+                self.inotify.watch(dirs)
+            if changes and not self.stopped.is_set():
+                self.on_change(folder, changes)
+
+    def _root(self, directory):
+        for folder in self.folders:
+            if directory == folder or directory.startswith(folder.rstrip(os.sep) + os.sep):
+                return folder
+        return None
+
+    def apply_events(self, events):
+        # Re-stats only the entries the events name instead of rescanning every folder.
+        touched, rescan = {}, set()
+        for directory, name, mask in events:
+            root = self._root(directory) if directory is not None else None
+            if root is None or mask & (IN_DELETE_SELF | IN_MOVE_SELF):
+                rescan.update([root] if root else self.folders)
+            else:
+                touched.setdefault(root, []).append((os.path.join(directory, name), mask))
+        if rescan:
+            self.check(sorted(rescan))
+        for folder, entries in touched.items():
+            if folder not in rescan:
+                self._apply_entries(folder, entries)
+
+    def _apply_entries(self, folder, entries):
+        snapshot = self.snapshots[folder]
+        before, affected = {}, set()
+        for path, mask in entries:
+            if mask & IN_ISDIR:
+                prefix = path + os.sep
+                gone = [p for p in snapshot if p.startswith(prefix)]
+                for p in gone:
+                    entry = snapshot.pop(p)
+                    if p not in affected:
+                        before[p] = entry
+                affected.update(gone)
+                if mask & (IN_CREATE | IN_MOVED_TO):
+                    files, dirs = snapshot_folder(path, self.accept)
+                    self.inotify.watch(dirs)
+                    snapshot.update(files)
+                    affected.update(files)
+                continue
+            if self.accept is not None and not self.accept(os.path.basename(path)):
+                continue
+            if path in snapshot and path not in affected:
+                before[path] = snapshot[path]
+            affected.add(path)
+            try:
+                stat = os.stat(path)
+                snapshot[path] = (stat.st_size, stat.st_mtime_ns, stat.st_ino)
+            except OSError:
+                snapshot.pop(path, None)
+        after = {path: snapshot[path] for path in affected if path in snapshot}
+        changes = diff_snapshots(before, after)
+        if changes and not self.stopped.is_set():
+            self.on_change(folder, changes)
+
+    def _wait_for_events(self):
+        # Events once things have settled, or None after INOTIFY_POLL_INTERVAL without any.
+        waited = 0.0
+        while waited < INOTIFY_POLL_INTERVAL and not self.stopped.is_set():
+            events = self.inotify.wait(STOP_CHECK_INTERVAL)
+            if events:
+                started = time.monotonic()
+                while time.monotonic() - started < MAX_SETTLE and not self.stopped.is_set():
+                    more = self.inotify.wait(SETTLE_DELAY)
+                    if not more:
+                        break
+                    events.extend(more)
+                return events
+            waited += STOP_CHECK_INTERVAL
+        return None
+
+    def _run(self):
+        try:
+            for folder in self.folders:
+                files, dirs = snapshot_folder(folder, self.accept)
+                self.snapshots[folder] = files
+                if self.inotify:
+                    self.inotify.watch(dirs)
+            self.ready.set()
+            while not self.stopped.is_set():
+                if self.inotify:
+                    events = self._wait_for_events()
+                    if self.stopped.is_set():
+                        break
+                    if events is None:
+                        self.check()
+                    else:
+                        self.apply_events(events)
+                else:
+                    self.stopped.wait(self.interval)
+                    if not self.stopped.is_set():
+                        self.check()
+        finally:
+            # Closed here rather than in stop(), so it's never closed under a pending wait.
+            if self.inotify:
+                self.inotify.close()
+                self.inotify = None
@@ -0,0 +1,160 @@
+import os
+import json
+import time
+import atexit
+import cProfile
+import threading
+import contextlib
+import multiprocessing
+
+# Off unless MINIDISC_PROFILE is set, and then close to free: every hook below returns
+# straight away when disabled.
+#   MINIDISC_PROFILE=1               per-stage timers and counters, written as JSON at exit
+#   MINIDISC_PROFILE_FILE=path       where the report goes (default minidisc_profile.json)
+#   MINIDISC_CPROFILE=prefix         also dump a cProfile of the first run of each
+#                                    profile_once() block to <prefix>-<name>.prof
+
+REPORT_FILE = 'minidisc_profile.json'
+# Stage events kept for the report's timeline; totals keep counting past this.
+MAX_EVENTS = 5000
+
+enabled = False
+report_file = REPORT_FILE
+cprofile_prefix = None
+started = time.time()
+lock = threading.Lock()
+stages = {}
+counters = {}
+gauges = {}
+events = []
+profiled = set()
+# Threads inside a profile_once() block right now.
+profiling_threads = set()
+
+
+def enable(path=None, cprofile=None):
+    global enabled, report_file, cprofile_prefix
+    if not enabled:
+        atexit.register(write_report)
+    enabled = True
+    report_file = path or report_file
+    cprofile_prefix = cprofile or cprofile_prefix
+
+
+def count(name, amount=1):
+    if enabled:
+        with lock:
+            counters[name] = counters.get(name, 0) + amount
+
+
+def gauge(name, value):
+    if enabled:
+        with lock:
+            gauges[name] = value
+
+
+def collect():
+    # For a worker process: record like enable() does, but hand the numbers back to the
+    # parent with take() instead of writing a report at exit.
+    global enabled
+    enabled = True
+
+
+def take():
+    # Stages and counters recorded since the last take(); the next one starts from zero.
+    with lock:
+        taken = {'stages': dict(stages), 'counters': dict(counters)}
+        stages.clear()
+        counters.clear()
+    return taken
+
+
+def merge(taken):
+    # Adds what a worker process take()-ed into this process's report.
+    if enabled:
+        with lock:
+            for name, amount in taken['counters'].items():
+                counters[name] = counters.get(name, 0) + amount
+            for name, other in taken['stages'].items():
+                entry = stages.setdefault(name, {'count': 0, 'total_ms': 0.0, 'max_ms': 0.0})
+                entry['count'] += other['count']
+                entry['total_ms'] += other['total_ms']
+                entry['max_ms'] = max(entry['max_ms'], other['max_ms'])
+
+
+def record(name, seconds):
+    with lock:
+        entry = stages.setdefault(name, {'count': 0, 'total_ms': 0.0, 'max_ms': 0.0})
+        entry['count'] += 1
+        entry['total_ms'] += seconds * 1000
+        entry['max_ms'] = max(entry['max_ms'], seconds * 1000)
+        if len(events) < MAX_EVENTS:
+            events.append({'stage': name, 'at_ms': round((time.time() - started - seconds) * 1000, 3),
+                           'ms': round(seconds * 1000, 3), 'thread': threading.current_thread().name})
+
+
+@contextlib.contextmanager
+def _timed(name):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(name, time.perf_counter() - start)
+
+
+def stage(name):
+    return _timed(name) if enabled else contextlib.nullcontext()
+
+
+@contextlib.contextmanager
+def _profiled(name):
+    profile = cProfile.Profile()
+    profiling_threads.add(threading.get_ident())
+    profile.enable()
+    try:
+        yield
+    finally:
+        profile.disable()
+        profiling_threads.discard(threading.get_ident())
+        profile.dump_stats(f"{cprofile_prefix}-{name}.prof")
+
+
+def profile_once(name):
+    # cProfile only sees the calling thread, so wrap the worker and the Tk halves separately.
+    with lock:
+        if not cprofile_prefix or name in profiled:
+            return contextlib.nullcontext()
+        profiled.add(name)
+    return _profiled(name)
+
+
+def profiling():
+    # Whether a profile_once() block is running on the calling thread.
+    return threading.get_ident() in profiling_threads
+
+
+def report():
+    with lock:
+        return {
+            'started': time.strftime('%Y-%m-%dT%H:%M:%S', time.localtime(started)),
+            'duration_ms': round((time.time() - started) * 1000, 3),
+            'stages': {name: {key: round(value, 3) for key, value in entry.items()}
+                       for name, entry in sorted(stages.items())},
+            'counters': dict(sorted(counters.items())),
+            'gauges': dict(sorted(gauges.items())),
+            'events': list(events),
+        }
+
+
+def write_report(path=None):
+    with open(path or report_file, 'w', encoding='utf-8') as f:
+        json.dump(report(), f, indent=2)
+
+
+# Worker processes inherit the environment but report through their parent; see collect().
+if multiprocessing.parent_process():
+    pass
+elif os.environ.get('MINIDISC_PROFILE'):
+    enable(os.environ.get('MINIDISC_PROFILE_FILE'), os.environ.get('MINIDISC_CPROFILE'))
+elif os.environ.get('MINIDISC_CPROFILE'):
+    cprofile_prefix = os.environ['MINIDISC_CPROFILE']
@@ -0,0 +1,255 @@
+import os
+import re
+import json
+import threading
+import instrument
+from title_index import TitleIndex
+from disc_header import read_disc_id
+from scan_cache import ScanCache, CACHE_FILE, database_fingerprint
+from scan_pipeline import stream_scan
+from wiitdb_store import load_wiitdb, NO_DESCRIPTION
+from filter_index import DEFAULT_BRANDS
+
+CONFIG_FILE = 'config.json'
+WIITDB_FILE = 'wiitdb_parsed.json'
+SUPPORTED_EXTENSIONS = ['.iso', '.gcm', '.nkit.iso']
+
+WIITDB = load_wiitdb(WIITDB_FILE)
+
+
+def clean_filename(name):
+    return re.sub(r'[^a-zA-Z0-9]', '', name).lower()
+
+
+TITLE_INDEX = TitleIndex(WIITDB, clean_filename)
+GCID_INDEX = WIITDB.game_ids()
+
+
+def strip_region_tags(title):
+    return re.sub(r'\((USA|Europe|Japan)\)', '', title, flags=re.IGNORECASE).strip()
+
+
+def extract_metadata(file_path):
+    filename = os.path.splitext(os.path.basename(file_path))[0]
+    display_title = strip_region_tags(filename)
+    clean_name = clean_filename(filename)
+    file_size = os.path.getsize(file_path)
+    region = 'Unknown'
+    if '(USA)' in filename.upper():
+        region = 'NTSC-U'
+    elif '(EUROPE)' in filename.upper():
+        region = 'PAL'
+    elif '(JAPAN)' in filename.upper():
+        region = 'NTSC-J'
+
+    disc_id = read_disc_id(file_path)
+    with instrument.stage('match'):
+        best_match = GCID_INDEX.get(disc_id[0]) if disc_id else None
+        if best_match is None:
+            best_match = TITLE_INDEX.best_match(clean_name)
+            instrument.count('title matches')
+    metadata = WIITDB.get(best_match, {}) if best_match else {}
+    input_info = metadata.get("input", {})
+    controls = json.dumps(input_info.get("controls", [{"type": "gamecube", "required": True}]))
+    input_players = input_info.get("players", '1')
+    genre = metadata.get('genre', 'Unknown')
+    genre_list = [g.strip() for g in genre.split(',')] if isinstance(genre, str) else ['Unknown']
+    return {
+        'gcid': metadata.get('gcid', 'UNKNOWN'),
+        'title': display_title,
+        'type': metadata.get('type', 'GameCube'),
+        'region': region,
+        'developer': metadata.get('developer', 'Unknown'),
+        'publisher': metadata.get('publisher', 'Unknown'),
+        'genre': genre,
+        'genre_list': genre_list,
+        'wiitdb_key': best_match,
+        'release_date': metadata.get('release_date', '2000-01-01'),
+        'esrb_rating': metadata.get('esrb_rating', 'Unrated'),
+        'online_players': metadata.get('online_players', '0'),
+        'input_players': input_players,
+        'controls': controls,
+        'path': file_path,
+        'size': file_size,
+        # From the header, so None for images it can't be read from.
+        'disc': disc_id[1] if disc_id else None
+    }
+
+
+def game_description(metadata):
+    # The WiiTDB synopsis for search, or '' rather than the placeholder the table shows.
+    description = WIITDB.description(metadata.get('wiitdb_key'))
+    return '' if description == NO_DESCRIPTION else description
+
+
+def read_config():
+    if os.path.exists(CONFIG_FILE):
+        with open(CONFIG_FILE, 'r') as f:
+            return json.load(f)
+    return {}
+
+
+def save_config(path):
+    # Keeps the other settings (e.g. hand-edited brands) in the file.
+    config = read_config()
+    config['gamecube_folder'] = path
+    with open(CONFIG_FILE, 'w') as f:
+        json.dump(config, f)
+
+
+def load_config():
+    return read_config().get('gamecube_folder')
+
+
+def load_brands():
+    # {"brands": {"Disney": {"title": ["disney"]}, "Capcom": {"publisher": ["capcom"]}}}
+    return read_config().get('brands') or DEFAULT_BRANDS
+
+
+def is_game_file(file):
+    ext = os.path.splitext(file)[1].lower()
+    if ext == '.iso' and file.lower().endswith('.nkit.iso'):
+        ext = '.nkit.iso'
+    return ext in SUPPORTED_EXTENSIONS
+
+
+def scan_gamecube_files(folder):
+    game_files = []
+    for root, dirs, files in os.walk(folder):
+        for file in files:
+            if is_game_file(file):
+                game_files.append(os.path.join(root, file))
+    return game_files
+
+
+class Library:
+    # The scan results for the current GameCube folder, shared by the table and the grid.
+    # scan() and read_changes() run on a worker thread; publish(), stream() and apply_changes()
+    # run on the Tk thread and call every subscriber's on_loaded(library) / on_changed(touched, removed, renamed).
+    # A streamed scan loads once, with its first batch; its publish() only calls on_finished(library).
+
+    def __init__(self):
+        self.folder = None
+        self.metadata = []
+        self.by_path = {}
+        self.generation = 0
+        self.streamed = None
+        self.published = None
+        self.cancelled = threading.Event()
+        self.subscribers = []
+
+    def subscribe(self, on_loaded, on_changed, on_finished=None):
+        subscriber = (on_loaded, on_changed, on_finished or (lambda library: None))
+        self.subscribers.append(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        if subscriber in self.subscribers:
+            self.subscribers.remove(subscriber)
+
+    def begin_load(self):
+        # A newer load makes the results of older ones stale, and cancels their scans.
+        self.generation += 1
+        self.cancelled.set()
+        self.cancelled = threading.Event()
+        return self.generation
+
+    def scan(self, folder, on_batch=None, cancelled=None, processes=True):
+        # Same result as scan_gamecube_files + extract_metadata per file, but streamed:
+        # on_batch(metadata) sees the games in order while the rest are still loading.
+        with instrument.stage('scan.resolve'):
+            cache = ScanCache(CACHE_FILE, database_fingerprint(WIITDB_FILE))
+            try:
+                return stream_scan(folder, is_game_file, extract_metadata, cache, on_batch, cancelled,
+                                   processes=processes)
+            finally:
+                cache.close()
+
+    def publish(self, folder, metadata, generation):
+        # The scan's full result. It ends the stream: a batch of this scan that's handled
+        # later is already in `metadata`.
+        if generation != self.generation or generation == self.published:
+            return False
+        self.published = generation
+        if self.streamed != generation or len(self.metadata) != len(metadata):
+            self._load(folder, metadata)
+        for on_loaded, on_changed, on_finished in list(self.subscribers):
+            on_finished(self)
+        return True
+
+    def stream(self, folder, metadata, generation):
+        # A batch from a scan still in progress: the first one replaces the old library,
+        # the rest are appended. publish() with the full list still follows.
+        if generation != self.generation or generation == self.published:
+            return False
+        if self.streamed != generation:
+            self.streamed = generation
+            self._load(folder, metadata)
+            return True
+        self.metadata.extend(metadata)
+        self.by_path.update((m['path'], m) for m in metadata)
+        touched = [m['path'] for m in metadata]
+        for on_loaded, on_changed, on_finished in list(self.subscribers):
+            on_changed(touched, set(), {})
+        return True
+
+    def _load(self, folder, metadata):
+        self.folder = folder
+        self.metadata[:] = metadata
+        self.by_path.clear()
+        self.by_path.update((m['path'], m) for m in metadata)
+        for on_loaded, on_changed, on_finished in list(self.subscribers):
+            on_loaded(self)
+
+    def read_changes(self, folder, changes):
+        # Only the games that were added, renamed or rewritten are re-read, through the scan
+        # cache like a full scan. Returns [(old_path, new_path, metadata)] for apply_changes().
+        replaced = [(path, path) for path in changes.added + changes.modified] + changes.renamed
+        read, updates = [], []
+        cache = ScanCache(CACHE_FILE, database_fingerprint(WIITDB_FILE))
+        try:
+            cached = cache.entries(folder)
+            for old_path, new_path in replaced:
+                try:
+                    stat = os.stat(new_path)
+                    metadata = ScanCache.cached_metadata(cached.get(new_path), stat)
+                    if metadata is None:
+                        metadata = extract_metadata(new_path)
+                        updates.append(ScanCache.row(new_path, folder, stat, metadata))
+                except OSError:
+                    continue
+                read.append((old_path, new_path, metadata))
+            cache.save(updates)
+        finally:
+            cache.close()
+        return read
+
+    def apply_changes(self, changes, read, generation):
+        # `read` is what read_changes() made of `changes`; it's dropped if a newer load started
+        # since. `renamed` maps each new path to the path it replaced.
+        if generation != self.generation:
+            return False
+        positions = {m['path']: i for i, m in enumerate(self.metadata)}
+        touched, renamed = [], {}
+        for old_path, new_path, metadata in read:
+            if old_path in positions:
+                self.metadata[positions[old_path]] = metadata
+                positions[new_path] = positions.pop(old_path)
+                self.by_path.pop(old_path, None)
+                if old_path != new_path:
+                    renamed[new_path] = old_path
+            else:
+                positions[new_path] = len(self.metadata)
+                self.metadata.append(metadata)
+            self.by_path[new_path] = metadata
+            touched.append(new_path)
+        removed = set(changes.removed)
+        for path in removed:
+            self.by_path.pop(path, None)
+        self.metadata[:] = [m for m in self.metadata if m['path'] not in removed]
+        for on_loaded, on_changed, on_finished in list(self.subscribers):
+            on_changed(touched, removed, renamed)
+        return True
+
+
+LIBRARY = Library()
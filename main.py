@@ -1,95 +1,24 @@
 import os
-import json
-import shutil
 import tkinter as tk
 from tkinter import filedialog, ttk
-import threading
-import re
-import time
 from main_grid import openGrid
+from library import LIBRARY, WIITDB, save_config, load_config, load_brands, is_game_file, game_description
+from scan_pipeline import ScanCancelled
+from folder_watch import FolderWatcher
+from copy_engine import CopyEngine, WORKER_PRESETS, COPIED, SKIPPED, FAILED, jobs_for_folder, format_progress
+from ui_events import UiEvents, LATEST, BATCH
+from virtual_table import VirtualTable
+from filter_index import FilterIndex
+from search_index import SearchIndex
+from external_snapshot import ExternalSnapshot
+from card_planner import plan_cards, CARD_SIZES
+from content_hash import HashCache, find_duplicates, QUICK, FULL
+import instrument
 
-CONFIG_FILE = 'config.json'
 OUTPUT_FOLDER_FILE = 'external_folder.txt'
-WIITDB_FILE = 'wiitdb_parsed.json'
-SUPPORTED_EXTENSIONS = ['.iso', '.gcm', '.nkit.iso']
-
-WIITDB = {}
-if os.path.exists(WIITDB_FILE):
-    with open(WIITDB_FILE, 'r', encoding='utf-8') as f:
-        WIITDB = json.load(f)
-
-def clean_filename(name):
-    return re.sub(r'[^a-zA-Z0-9]', '', name).lower()
-
-def strip_region_tags(title):
-    return re.sub(r'\((USA|Europe|Japan)\)', '', title, flags=re.IGNORECASE).strip()
-
-def extract_metadata(file_path):
-    filename = os.path.splitext(os.path.basename(file_path))[0]
-    display_title = strip_region_tags(filename)
-    clean_name = clean_filename(filename)
-    file_size = os.path.getsize(file_path)
-    region = 'Unknown'
-    if '(USA)' in filename.upper():
-        region = 'NTSC-U'
-    elif '(EUROPE)' in filename.upper():
-        region = 'PAL'
-    elif '(JAPAN)' in filename.upper():
-        region = 'NTSC-J'
-
-    best_match, best_score = None, 0
-    for key, data in WIITDB.items():
-        key_clean = clean_filename(key)
-        if clean_name in key_clean or key_clean in clean_name:
-            score = len(os.path.commonprefix([clean_name, key_clean]))
-            if score > best_score:
-                best_score = score
-                best_match = key
-    metadata = WIITDB.get(best_match, {}) if best_match else {}
-    input_info = metadata.get("input", {})
-    controls = json.dumps(input_info.get("controls", [{"type": "gamecube", "required": True}]))
-    input_players = input_info.get("players", '1')
-    genre = metadata.get('genre', 'Unknown')
-    genre_list = [g.strip() for g in genre.split(',')] if isinstance(genre, str) else ['Unknown']
-    return {
-        'gcid': metadata.get('gcid', 'UNKNOWN'),
-        'title': display_title,
-        'type': metadata.get('type', 'GameCube'),
-        'region': region,
-        'developer': metadata.get('developer', 'Unknown'),
-        'publisher': metadata.get('publisher', 'Unknown'),
-        'genre': genre,
-        'genre_list': genre_list,
-        'description': metadata.get('description', 'No description available.'),
-        'release_date': metadata.get('release_date', '2000-01-01'),
-        'esrb_rating': metadata.get('esrb_rating', 'Unrated'),
-        'online_players': metadata.get('online_players', '0'),
-        'input_players': input_players,
-        'controls': controls,
-        'path': file_path,
-        'size': file_size
-    }
-
-def save_config(path):
-    with open(CONFIG_FILE, 'w') as f:
-        json.dump({'gamecube_folder': path}, f)
-
-def load_config():
-    if os.path.exists(CONFIG_FILE):
-        with open(CONFIG_FILE, 'r') as f:
-            return json.load(f).get('gamecube_folder')
-    return None
-
-def scan_gamecube_files(folder):
-    game_files = []
-    for root, dirs, files in os.walk(folder):
-        for file in files:
-            ext = os.path.splitext(file)[1].lower()
-            if ext == '.iso' and file.lower().endswith('.nkit.iso'):
-                ext = '.nkit.iso'
-            if ext in SUPPORTED_EXTENSIONS:
-                game_files.append(os.path.join(root, file))
-    return game_files
+PLAN_PRIORITIES = {'Most games': 'count', 'Most players': 'players', 'Newest': 'newest', 'Checked genres': 'genre'}
+VERIFY_MODES = {'No verify': None, 'Quick verify': QUICK, 'Full verify': FULL}
+BRANDS = load_brands()
 
 def choose_folder():
     folder = filedialog.askdirectory(title='Select GameCube Folder')
@@ -103,45 +32,72 @@ def choose_output_folder():
         with open(OUTPUT_FOLDER_FILE, 'w') as f:
             f.write(folder)
         output_folder_var.set(folder)
-        threading.Thread(target=copy_files_with_progress, args=(folder,), daemon=True).start()
-
-def copy_files_with_progress(output_folder):
-    progress_label.config(text="Starting copy...")
-    total_files = len(tree.get_children())
-    for i, row_id in enumerate(tree.get_children(), 1):
-        values = tree.item(row_id)['values']
-        original_path = values[14]
-        filename = os.path.basename(original_path)
-        destination = os.path.join(output_folder, filename)
-        try:
-            if os.path.exists(destination):
-                original_size = os.path.getsize(original_path)
-                if original_size == os.path.getsize(destination):
-                    tree.set(row_id, column="In External Folder", value="✅")
-                    continue
-            progress_label.config(text=f"Transferring {filename} ({i}/{total_files})...")
-            start = time.time()
-            with open(original_path, 'rb') as src, open(destination, 'wb') as dst:
-                shutil.copyfileobj(src, dst)
-            end = time.time()
-            speed = os.path.getsize(original_path) / 1024 / 1024 / (end - start + 0.01)
-            progress_label.config(text=f"{filename} ({i}/{total_files}) - {speed:.2f} MB/s")
-            tree.set(row_id, column="In External Folder", value="✅")
-        except Exception as e:
-            progress_label.config(text=f"Error copying {filename}: {e}")
-            continue
-    progress_label.config(text="Copy completed.")
+        watch_folders()
+        paths = table.keys()
+        workers = WORKER_PRESETS.get(copy_target_var.get(), 1)
+        ui.run_in_background(copy_files_with_progress, folder, paths, workers, use_manifest_var.get(),
+                             VERIFY_MODES[verify_var.get()], error='background_error')
+
+def cancel_copy():
+    if active_copy is not None:
+        active_copy.cancel()
+        progress_label.config(text="Cancelling copy...")
+
+# Runs on a worker thread; everything it shows goes through ui.post.
+def copy_files_with_progress(output_folder, paths, workers, use_manifest, verify):
+    global active_copy
+    ui.post('progress', "Starting copy...")
+    paths = [path for path in paths if os.path.exists(path)]
+    snapshot = ExternalSnapshot.load(output_folder, use_manifest)
+    errors = []
+
+    def on_file_done(job):
+        if job.status == COPIED:
+            snapshot.refresh(os.path.basename(job.dst))
+        if job.status in (COPIED, SKIPPED):
+            ui.post('row_status', (job.src, "✅"))
+        elif job.status == FAILED:
+            errors.append(f"Error copying {os.path.basename(job.src)}: {job.error}")
+
+    engine = CopyEngine(workers=workers,
+                        on_progress=lambda progress: ui.post('progress', format_progress(progress)),
+                        on_file_done=on_file_done, verify=verify)
+    active_copy = engine
+    try:
+        engine.run(jobs_for_folder(paths, output_folder), existing=snapshot)
+    finally:
+        active_copy = None
+    if use_manifest:
+        snapshot.write_manifest()
+    ui.post('external_snapshot', snapshot)
+    if engine.cancelled.is_set():
+        ui.post('progress', "Copy cancelled; copied files are kept and the rest resumes next time.")
+    elif errors:
+        ui.post('progress', f"Copy completed with {len(errors)} error(s). {errors[-1]}")
+    else:
+        ui.post('progress', "Copy completed.")
 
 def update_transfer_status_column(external_folder):
-    for row_id in tree.get_children():
-        values = tree.item(row_id)['values']
-        path = values[14]
-        filename = os.path.basename(path)
-        destination_path = os.path.join(external_folder, filename)
-        if os.path.exists(destination_path) and os.path.getsize(destination_path) == os.path.getsize(path):
-            tree.set(row_id, column="In External Folder", value="✅")
-        else:
-            tree.set(row_id, column="In External Folder", value="")
+    ui.run_in_background(ExternalSnapshot.load, external_folder, use_manifest_var.get(),
+                         done='external_snapshot', error='background_error')
+
+def on_external_snapshot(snapshot):
+    global external_snapshot
+    if snapshot.folder != output_folder_var.get():
+        return
+    external_snapshot = snapshot
+    refresh_external_statuses()
+    filter_index.set_external_paths(path for path, status in external_statuses.items() if status)
+    apply_filters()
+
+def set_row_statuses(statuses):
+    paths = []
+    for path, status in statuses:
+        if path in filter_index.positions:
+            external_statuses[path] = status
+            filter_index.set_external(path, bool(status))
+            paths.append(path)
+    update_rows(paths)
 
 def choose_existing_external_folder():
     folder = filedialog.askdirectory(title='Select External Folder to Check')
@@ -150,209 +106,436 @@ def choose_existing_external_folder():
             f.write(folder)
         output_folder_var.set(folder)
         update_transfer_status_column(folder)
-
-def sort_by_column(treeview, col, descending):
-    data = [(treeview.set(child, col), child) for child in treeview.get_children('')]
-    data.sort(reverse=descending)
-    for idx, item in enumerate(data):
-        treeview.move(item[1], '', idx)
-    treeview.heading(col, command=lambda: sort_by_column(treeview, col, not descending))
+        watch_folders()
 
 def refresh_file_list(folder):
-    game_files = scan_gamecube_files(folder)
-    all_metadata.clear()
-    for row in tree.get_children():
-        tree.delete(row)
-    for game_path in game_files:
-        metadata = extract_metadata(game_path)
-        all_metadata.append(metadata)
+    progress_label.config(text="Scanning library...")
+    generation = LIBRARY.begin_load()
+    ui.run_in_background(load_library, folder, generation, LIBRARY.cancelled, output_folder_var.get(),
+                         use_manifest_var.get(), done='scan_done', error='background_error')
+
+# Runs on a worker thread. The first games show up while the rest are still being read;
+# picking another folder cancels the scan.
+def load_library(folder, generation, cancelled, output_folder, use_manifest):
+    with instrument.profile_once('refresh-scan'), instrument.stage('refresh.scan'):
+        try:
+            metadata = LIBRARY.scan(folder, lambda batch: ui.post('scan_batch', (folder, generation, batch)),
+                                    cancelled)
+        except ScanCancelled:
+            return None
+        return folder, generation, metadata, ExternalSnapshot.load(output_folder, use_manifest)
+
+def on_scan_batches(batches):
+    # Everything that arrived this frame goes in as one update.
+    folder, generation, _ = batches[-1]
+    metadata = [m for batch_folder, batch_generation, batch in batches if batch_generation == generation
+                for m in batch]
+    if LIBRARY.stream(folder, metadata, generation):
+        progress_label.config(text=f"Scanning library... {len(all_metadata)} games so far.")
+
+def on_scan_done(result):
+    if result is None:
+        return
+    folder, generation, metadata, snapshot = result
+    with instrument.profile_once('refresh-ui'), instrument.stage('refresh.ui'):
+        # The batches already put every game in the table; only the card's statuses are new.
+        if LIBRARY.publish(folder, metadata, generation):
+            on_external_snapshot(snapshot)
+
+# The grid can load a folder too, so the table follows the library rather than its own scans.
+# A streamed scan loads with its first batch and the rest arrive through on_library_changed.
+def on_library_loaded(library):
+    game_folder_var.set(library.folder)
+    refresh_external_statuses()
+    rebuild_filter_index()
     apply_filters()
+    watch_folders()
 
-def apply_filters():
-    for row in tree.get_children():
-        tree.delete(row)
+def on_library_finished(library):
+    progress_label.config(text=f"Loaded {len(library.metadata)} games.")
 
-    selected_players = {p for p, var in player_filters.items() if var.get()}
-    selected_regions = {r for r, var in region_filters.items() if var.get()}
-    selected_genres = {g for g, var in genre_filters.items() if var.get()}
+def current_filters():
+    return {
+        'players': {p for p, var in player_filters.items() if var.get()},
+        'regions': {r for r, var in region_filters.items() if var.get()},
+        'genres': {g for g, var in genre_filters.items() if var.get()},
+        'brands': {b for b, var in brand_filters.items() if var.get()},
+        'search': search_var.get(),
+        'main_folder': include_main_folder.get(),
+        'external_folder': include_external_folder.get(),
+    }
 
+def external_status(m):
+    if external_snapshot.folder != output_folder_var.get():
+        return ""
+    return "✅" if external_snapshot.has_copy(os.path.basename(m['path']), m['size']) else ""
+
+def row_values(metadata, exists, duplicate=""):
+    return (
+        exists, metadata['gcid'], metadata['title'], metadata['type'], metadata['region'],
+        metadata['developer'], metadata['publisher'], metadata['genre'],
+        WIITDB.description(metadata.get('wiitdb_key')), metadata['release_date'], metadata['esrb_rating'],
+        metadata['online_players'], metadata['input_players'], metadata['controls'],
+        metadata['path'], f"{metadata['size'] / (1024**3):.2f} GB", duplicate
+    )
+
+def table_values(path):
+    return row_values(metadata_by_path[path], external_statuses.get(path, ""), duplicate_labels.get(path, ""))
+
+def find_duplicate_games():
+    progress_label.config(text="Looking for duplicates...")
+    ui.run_in_background(scan_duplicates, list(all_metadata), done='duplicates', error='background_error')
+
+# Runs on a worker thread.
+def scan_duplicates(metadata):
+    cache = HashCache()
+    try:
+        return find_duplicates(metadata, cache)
+    finally:
+        cache.close()
+
+def on_duplicates(groups):
+    duplicate_labels.clear()
+    for number, (paths, reasons) in enumerate(groups, 1):
+        for path in paths:
+            duplicate_labels[path] = f"#{number} {', '.join(reasons)}"
+    # Descending keeps each group together and puts games without duplicates last.
+    table.sort_by('Duplicate', descending=True)
+    progress_label.config(text=f"Found {len(groups)} duplicate group(s).")
+
+def refresh_external_statuses():
+    global external_statuses_folder, snapshot_requested
     folder = output_folder_var.get()
-    disney_enabled = disney_filter.get()
-    nick_enabled = nick_filter.get()
-    brands_checked = []
-    if disney_enabled:
-        brands_checked.append("disney")
-    if nick_enabled:
-        brands_checked.append("nickelodeon")
-
-    filtered = []
-    total_gb = 0
+    if external_snapshot.folder != folder and snapshot_requested != folder:
+        # The path was typed in by hand; the statuses fill in once its snapshot is taken.
+        snapshot_requested = folder
+        update_transfer_status_column(folder)
+    with instrument.stage('external.statuses'):
+        external_statuses.clear()
+        external_statuses.update((m['path'], external_status(m)) for m in all_metadata)
+    external_statuses_folder = folder
+
+def rebuild_filter_index():
+    global filter_index
+    if external_statuses_folder != output_folder_var.get():
+        refresh_external_statuses()
+    present = [path for path, status in external_statuses.items() if status]
+    with instrument.stage('filter.index'):
+        filter_index = FilterIndex(all_metadata, present, BRANDS, game_description, previous=filter_index)
+    request_search_index()
+
+def request_search_index():
+    # The search index is built on a worker and handed to whichever FilterIndex is current
+    # when it's done; if the games changed meanwhile, it's built again.
+    global search_index_requested
+    if filter_index.search_index is None and not search_index_requested:
+        search_index_requested = True
+        ui.run_in_background(build_search_index, list(filter_index.metadata_list), done='search_index',
+                             error='background_error')
+
+def build_search_index(metadata):
+    return metadata, SearchIndex(metadata, game_description)
+
+def on_search_index(built):
+    global search_index_requested
+    search_index_requested = False
+    if not filter_index.adopt_search_index(*built):
+        request_search_index()
+
+def update_filter_counts(filters):
+    with instrument.stage('filter.counts'):
+        counts = filter_index.counts(filters)
+    for facet, checks in filter_checks.items():
+        for value, (check, label) in checks.items():
+            check.config(text=f"{label} ({counts[facet].get(value, 0)})")
+
+def show_filtered(mask, filters):
+    filtered, total_size = filter_index.selection(mask, filters.get('search'))
+    count_label.config(text=f"Filtered Games: {len(filtered)} | Total Size: {total_size / (1024**3):.2f} GB")
+    update_filter_counts(filters)
+    return filtered
 
+def apply_filters():
+    if external_statuses_folder != output_folder_var.get():
+        rebuild_filter_index()
+    filters = current_filters()
+    with instrument.stage('filter.apply'):
+        table.set_rows(show_filtered(filter_index.query(filters), filters))
+
+def fit_to_card():
+    # Narrows the displayed games to the best set that fits the chosen card, keeping what's
+    # already on the external folder; "Copy Displayed Files" then copies just that plan.
+    games = [metadata_by_path[path] for path in table.keys()]
+    genre_weights = {g: 1 for g, var in genre_filters.items() if var.get()}
+    snapshot = external_snapshot if external_snapshot.folder == output_folder_var.get() else None
+    plan = plan_cards(games, CARD_SIZES[card_size_var.get()], PLAN_PRIORITIES[plan_priority_var.get()],
+                      genre_weights=genre_weights, snapshot=snapshot)[0]
+    table.set_rows([m['path'] for m in plan.games()])
+    count_label.config(text=f"Card plan: {len(plan.copy)} to copy ({plan.copy_bytes() / (1024**3):.2f} GB), "
+                            f"{len(plan.present)} already on card, {plan.free_bytes() / (1024**3):.2f} GB free")
+
+def update_rows(paths, index_of=None):
+    # Shows or hides just `paths` according to the current filters.
+    filters = current_filters()
+    mask = filter_index.query(filters)
+    for path in paths:
+        if filter_index.matches(mask, path):
+            table.show(path, (index_of or {}).get(path))
+        else:
+            table.hide(path)
+    show_filtered(mask, filters)
+
+def on_library_changed(touched, removed, renamed):
+    index_of = {}
+    for new_path, old_path in renamed.items():
+        if table.contains(old_path):
+            index_of[new_path] = table.index(old_path)
+            table.hide(old_path)
+        external_statuses.pop(old_path, None)
+    for path in touched:
+        external_statuses[path] = external_status(metadata_by_path[path])
+    for path in removed:
+        table.hide(path)
+        external_statuses.pop(path, None)
+    if external_statuses_folder != output_folder_var.get():
+        rebuild_filter_index()
+    else:
+        for new_path, old_path in renamed.items():
+            filter_index.rename(old_path, new_path)
+        for path in removed:
+            filter_index.remove(path)
+        filter_index.update([metadata_by_path[path] for path in touched],
+                            [path for path in touched if external_statuses[path]])
+    update_rows(touched, index_of)
+
+def apply_external_changes(changes):
+    touched = changes.added + changes.removed + changes.modified
+    touched += [path for rename in changes.renamed for path in rename]
+    names = {os.path.basename(path) for path in touched}
+    if external_snapshot.folder != output_folder_var.get():
+        rebuild_filter_index()
+    for name in names:
+        external_snapshot.refresh(name)
+    paths = []
     for m in all_metadata:
-        if m['input_players'] not in selected_players:
-            continue
-        if m['region'] not in selected_regions:
-            continue
-        if selected_genres and not any(g in selected_genres for g in m.get('genre_list', [])):
-            continue
-
-        title_lower = m['title'].lower()
-        if not disney_filter.get() and title_lower.startswith("disney"):
-            continue
-        if not nick_filter.get() and title_lower.startswith("nickelodeon"):
-            continue
-
-
-
-
-        exists = "✅" if folder and os.path.exists(os.path.join(folder, os.path.basename(m['path']))) and os.path.getsize(os.path.join(folder, os.path.basename(m['path']))) == m['size'] else ""
-
-        # Games List filter
-        if not include_main_folder.get() and exists == "":
-            continue
-        if not include_external_folder.get() and exists == "✅":
-            continue
-
-        filtered.append((m, exists))
-        total_gb += m['size']
-
-    for metadata, exists in filtered:
-        tree.insert('', 'end', values=(
-            exists, metadata['gcid'], metadata['title'], metadata['type'], metadata['region'],
-            metadata['developer'], metadata['publisher'], metadata['genre'],
-            metadata['description'], metadata['release_date'], metadata['esrb_rating'],
-            metadata['online_players'], metadata['input_players'], metadata['controls'],
-            metadata['path'], f"{metadata['size'] / (1024**3):.2f} GB"
-        ))
-
-    count_label.config(text=f"Filtered Games: {len(filtered)} | Total Size: {total_gb / (1024**3):.2f} GB")
-
-root = tk.Tk()
-root.title("GameCube Game Manager")
-root.geometry("1500x900")
-
-frame = tk.Frame(root)
-frame.pack(fill='both', expand=True, padx=10, pady=10)
-
-output_folder_var = tk.StringVar()
-if os.path.exists(OUTPUT_FOLDER_FILE):
-    with open(OUTPUT_FOLDER_FILE, 'r') as f:
-        output_folder_var.set(f.read().strip())
-
-tk.Label(frame, text="External Folder Path:").pack(anchor='w')
-tk.Entry(frame, textvariable=output_folder_var, width=100).pack(fill='x')
-
-filter_frame = tk.LabelFrame(frame, text="Filters")
-filter_frame.pack(fill='x', pady=5)
-
-filter_column_frame = tk.Frame(filter_frame)
-filter_column_frame.pack(fill='x')
-
-# --- Players ---
-player_column = tk.Frame(filter_column_frame)
-player_column.pack(side='left', padx=10)
-tk.Label(player_column, text="Players").pack(anchor='w')
-player_filters = {}
-for p in ['0', '1', '2', '4']:
-    var = tk.BooleanVar(value=True)
-    tk.Checkbutton(player_column, text=p, variable=var, command=apply_filters).pack(anchor='w')
-    player_filters[p] = var
-
-# --- Vertical Separator ---
-ttk.Separator(filter_column_frame, orient='vertical').pack(side='left', fill='y', padx=5)
-
-# --- Region ---
-region_column = tk.Frame(filter_column_frame)
-region_column.pack(side='left', padx=10)
-tk.Label(region_column, text="Region").pack(anchor='w')
-region_filters = {}
-for r in ['NTSC-U', 'PAL', 'NTSC-J', 'Unknown']:
-    var = tk.BooleanVar(value=True)
-    tk.Checkbutton(region_column, text=r, variable=var, command=apply_filters).pack(anchor='w')
-    region_filters[r] = var
-
-# --- Vertical Separator ---
-ttk.Separator(filter_column_frame, orient='vertical').pack(side='left', fill='y', padx=5)
-
-# --- Brands ---
-brand_column = tk.Frame(filter_column_frame)
-brand_column.pack(side='left', padx=10)
-tk.Label(brand_column, text="Brands").pack(anchor='w')
-disney_filter = tk.BooleanVar(value=True)
-nick_filter = tk.BooleanVar(value=True)
-tk.Checkbutton(brand_column, text="Disney", variable=disney_filter, command=apply_filters).pack(anchor='w')
-tk.Checkbutton(brand_column, text="Nickelodeon", variable=nick_filter, command=apply_filters).pack(anchor='w')
-ttk.Separator(filter_column_frame, orient='vertical').pack(side='left', fill='y', padx=5)
-
-# --- Games List Filter ---
-gameslist_column = tk.Frame(filter_column_frame)
-gameslist_column.pack(side='left', padx=10)
-tk.Label(gameslist_column, text="Games List").pack(anchor='w')
-include_main_folder = tk.BooleanVar(value=True)
-include_external_folder = tk.BooleanVar(value=True)
-tk.Checkbutton(gameslist_column, text="Main Folder", variable=include_main_folder, command=apply_filters).pack(anchor='w')
-tk.Checkbutton(gameslist_column, text="External Folder", variable=include_external_folder, command=apply_filters).pack(anchor='w')
-
-# --- Horizontal Separator before Genre ---
-ttk.Separator(filter_frame, orient='horizontal').pack(fill='x', pady=10)
-
-# --- Genres ---
-genre_column = tk.Frame(filter_frame)
-genre_column.pack(fill='x')
-tk.Label(genre_column, text="Genre").pack(anchor='w')
-
-genre_set = set()
-for entry in WIITDB.values():
-    if 'genre' in entry and isinstance(entry['genre'], str):
-        for g in entry['genre'].split(','):
-            genre_set.add(g.strip())
-all_genres = sorted(genre_set)
-
-genre_filters = {}
-rows_per_column = 5
-genre_columns = []
-for i in range((len(all_genres) + rows_per_column - 1) // rows_per_column):
-    col = tk.Frame(genre_column)
-    col.pack(side='left', padx=5)
-    genre_columns.append(col)
-
-for i, g in enumerate(all_genres):
-    var = tk.BooleanVar(value=False)
-    col_index = i // rows_per_column
-    tk.Checkbutton(genre_columns[col_index], text=g, variable=var, command=apply_filters).pack(anchor='w')
-    genre_filters[g] = var
-
-
-count_label = tk.Label(filter_frame, text="Filtered Games: 0 | Total Size: 0.00 GB")
-count_label.pack(side='bottom', pady=5)
-
-button_frame = tk.Frame(frame)
-button_frame.pack(fill='x', pady=5)
-
-tk.Button(button_frame, text="Choose Folder", command=choose_folder).pack(side='left')
-tk.Button(button_frame, text="Copy Displayed Files to Folder", command=choose_output_folder).pack(side='left', padx=10)
-tk.Button(button_frame, text="Check External Folder", command=choose_existing_external_folder).pack(side='left', padx=10)
-tk.Button(button_frame, text="Open Grid", command=openGrid).pack(side='left', padx=10)
-progress_label = tk.Label(button_frame, text="")
-progress_label.pack(side='left', padx=10)
-
-columns = [
-    'In External Folder', 'GameCube ID', 'Game Title', 'Console', 'Region', 'Developer', 'Publisher', 'genre',
-    'Game Description', 'Release Date', 'ESRB Rating', 'online_players',
-    'Max Players', 'Controls', 'path', 'size'
-]
-tree = ttk.Treeview(frame, columns=columns, show='headings')
-for col in columns:
-    tree.heading(col, text=col, command=lambda _col=col: sort_by_column(tree, _col, False))
-    tree.column(col, width=120, anchor='w')
-tree_scrollbar = ttk.Scrollbar(frame, orient='vertical', command=tree.yview)
-tree.configure(yscrollcommand=tree_scrollbar.set)
-tree.pack(side='left', fill='both', expand=True)
-tree_scrollbar.pack(side='right', fill='y')
-
-all_metadata = []
-saved_path = load_config()
-if saved_path and os.path.exists(saved_path):
-    refresh_file_list(saved_path)
-
-root.mainloop()
+        if os.path.basename(m['path']) in names:
+            external_statuses[m['path']] = external_status(m)
+            filter_index.set_external(m['path'], bool(external_statuses[m['path']]))
+            paths.append(m['path'])
+    update_rows(paths)
+
+def watch_folders():
+    global library_watcher
+    if library_watcher:
+        library_watcher.stop()
+    folders = [game_folder_var.get(), output_folder_var.get()]
+    library_watcher = FolderWatcher(folders, lambda folder, changes: ui.post('folder_changed', (folder, changes)),
+                                    accept=is_game_file).start()
+
+def on_folder_changed(event):
+    folder, changes = event
+    if folder == game_folder_var.get():
+        # Read one batch of changes at a time, so they're applied in the order they happened.
+        pending_changes.append((folder, changes, LIBRARY.generation))
+        if len(pending_changes) == 1:
+            read_next_changes()
+    if folder == output_folder_var.get():
+        apply_external_changes(changes)
+
+def read_next_changes():
+    folder, changes, generation = pending_changes[0]
+    ui.run_in_background(LIBRARY.read_changes, folder, changes, done='library_changes', error='library_changes')
+
+def on_library_changes(read):
+    folder, changes, generation = pending_changes.pop(0)
+    if isinstance(read, Exception):
+        progress_label.config(text=f"Error: {read}")
+    else:
+        LIBRARY.apply_changes(changes, read, generation)
+    if pending_changes:
+        read_next_changes()
+
+# Scan and hash worker processes re-import this module on Windows; only a real run builds the window.
+if __name__ == '__main__':
+    root = tk.Tk()
+    root.title("GameCube Game Manager")
+    root.geometry("1500x900")
+
+    frame = tk.Frame(root)
+    frame.pack(fill='both', expand=True, padx=10, pady=10)
+
+    output_folder_var = tk.StringVar()
+    game_folder_var = tk.StringVar()
+    if os.path.exists(OUTPUT_FOLDER_FILE):
+        with open(OUTPUT_FOLDER_FILE, 'r') as f:
+            output_folder_var.set(f.read().strip())
+
+    tk.Label(frame, text="External Folder Path:").pack(anchor='w')
+    tk.Entry(frame, textvariable=output_folder_var, width=100).pack(fill='x')
+
+    filter_frame = tk.LabelFrame(frame, text="Filters")
+    filter_frame.pack(fill='x', pady=5)
+
+    # --- Search ---
+    search_row = tk.Frame(filter_frame)
+    search_row.pack(fill='x', padx=10, pady=(0, 5))
+    tk.Label(search_row, text="Search:").pack(side='left')
+    search_var = tk.StringVar()
+    tk.Entry(search_row, textvariable=search_var, width=60).pack(side='left', padx=5)
+    search_var.trace_add('write', lambda *args: apply_filters())
+
+    filter_column_frame = tk.Frame(filter_frame)
+    filter_column_frame.pack(fill='x')
+
+    # --- Players ---
+    player_column = tk.Frame(filter_column_frame)
+    player_column.pack(side='left', padx=10)
+    tk.Label(player_column, text="Players").pack(anchor='w')
+    filter_checks = {'players': {}, 'regions': {}, 'genres': {}, 'brands': {}, 'games_list': {}}
+    player_filters = {}
+    for p in ['0', '1', '2', '4']:
+        var = tk.BooleanVar(value=True)
+        check = tk.Checkbutton(player_column, text=p, variable=var, command=apply_filters)
+        check.pack(anchor='w')
+        player_filters[p] = var
+        filter_checks['players'][p] = (check, p)
+
+    # --- Vertical Separator ---
+    ttk.Separator(filter_column_frame, orient='vertical').pack(side='left', fill='y', padx=5)
+
+    # --- Region ---
+    region_column = tk.Frame(filter_column_frame)
+    region_column.pack(side='left', padx=10)
+    tk.Label(region_column, text="Region").pack(anchor='w')
+    region_filters = {}
+    for r in ['NTSC-U', 'PAL', 'NTSC-J', 'Unknown']:
+        var = tk.BooleanVar(value=True)
+        check = tk.Checkbutton(region_column, text=r, variable=var, command=apply_filters)
+        check.pack(anchor='w')
+        region_filters[r] = var
+        filter_checks['regions'][r] = (check, r)
+
+    # --- Vertical Separator ---
+    ttk.Separator(filter_column_frame, orient='vertical').pack(side='left', fill='y', padx=5)
+
+    # --- Brands ---
+    brand_column = tk.Frame(filter_column_frame)
+    brand_column.pack(side='left', padx=10)
+    tk.Label(brand_column, text="Brands").pack(anchor='w')
+    brand_filters = {}
+    for brand in BRANDS:
+        var = tk.BooleanVar(value=True)
+        check = tk.Checkbutton(brand_column, text=brand, variable=var, command=apply_filters)
+        check.pack(anchor='w')
+        brand_filters[brand] = var
+        filter_checks['brands'][brand] = (check, brand)
+    ttk.Separator(filter_column_frame, orient='vertical').pack(side='left', fill='y', padx=5)
+
+    # --- Games List Filter ---
+    gameslist_column = tk.Frame(filter_column_frame)
+    gameslist_column.pack(side='left', padx=10)
+    tk.Label(gameslist_column, text="Games List").pack(anchor='w')
+    include_main_folder = tk.BooleanVar(value=True)
+    include_external_folder = tk.BooleanVar(value=True)
+    for key, label, var in [('main_folder', "Main Folder", include_main_folder),
+                            ('external_folder', "External Folder", include_external_folder)]:
+        check = tk.Checkbutton(gameslist_column, text=label, variable=var, command=apply_filters)
+        check.pack(anchor='w')
+        filter_checks['games_list'][key] = (check, label)
+
+    # --- Horizontal Separator before Genre ---
+    ttk.Separator(filter_frame, orient='horizontal').pack(fill='x', pady=10)
+
+    # --- Genres ---
+    genre_column = tk.Frame(filter_frame)
+    genre_column.pack(fill='x')
+    tk.Label(genre_column, text="Genre").pack(anchor='w')
+
+    all_genres = WIITDB.genres
+
+    genre_filters = {}
+    rows_per_column = 5
+    genre_columns = []
+    for i in range((len(all_genres) + rows_per_column - 1) // rows_per_column):
+        col = tk.Frame(genre_column)
+        col.pack(side='left', padx=5)
+        genre_columns.append(col)
+
+    for i, g in enumerate(all_genres):
+        var = tk.BooleanVar(value=False)
+        col_index = i // rows_per_column
+        check = tk.Checkbutton(genre_columns[col_index], text=g, variable=var, command=apply_filters)
+        check.pack(anchor='w')
+        genre_filters[g] = var
+        filter_checks['genres'][g] = (check, g)
+
+
+    count_label = tk.Label(filter_frame, text="Filtered Games: 0 | Total Size: 0.00 GB")
+    count_label.pack(side='bottom', pady=5)
+
+    button_frame = tk.Frame(frame)
+    button_frame.pack(fill='x', pady=5)
+
+    tk.Button(button_frame, text="Choose Folder", command=choose_folder).pack(side='left')
+    tk.Button(button_frame, text="Copy Displayed Files to Folder",
+              command=choose_output_folder).pack(side='left', padx=10)
+    tk.Button(button_frame, text="Cancel Copy", command=cancel_copy).pack(side='left')
+    copy_target_var = tk.StringVar(value='SD card')
+    tk.OptionMenu(button_frame, copy_target_var, *WORKER_PRESETS).pack(side='left')
+    use_manifest_var = tk.BooleanVar(value=False)
+    tk.Checkbutton(button_frame, text="Use card manifest", variable=use_manifest_var).pack(side='left', padx=10)
+    verify_var = tk.StringVar(value='No verify')
+    tk.OptionMenu(button_frame, verify_var, *VERIFY_MODES).pack(side='left')
+    tk.Button(button_frame, text="Check External Folder",
+              command=choose_existing_external_folder).pack(side='left', padx=10)
+    card_size_var = tk.StringVar(value='32 GB')
+    tk.OptionMenu(button_frame, card_size_var, *CARD_SIZES).pack(side='left')
+    plan_priority_var = tk.StringVar(value='Most games')
+    tk.OptionMenu(button_frame, plan_priority_var, *PLAN_PRIORITIES).pack(side='left')
+    tk.Button(button_frame, text="Fit to Card", command=fit_to_card).pack(side='left', padx=10)
+    tk.Button(button_frame, text="Open Grid", command=openGrid).pack(side='left', padx=10)
+    tk.Button(button_frame, text="Find Duplicates", command=find_duplicate_games).pack(side='left', padx=10)
+    progress_label = tk.Label(button_frame, text="")
+    progress_label.pack(side='left', padx=10)
+
+    columns = [
+        'In External Folder', 'GameCube ID', 'Game Title', 'Console', 'Region', 'Developer', 'Publisher', 'genre',
+        'Game Description', 'Release Date', 'ESRB Rating', 'online_players',
+        'Max Players', 'Controls', 'path', 'size', 'Duplicate'
+    ]
+    table = VirtualTable(frame, columns, table_values)
+    table.pack(side='left', fill='both', expand=True)
+
+    # Owned by the shared library model, which updates both in place.
+    all_metadata = LIBRARY.metadata
+    metadata_by_path = LIBRARY.by_path
+    external_statuses = {}
+    duplicate_labels = {}
+    external_statuses_folder = None
+    external_snapshot = ExternalSnapshot(None)
+    snapshot_requested = None
+    filter_index = FilterIndex([], (), BRANDS)
+    search_index_requested = False
+    library_watcher = None
+    pending_changes = []
+    active_copy = None
+
+    ui = UiEvents(root)
+    ui.subscribe('progress', lambda text: progress_label.config(text=text), LATEST)
+    ui.subscribe('row_status', set_row_statuses, BATCH)
+    ui.subscribe('scan_batch', on_scan_batches, BATCH)
+    ui.subscribe('scan_done', on_scan_done)
+    ui.subscribe('folder_changed', on_folder_changed)
+    ui.subscribe('library_changes', on_library_changes)
+    ui.subscribe('external_snapshot', on_external_snapshot)
+    ui.subscribe('duplicates', on_duplicates)
+    ui.subscribe('search_index', on_search_index)
+    ui.subscribe('background_error', lambda e: progress_label.config(text=f"Error: {e}"))
+    ui.start()
+    LIBRARY.subscribe(on_library_loaded, on_library_changed, on_library_finished)
+
+    saved_path = load_config()
+    if saved_path and os.path.exists(saved_path):
+        refresh_file_list(saved_path)
+
+    root.mainloop()
@@ -0,0 +1,60 @@
+import os
+import json
+import sqlite3
+import hashlib
+
+CACHE_FILE = 'scan_cache.sqlite'
+# Bump when extract_metadata starts producing different fields.
+CACHE_VERSION = 3
+
+
+def database_fingerprint(database_file):
+    digest = hashlib.sha1(str(CACHE_VERSION).encode('ascii'))
+    if os.path.exists(database_file):
+        with open(database_file, 'rb') as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                digest.update(chunk)
+    return digest.hexdigest()
+
+
+class ScanCache:
+    # Metadata for scanned files keyed by path+size+mtime, valid for one WiiTDB build.
+
+    def __init__(self, cache_file, fingerprint):
+        self.conn = sqlite3.connect(cache_file)
+        self.conn.execute('CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)')
+        self.conn.execute(
+            'CREATE TABLE IF NOT EXISTS entries ('
+            'path TEXT PRIMARY KEY, folder TEXT, size INTEGER, mtime INTEGER, metadata TEXT)'
+        )
+        self.conn.execute('CREATE INDEX IF NOT EXISTS entries_folder ON entries (folder)')
+        row = self.conn.execute("SELECT value FROM meta WHERE key = 'fingerprint'").fetchone()
+        if row is None or row[0] != fingerprint:
+            self.conn.execute('DELETE FROM entries')
+            self.conn.execute("INSERT OR REPLACE INTO meta VALUES ('fingerprint', ?)", (fingerprint,))
+        self.conn.commit()
+
+    def close(self):
+        self.conn.close()
+
+    def entries(self, folder):
+        rows = self.conn.execute('SELECT path, size, mtime, metadata FROM entries WHERE folder = ?', (folder,))
+        return {path: (size, mtime, metadata) for path, size, mtime, metadata in rows}
+
+    @staticmethod
+    def cached_metadata(entry, stat):
+        # The metadata from an entries() value if the file hasn't changed since, else None.
+        if entry and entry[0] == stat.st_size and entry[1] == stat.st_mtime_ns:
+            return json.loads(entry[2])
+        return None
+
+    @staticmethod
+    def row(path, folder, stat, metadata):
+        return (path, folder, stat.st_size, stat.st_mtime_ns, json.dumps(metadata))
+
+    def save(self, rows, removed=()):
+        if rows:
+            self.conn.executemany('INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?)', rows)
+        if removed:
+            self.conn.executemany('DELETE FROM entries WHERE path = ?', [(path,) for path in removed])
+        self.conn.commit()
@@ -0,0 +1,170 @@
+import os
+import time
+import queue
+import threading
+import multiprocessing
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor, wait
+import instrument
+from scan_cache import ScanCache
+
+# At most this many extract() workers, and no more than there are CPUs.
+SCAN_WORKERS = 4
+# Files handed to a worker at once; one future per file costs more than a cached lookup.
+CHUNK_SIZE = 32
+# Finished games go out in walk order, at least this many at a time or after this long.
+BATCH_SIZE = 250
+BATCH_INTERVAL = 0.1
+# How often a wait for a worker checks whether the scan was cancelled.
+CANCEL_POLL = 0.05
+
+_WALK_DONE = object()
+
+
+class ScanCancelled(Exception):
+    pass
+
+
+def _walk(folder, accept, paths, stop):
+    # Producer: feeds each folder's game files to the scan in os.walk order while the
+    # walk is still going.
+    try:
+        with instrument.stage('scan.walk'):
+            for root, dirs, files in os.walk(folder):
+                if stop.is_set():
+                    break
+                found = [os.path.join(root, file) for file in files if accept(file)]
+                if found:
+                    paths.put(found)
+    finally:
+        paths.put(_WALK_DONE)
+
+
+def _extract_chunk(extract, paths, measure=False):
+    # Returns the chunk's metadata and, when `measure` asks a worker process to, what
+    # instrument recorded there, for the parent to merge into its report.
+    if not measure:
+        return [extract(path) for path in paths], None
+    instrument.collect()
+    return [extract(path) for path in paths], instrument.take()
+
+
+def _result(future, cancelled):
+    while not wait([future], CANCEL_POLL).done:
+        if cancelled.is_set():
+            raise ScanCancelled()
+    return future.result()
+
+
+def stream_scan(folder, accept, extract, cache=None, on_batch=None, cancelled=None,
+                workers=None, processes=True, batch_size=BATCH_SIZE):
+    # Returns what extracting every accepted file of a serial os.walk would, in the same order.
+    # The walk, the cache lookups and extract() overlap, and on_batch(metadata) gets each
+    # finished stretch as it grows. Once `cancelled` is set it raises ScanCancelled, after
+    # saving what was already extracted to the cache.
+    cancelled = cancelled or threading.Event()
+    workers = workers or min(SCAN_WORKERS, os.cpu_count() or 1)
+    if instrument.profiling():
+        # cProfile only sees this thread, so extract() runs here while it's being profiled.
+        workers = 1
+    paths, stop = queue.Queue(), threading.Event()
+    walker = threading.Thread(target=_walk, args=(folder, accept, paths, stop), daemon=True)
+    walker.start()
+    cached = cache.entries(folder) if cache else {}
+    slots, misses, chunk, updates = [], {}, [], []
+    results, batch = [], []
+    last_batch = [time.monotonic()]
+    pool = None
+
+    def flush(block):
+        # Moves finished slots, in order, into results; blocks on stragglers if asked.
+        while len(results) < len(slots):
+            if cancelled.is_set():
+                raise ScanCancelled()
+            i = len(results)
+            if i in misses:
+                path, stat, future, offset = misses[i]
+                if future is None or not (block or future.done()):
+                    break
+                extracted, measured = _result(future, cancelled)
+                if measured and offset == 0:
+                    instrument.merge(measured)
+                metadata = extracted[offset]
+                instrument.count('metadata extracted')
+                updates.append(ScanCache.row(path, folder, stat, metadata))
+                del misses[i]
+            else:
+                metadata = slots[i]
+            results.append(metadata)
+            batch.append(metadata)
+            if on_batch and (len(batch) >= batch_size or time.monotonic() - last_batch[0] >= BATCH_INTERVAL):
+                send_batch()
+
+    def send_batch():
+        if batch:
+            on_batch(list(batch))
+            batch.clear()
+        last_batch[0] = time.monotonic()
+
+    def submit():
+        nonlocal pool
+        chunk_paths = [path for i, path, stat in chunk]
+        if workers < 2:
+            # A single CPU (or a profiled scan) extracts inline.
+            future = Future()
+            future.set_result(_extract_chunk(extract, chunk_paths))
+        else:
+            if pool is None:
+                if processes:
+                    # extract() is pure Python, so threads would only take turns holding the GIL.
+                    # Worker processes need `extract` to be importable and re-import the main
+                    # script. They're spawned, since forking from a Tk app's worker thread copies
+                    # it mid-flight.
+                    pool = ProcessPoolExecutor(workers, multiprocessing.get_context('spawn'))
+                else:
+                    pool = ThreadPoolExecutor(workers)
+            future = pool.submit(_extract_chunk, extract, chunk_paths, processes and instrument.enabled)
+        for offset, (i, path, stat) in enumerate(chunk):
+            misses[i] = (path, stat, future, offset)
+        chunk.clear()
+
+    try:
+        while True:
+            found = paths.get()
+            if found is _WALK_DONE:
+                break
+            for path in found:
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                metadata = ScanCache.cached_metadata(cached.pop(path, None), stat) if cache else None
+                if metadata is None:
+                    # Not ready to hand out until its chunk is submitted.
+                    misses[len(slots)] = (path, stat, None, None)
+                    chunk.append((len(slots), path, stat))
+                    if len(chunk) >= CHUNK_SIZE:
+                        submit()
+                slots.append(metadata)
+                flush(block=False)
+            if chunk:
+                submit()
+        flush(block=True)
+        if on_batch:
+            send_batch()
+        instrument.count('files scanned', len(slots))
+        instrument.count('scan stat calls', len(slots))
+    except BaseException:
+        stop.set()
+        if pool:
+            pool.shutdown(wait=False, cancel_futures=True)
+            pool = None
+        # Keep what was extracted; the stale entries can only be told apart after a full walk.
+        if cache:
+            cache.save(updates)
+        raise
+    finally:
+        if pool:
+            pool.shutdown()
+    if cache:
+        cache.save(updates, cached)
+    return results
@@ -0,0 +1,153 @@
+import re
+import bisect
+import unicodedata
+from functools import lru_cache
+
+SEARCH_FIELDS = ('title', 'developer', 'publisher', 'genre')
+# Terms this long or longer also match words one typo away (a missing, extra, swapped or
+# wrong letter); shorter ones only match as a prefix.
+FUZZY_MIN_LENGTH = 4
+# Per-term results kept between keystrokes, since typing only ever changes the last term.
+TERM_CACHE_SIZE = 64
+
+WORD = re.compile(r'[^\W_]+')
+
+
+@lru_cache(maxsize=8192)
+def tokenize(text):
+    # Lowercased words with accents dropped, so "pokemon" finds "Pokémon".
+    text = text.lower()
+    if not text.isascii():
+        text = ''.join(c for c in unicodedata.normalize('NFKD', text) if not unicodedata.combining(c))
+    return tuple(WORD.findall(text))
+
+
+def within_one_edit(a, b):
+    # Damerau-Levenshtein distance <= 1 without building the full matrix.
+    if a == b:
+        return True
+    if abs(len(a) - len(b)) > 1:
+        return False
+    i = 0
+    while i < min(len(a), len(b)) and a[i] == b[i]:
+        i += 1
+    if len(a) == len(b):
+        swapped = a[i + 1:i + 2] == b[i:i + 1] and a[i:i + 1] == b[i + 1:i + 2]
+        return a[i + 1:] == b[i + 1:] or (swapped and a[i + 2:] == b[i + 2:])
+    longer, shorter = (a, b) if len(a) > len(b) else (b, a)
+    return longer[i + 1:] == shorter[i:]
+
+
+def _group_key(m):
+    return (m.get('wiitdb_key'),) + tuple(m.get(field) for field in SEARCH_FIELDS[1:])
+
+
+def _prefixed(words, prefix):
+    start = bisect.bisect_left(words, prefix)
+    return words[start:bisect.bisect_left(words, prefix + '\uffff', start)]
+
+
+class SearchIndex:
+    # Inverted index from words in each game's title, developer, publisher, genre and
+    # description to its positions in the metadata list (the same positions FilterIndex
+    # uses for its bits). Every search term must match; a term matches a word it is a
+    # prefix of, or, from FUZZY_MIN_LENGTH letters, a word within one typo.
+    # Games from the same WiiTDB entry share everything but the title, so those fields are
+    # indexed once per entry rather than once per game. add() and remove() keep it in step
+    # with FilterIndex's in-place updates.
+
+    def __init__(self, metadata_list, describe=None):
+        self.describe = describe
+        titles, groups = {}, {}
+        for i, m in enumerate(metadata_list):
+            for word in set(tokenize(m['title'])):
+                titles.setdefault(word, set()).add(i)
+            groups.setdefault(_group_key(m), set()).add(i)
+        shared_words = {}
+        for key, members in groups.items():
+            for word in self._group_words(metadata_list[min(members)]):
+                shared_words.setdefault(word, set()).add(key)
+        self.titles = titles
+        self.groups = groups
+        self.shared_words = shared_words
+        self.words = sorted(titles.keys() | shared_words.keys())
+        self.reversed_words = sorted(word[::-1] for word in self.words)
+        self.cache = {}
+
+    def _group_words(self, m):
+        words = set(tokenize(self.describe(m))) if self.describe else set()
+        for field in SEARCH_FIELDS[1:]:
+            if isinstance(m.get(field), str):
+                words.update(tokenize(m[field]))
+        return words
+
+    def _add_word(self, word):
+        if word not in self.titles and word not in self.shared_words:
+            bisect.insort(self.words, word)
+            bisect.insort(self.reversed_words, word[::-1])
+
+    def add(self, position, m):
+        for word in set(tokenize(m['title'])):
+            self._add_word(word)
+            self.titles.setdefault(word, set()).add(position)
+        key = _group_key(m)
+        if key not in self.groups:
+            self.groups[key] = set()
+            for word in self._group_words(m):
+                self._add_word(word)
+                self.shared_words.setdefault(word, set()).add(key)
+        self.groups[key].add(position)
+        self.cache.clear()
+
+    def remove(self, position, m):
+        # `m` is the metadata the position was added with. Its words stay in the word
+        # lists; with no positions left they just match nothing.
+        for word in set(tokenize(m['title'])):
+            self.titles.get(word, set()).discard(position)
+        self.groups.get(_group_key(m), set()).discard(position)
+        self.cache.clear()
+
+    def _fuzzy_words(self, term):
+        # One edit leaves either the first half of the term or everything after its middle
+        # letter intact, so only words sharing that prefix or suffix need checking.
+        half = len(term) // 2
+        candidates = set(_prefixed(self.words, term[:half]))
+        candidates.update(word[::-1] for word in _prefixed(self.reversed_words, term[half + 1:][::-1]))
+        return {word for word in candidates if within_one_edit(term, word)}
+
+    def _term(self, term):
+        # (positions matching `term` anywhere, positions matching it in the title).
+        found = self.cache.get(term)
+        if found is None:
+            words = set(_prefixed(self.words, term))
+            if len(term) >= FUZZY_MIN_LENGTH:
+                words |= self._fuzzy_words(term)
+            in_titles = set()
+            groups = set()
+            for word in words:
+                in_titles.update(self.titles.get(word, ()))
+                groups.update(self.shared_words.get(word, ()))
+            positions = set(in_titles)
+            for group in groups:
+                positions.update(self.groups[group])
+            if len(self.cache) >= TERM_CACHE_SIZE:
+                self.cache.pop(next(iter(self.cache)))
+            found = self.cache[term] = (positions, in_titles)
+        return found
+
+    def term_positions(self, term):
+        return self._term(term)[0]
+
+    def positions(self, text, titles_only=False):
+        # Positions of the games matching every term in `text` (in their titles alone, with
+        # `titles_only`), or None for a blank search.
+        terms = sorted(set(tokenize(text)), key=len, reverse=True)
+        if not terms:
+            return None
+        result = None
+        for term in terms:
+            positions = self._term(term)[1 if titles_only else 0]
+            result = set(positions) if result is None else result & positions
+            if not result:
+                break
+        return result
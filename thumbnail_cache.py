@@ -0,0 +1,129 @@
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from PIL import Image, ImageDraw, ImageFont
+
+THUMBNAIL_FOLDER = 'thumbnails'
+THUMBNAIL_SIZE = (100, 100)
+# A decoded RGBA tile is ~40 KB, so the memory tier tops out around 20 MB.
+MEMORY_ITEMS = 512
+DECODE_WORKERS = 4
+
+
+def placeholder(gcid):
+    img = Image.new('RGB', THUMBNAIL_SIZE, (200, 200, 200))
+    draw = ImageDraw.Draw(img)
+    draw.text((10, 45), gcid, fill=(0, 0, 0), font=ImageFont.load_default())
+    return img
+
+
+def render_thumbnail(source):
+    with Image.open(source) as img:
+        if img.mode not in ('RGB', 'RGBA'):
+            img = img.convert('RGBA')
+        # reducing_gap lets Pillow shrink large covers by whole factors before resampling.
+        return img.resize(THUMBNAIL_SIZE, reducing_gap=3.0)
+
+
+class ThumbnailCache:
+    # Cover art at grid size, in two tiers: an LRU of decoded images in memory and
+    # pre-resized PNGs on disk named <gcid>-<source mtime_ns>.png, so replacing a cover
+    # gives it a new name. Decoding runs on a small thread pool; results are handed back
+    # through a callback on the worker, so PhotoImage creation stays with the caller.
+
+    def __init__(self, resolve, cache_folder=THUMBNAIL_FOLDER, max_items=MEMORY_ITEMS, workers=DECODE_WORKERS):
+        # resolve(gcid) -> cover image path or None.
+        self.resolve = resolve
+        self.cache_folder = cache_folder
+        self.max_items = max_items
+        self.memory = OrderedDict()
+        self.latest = {}
+        # gcid -> names of its PNGs on disk, read with one listdir on the first store.
+        self.stored = None
+        self.lock = threading.Lock()
+        self.pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='thumbnail')
+
+    def peek(self, gcid):
+        # Memory tier only, without touching the disk: safe to call from the UI thread.
+        with self.lock:
+            key = self.latest.get(gcid)
+            img = self.memory.get(key)
+            if img is not None:
+                self.memory.move_to_end(key)
+            return img
+
+    def request(self, gcid, on_ready, shown=None):
+        # on_ready(gcid, image) runs on a worker, unless `shown` is already the current image.
+        def work():
+            try:
+                img = self.load(gcid)
+            except Exception:
+                img = placeholder(gcid)
+            if img is not shown:
+                on_ready(gcid, img)
+        return self.pool.submit(work)
+
+    def load(self, gcid):
+        source = self.resolve(gcid)
+        try:
+            mtime = os.stat(source).st_mtime_ns if source else None
+        except OSError:
+            mtime = None
+        key = f"{gcid}-{mtime}" if mtime is not None else f"{gcid}-placeholder"
+        with self.lock:
+            img = self.memory.get(key)
+        if img is None:
+            img = self._load_from_disk(gcid, key, source) if mtime is not None else placeholder(gcid)
+        self._remember(gcid, key, img)
+        return img
+
+    def _load_from_disk(self, gcid, key, source):
+        cached = os.path.join(self.cache_folder, key + '.png')
+        try:
+            with Image.open(cached) as img:
+                img.load()
+                return img
+        except OSError:
+            pass
+        img = render_thumbnail(source)
+        try:
+            self._store(gcid, cached, img)
+        except OSError:
+            pass
+        return img
+
+    def _store(self, gcid, cached, img):
+        os.makedirs(self.cache_folder, exist_ok=True)
+        temp = f"{cached}.{threading.get_ident()}.tmp"
+        img.save(temp, 'PNG')
+        os.replace(temp, cached)
+        # Thumbnails of covers that have since been replaced.
+        name = os.path.basename(cached)
+        with self.lock:
+            if self.stored is None:
+                self.stored = {}
+                for existing in os.listdir(self.cache_folder):
+                    if existing.endswith('.png'):
+                        self.stored.setdefault(existing[:-4].rsplit('-', 1)[0], set()).add(existing)
+            stale = self.stored.get(gcid, set()) - {name}
+            self.stored[gcid] = {name}
+        for old in stale:
+            try:
+                os.remove(os.path.join(self.cache_folder, old))
+            except OSError:
+                pass
+
+    def _remember(self, gcid, key, img):
+        with self.lock:
+            self.memory[key] = img
+            self.memory.move_to_end(key)
+            self.latest[gcid] = key
+            while len(self.memory) > self.max_items:
+                old_key, _ = self.memory.popitem(last=False)
+                old_gcid = old_key.rsplit('-', 1)[0]
+                if self.latest.get(old_gcid) == old_key:
+                    del self.latest[old_gcid]
+
+    def close(self):
+        self.pool.shutdown(wait=False, cancel_futures=True)
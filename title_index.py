@@ -0,0 +1,71 @@
+import os
+import instrument
+
+NGRAM_SIZE = 3
+
+
+class TitleIndex:
+    # Answers the same question as scanning every WiiTDB key with
+    # `name in key or key in name` and keeping the longest common prefix
+    # (first key wins ties), without touching every key per lookup.
+
+    def __init__(self, database, normalize):
+        self.keys = list(database.keys())
+        self.cleaned = [normalize(key) for key in self.keys]
+        self.trie = {}
+        self.grams = {}
+        for pos, key_clean in enumerate(self.cleaned):
+            if not key_clean:
+                continue
+            node = self.trie
+            for ch in key_clean:
+                node = node.setdefault(ch, {})
+            node.setdefault(None, pos)
+            for gram in self._ngrams(key_clean):
+                postings = self.grams.setdefault(gram, [])
+                if not postings or postings[-1] != pos:
+                    postings.append(pos)
+
+    @staticmethod
+    def _ngrams(text):
+        return {text[i:i + NGRAM_SIZE] for i in range(len(text) - NGRAM_SIZE + 1)}
+
+    def _keys_inside(self, clean_name):
+        # Keys that occur somewhere in the name: walk the trie from every offset.
+        found = set()
+        for start in range(len(clean_name)):
+            node = self.trie
+            for ch in clean_name[start:]:
+                node = node.get(ch)
+                if node is None:
+                    break
+                if None in node:
+                    found.add(node[None])
+        return found
+
+    def _keys_containing(self, clean_name):
+        # Keys that contain the whole name: verify the rarest n-gram's postings.
+        if len(clean_name) < NGRAM_SIZE:
+            candidates = range(len(self.cleaned))
+        else:
+            postings = []
+            for gram in self._ngrams(clean_name):
+                gram_postings = self.grams.get(gram)
+                if not gram_postings:
+                    return set()
+                postings.append(gram_postings)
+            candidates = min(postings, key=len)
+        return {pos for pos in candidates if clean_name in self.cleaned[pos]}
+
+    def best_match(self, clean_name):
+        if not clean_name:
+            return None
+        best_pos, best_score = None, 0
+        candidates = self._keys_inside(clean_name) | self._keys_containing(clean_name)
+        instrument.count('title comparisons', len(candidates))
+        for pos in candidates:
+            score = len(os.path.commonprefix([clean_name, self.cleaned[pos]]))
+            if score > best_score or (score == best_score and best_pos is not None and pos < best_pos):
+                best_score = score
+                best_pos = pos
+        return self.keys[best_pos] if best_pos is not None and best_score > 0 else None
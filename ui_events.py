@@ -0,0 +1,98 @@
+import sys
+import queue
+import threading
+
+# Updates posted from worker threads reach the widgets at most this often (~30 fps).
+FRAME_INTERVAL_MS = 33
+
+EACH = 'each'
+LATEST = 'latest'
+BATCH = 'batch'
+
+
+class UiEvents:
+    # Worker threads call post(); the Tk loop drains the queue every frame and runs the
+    # handlers there. LATEST handlers only see the newest payload of a frame, BATCH
+    # handlers get the frame's payloads as one list, EACH handlers get every payload.
+
+    def __init__(self, widget, interval_ms=FRAME_INTERVAL_MS):
+        self.widget = widget
+        self.interval_ms = interval_ms
+        self.events = queue.Queue()
+        self.handlers = {}
+        self.running = False
+
+    def subscribe(self, kind, handler, mode=EACH):
+        self.handlers[kind] = (handler, mode)
+
+    def post(self, kind, payload=None):
+        self.events.put((kind, payload))
+
+    def start(self):
+        if not self.running:
+            self.running = True
+            self.widget.after(self.interval_ms, self._drain)
+        return self
+
+    def stop(self):
+        self.running = False
+
+    def run_in_background(self, work, *args, done=None, error=None):
+        # Runs work(*args) on a daemon thread and posts its result (or exception) back as
+        # the `done` / `error` event kinds.
+        def runner():
+            try:
+                result = work(*args)
+            except Exception as e:
+                if error:
+                    self.post(error, e)
+                else:
+                    raise
+            else:
+                if done:
+                    self.post(done, result)
+        thread = threading.Thread(target=runner, daemon=True)
+        thread.start()
+        return thread
+
+    def _drain(self):
+        if not self.running:
+            return
+        try:
+            for handler, payload in self._frame_calls():
+                # A failing handler is reported the way Tk reports a failing callback, and
+                # neither the rest of its frame nor later frames are lost to it.
+                try:
+                    handler(payload)
+                except Exception:
+                    self.widget.report_callback_exception(*sys.exc_info())
+        finally:
+            self.widget.after(self.interval_ms, self._drain)
+
+    def _frame_calls(self):
+        # The frame's handler calls, in arrival order: a LATEST kind runs where its newest
+        # payload arrived, and BATCH payloads are handed over before the next EACH event, so
+        # nothing that was posted before an EACH event is handled after it.
+        calls, latest, batches = [], {}, {}
+        while True:
+            try:
+                kind, payload = self.events.get_nowait()
+            except queue.Empty:
+                break
+            handler, mode = self.handlers.get(kind, (None, EACH))
+            if handler is None:
+                continue
+            if mode == LATEST:
+                if kind in latest:
+                    calls[latest[kind]] = None
+                latest[kind] = len(calls)
+                calls.append((handler, payload))
+            elif mode == BATCH:
+                if kind not in batches:
+                    batches[kind] = []
+                    calls.append((handler, batches[kind]))
+                batches[kind].append(payload)
+            else:
+                batches.clear()
+                calls.append((handler, payload))
+        return [call for call in calls if call is not None]
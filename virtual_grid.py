@@ -0,0 +1,98 @@
+import tkinter as tk
+
+TILE_SIZE = 100
+TILE_PADDING = 1
+OVERSCAN_ROWS = 2
+
+
+class VirtualGrid(tk.Frame):
+    # A Canvas of image tiles that only materializes the rows on screen plus a few rows of
+    # overscan. Canvas image items are recycled as the view scrolls; `image_for(key)`
+    # supplies a tile's PhotoImage when it comes into view, and `on_visible(keys)` is told
+    # which keys are materialized after every change so callers can load or drop images.
+
+    def __init__(self, master, image_for, on_visible=None, tile_size=TILE_SIZE, padding=TILE_PADDING,
+                 overscan=OVERSCAN_ROWS, **kwargs):
+        super().__init__(master, **kwargs)
+        self.image_for = image_for
+        self.on_visible = on_visible
+        self.tile_size = tile_size
+        self.cell = tile_size + 2 * padding
+        self.padding = padding
+        self.overscan = overscan
+        self.keys = []
+        self.pool = []
+        self.placed = {}
+        self.window = None
+
+        self.canvas = tk.Canvas(self, highlightthickness=0)
+        self.scrollbar = tk.Scrollbar(self, orient='vertical', command=self.canvas.yview)
+        self.canvas.configure(yscrollcommand=self._on_scroll)
+        self.canvas.pack(side='left', fill='both', expand=True)
+        self.scrollbar.pack(side='right', fill='y')
+
+        self.canvas.bind('<Configure>', lambda e: self._render(relayout=True))
+        self.canvas.bind('<MouseWheel>', self._on_mousewheel)
+        self.canvas.bind('<Button-4>', lambda e: self.canvas.yview_scroll(-1, 'units'))
+        self.canvas.bind('<Button-5>', lambda e: self.canvas.yview_scroll(1, 'units'))
+
+    def __len__(self):
+        return len(self.keys)
+
+    def set_items(self, keys):
+        self.keys = list(keys)
+        self._render(relayout=True)
+
+    def visible_keys(self):
+        return list(self.placed.values())
+
+    def refresh(self, keys=None):
+        # Re-fetch images for materialized tiles (all of them, or just those in `keys`).
+        for item, key in self.placed.items():
+            if keys is None or key in keys:
+                self.canvas.itemconfigure(item, image=self.image_for(key))
+
+    def _columns(self):
+        return max(self.canvas.winfo_width() // self.cell, 1)
+
+    def _on_scroll(self, first, last):
+        self.scrollbar.set(first, last)
+        self._render()
+
+    def _on_mousewheel(self, event):
+        step = -event.delta // 120 if abs(event.delta) >= 120 else (-1 if event.delta > 0 else 1)
+        self.canvas.yview_scroll(step, 'units')
+        return 'break'
+
+    def _render(self, relayout=False):
+        columns = self._columns()
+        rows = (len(self.keys) + columns - 1) // columns
+        if relayout:
+            self.canvas.configure(scrollregion=(0, 0, columns * self.cell, rows * self.cell),
+                                  yscrollincrement=self.cell)
+        top = int(self.canvas.canvasy(0))
+        first_row = max(0, top // self.cell - self.overscan)
+        last_row = (top + self.canvas.winfo_height()) // self.cell + self.overscan
+        start = min(first_row * columns, len(self.keys))
+        end = min((last_row + 1) * columns, len(self.keys))
+        window = (start, end, columns, len(self.keys))
+        if window == self.window and not relayout:
+            return
+        self.window = window
+
+        while len(self.pool) < end - start:
+            self.pool.append(self.canvas.create_image(0, 0, anchor='nw', state='hidden'))
+        while len(self.pool) > end - start:
+            item = self.pool.pop()
+            self.placed.pop(item, None)
+            self.canvas.delete(item)
+
+        for item, index in zip(self.pool, range(start, end)):
+            key = self.keys[index]
+            row, col = divmod(index, columns)
+            self.canvas.coords(item, col * self.cell + self.padding, row * self.cell + self.padding)
+            if self.placed.get(item) != key or relayout:
+                self.canvas.itemconfigure(item, image=self.image_for(key), state='normal')
+                self.placed[item] = key
+        if self.on_visible:
+            self.on_visible(self.visible_keys())
@@ -0,0 +1,237 @@
+import tkinter as tk
+from tkinter import ttk
+import instrument
+
+DEFAULT_ROW_HEIGHT = 20
+HEADER_HEIGHT = 24
+
+
+class VirtualTable(tk.Frame):
+    # A Treeview that only ever holds one screenful of items. The full list of row keys
+    # lives here; `values_for(key)` supplies a row's values when it scrolls into view.
+
+    def __init__(self, master, columns, values_for, **kwargs):
+        super().__init__(master, **kwargs)
+        self.columns = list(columns)
+        self.values_for = values_for
+        self.rows = []
+        self.shown = set()
+        self.offset = 0
+        self.pool = []
+        self.detached = set()
+        self.sort_column = None
+        self.sort_descending = False
+        # Selection follows row keys, not the pooled items, so it survives scrolling.
+        self.selected = set()
+        self.cursor = None
+        # show()/hide() calls queue up here and are applied in one pass before the next render.
+        self.inserted = {}
+        self.changed = False
+        self.position = None
+
+        self.tree = ttk.Treeview(self, columns=self.columns, show='headings', height=1)
+        for col in self.columns:
+            self.tree.heading(col, text=col, command=lambda _col=col: self.sort_by(_col))
+            self.tree.column(col, width=120, anchor='w')
+        self.scrollbar = ttk.Scrollbar(self, orient='vertical', command=self.yview)
+        self.tree.pack(side='left', fill='both', expand=True)
+        self.scrollbar.pack(side='right', fill='y')
+
+        self.tree.bind('<Configure>', self._on_resize)
+        self.tree.bind('<MouseWheel>', self._on_mousewheel)
+        self.tree.bind('<Button-4>', lambda e: self._scroll_units(-3))
+        self.tree.bind('<Button-5>', lambda e: self._scroll_units(3))
+        for key, delta in (('<Up>', -1), ('<Down>', 1), ('<Prior>', None), ('<Next>', None)):
+            self.tree.bind(key, lambda e, d=delta, k=key: self._on_key(d, k))
+        self.tree.bind('<<TreeviewSelect>>', self._on_select)
+
+    def __len__(self):
+        self._flush()
+        return len(self.rows)
+
+    def keys(self):
+        self._flush()
+        return list(self.rows)
+
+    def contains(self, key):
+        return key in self.shown
+
+    def set_rows(self, keys):
+        # Filter changes just swap the key list; only the visible window is re-rendered.
+        self.rows = list(keys)
+        self.shown = set(self.rows)
+        self.inserted = {}
+        self.changed = False
+        self.selected.intersection_update(self.shown)
+        self._apply_sort()
+        self._render()
+
+    def show(self, key, index=None):
+        if key in self.shown:
+            self.refresh([key])
+            return
+        self.shown.add(key)
+        self.inserted[key] = index
+        self._queue_render()
+
+    def hide(self, key):
+        if key in self.shown:
+            self.shown.discard(key)
+            self.inserted.pop(key, None)
+            self.selected.discard(key)
+            self._queue_render()
+
+    def index(self, key):
+        self._flush()
+        if self.position is None:
+            self.position = {key: i for i, key in enumerate(self.rows)}
+        return self.position[key]
+
+    def refresh(self, keys=None):
+        self._flush()
+        if keys is None or any(self.rows[i] in keys for i in self._visible_range()):
+            self._render()
+
+    def _queue_render(self):
+        if not self.changed:
+            self.changed = True
+            self.after_idle(self._render)
+
+    def _flush(self):
+        # Applies the queued show()/hide() calls with a single pass over the rows.
+        if not self.changed:
+            return
+        self.changed = False
+        rows = [key for key in self.rows if key in self.shown and key not in self.inserted]
+        for key, index in self.inserted.items():
+            if index is None or self.sort_column is not None:
+                rows.append(key)
+            else:
+                rows.insert(index, key)
+        self.rows = rows
+        self.inserted = {}
+        self.position = None
+        self._apply_sort()
+
+    def sort_by(self, column, descending=None):
+        if descending is None:
+            descending = not self.sort_descending if column == self.sort_column else False
+        self.sort_column = column
+        self.sort_descending = descending
+        self._apply_sort()
+        self._render()
+
+    def _apply_sort(self):
+        self.position = None
+        if self.sort_column is None:
+            return
+        col_index = self.columns.index(self.sort_column)
+        self.rows.sort(key=lambda key: str(self.values_for(key)[col_index]), reverse=self.sort_descending)
+
+    def yview(self, *args):
+        if not args:
+            return self._fractions()
+        if args[0] == 'moveto':
+            self._scroll_to(int(float(args[1]) * len(self.rows)))
+        elif args[0] == 'scroll':
+            amount = int(args[1])
+            self._scroll_units(amount * len(self.pool) if args[2] == 'pages' else amount)
+
+    def _fractions(self):
+        if not self.rows:
+            return 0.0, 1.0
+        return self.offset / len(self.rows), min(1.0, (self.offset + len(self.pool)) / len(self.rows))
+
+    def _visible_range(self):
+        return range(self.offset, min(self.offset + len(self.pool), len(self.rows)))
+
+    def _scroll_units(self, amount):
+        self._scroll_to(self.offset + amount)
+        return 'break'
+
+    def _scroll_to(self, offset):
+        offset = max(0, min(offset, len(self.rows) - len(self.pool)))
+        if offset != self.offset:
+            self.offset = offset
+            self._render()
+
+    def _on_mousewheel(self, event):
+        step = -event.delta // 120 if abs(event.delta) >= 120 else (-1 if event.delta > 0 else 1)
+        return self._scroll_units(step * 3)
+
+    def _on_key(self, delta, key):
+        if delta is None:
+            return self._scroll_units(len(self.pool) if key == '<Next>' else -len(self.pool))
+        # Up/Down move the selection; the view only scrolls once it would leave the window.
+        self._flush()
+        if not self.rows:
+            return 'break'
+        if self.cursor in self.shown:
+            row = max(0, min(self.index(self.cursor) + delta, len(self.rows) - 1))
+        else:
+            row = self.offset
+        self.cursor = self.rows[row]
+        self.selected = {self.cursor}
+        if row < self.offset:
+            self.offset = row
+        elif row >= self.offset + len(self.pool):
+            self.offset = row - len(self.pool) + 1
+        self._render()
+        return 'break'
+
+    def _on_select(self, event):
+        # Clicks select pooled items; remember which rows they were showing.
+        chosen = set(self.tree.selection())
+        for slot, row in enumerate(self._visible_range()):
+            item = self.pool[slot]
+            if item in chosen:
+                self.selected.add(self.rows[row])
+            else:
+                self.selected.discard(self.rows[row])
+        focus = self.tree.focus()
+        if focus in chosen and focus in self.pool:
+            self.cursor = self.rows[self.offset + self.pool.index(focus)]
+
+    def _on_resize(self, event):
+        style = ttk.Style(self)
+        row_height = int(style.lookup('Treeview', 'rowheight') or DEFAULT_ROW_HEIGHT)
+        wanted = max(1, (event.height - HEADER_HEIGHT) // row_height)
+        if wanted == len(self.pool):
+            return
+        while len(self.pool) < wanted:
+            item = self.tree.insert('', 'end', values=())
+            self.tree.detach(item)
+            self.detached.add(item)
+            self.pool.append(item)
+        while len(self.pool) > wanted:
+            item = self.pool.pop()
+            self.detached.discard(item)
+            self.tree.delete(item)
+        self._render()
+
+    def _render(self):
+        with instrument.stage('table.render'):
+            self._flush()
+            self._render_window()
+
+    def _render_window(self):
+        self.offset = max(0, min(self.offset, len(self.rows) - len(self.pool)))
+        selected = []
+        for slot, item in enumerate(self.pool):
+            row = self.offset + slot
+            if row < len(self.rows):
+                if item in self.detached:
+                    self.tree.move(item, '', slot)
+                    self.detached.discard(item)
+                key = self.rows[row]
+                self.tree.item(item, values=self.values_for(key))
+                if key in self.selected:
+                    selected.append(item)
+                if key == self.cursor:
+                    self.tree.focus(item)
+                instrument.count('rows rendered')
+            elif item not in self.detached:
+                self.tree.detach(item)
+                self.detached.add(item)
+        self.tree.selection_set(selected)
+        self.scrollbar.set(*self._fractions())
@@ -0,0 +1,178 @@
+import os
+import sys
+import json
+import sqlite3
+import threading
+from disc_header import index_by_game_id
+
+WIITDB_FILE = 'wiitdb_parsed.json'
+COMPILED_FILE = 'wiitdb.sqlite'
+# Bump when the compiled layout changes.
+FORMAT_VERSION = 1
+NO_DESCRIPTION = 'No description available.'
+SUMMARY_FIELDS = ('title', 'gcid', 'type', 'region', 'developer', 'publisher', 'genre',
+                  'release_date', 'esrb_rating', 'online_players')
+
+
+class WiiTDB:
+    # Read-only mapping over WiiTDB entries keyed like wiitdb_parsed.json. Only the keys,
+    # game IDs and genre vocabulary are loaded up front; an entry's fields are read from the
+    # compiled file the first time it's looked up, and its description only when shown.
+
+    def __init__(self, keys, game_ids, genres, compiled_file=None, entries=None, descriptions=None):
+        self.key_list = list(keys)
+        self.key_set = set(self.key_list)
+        self.gcids = dict(game_ids)
+        self.genres = genres
+        self.compiled_file = compiled_file
+        self.entries = dict(entries or {})
+        self.descriptions = dict(descriptions or {})
+        self.local = threading.local()
+
+    def __len__(self):
+        return len(self.key_list)
+
+    def __iter__(self):
+        return iter(self.key_list)
+
+    def __contains__(self, key):
+        return key in self.key_set
+
+    def __getitem__(self, key):
+        entry = self.get(key)
+        if entry is None:
+            raise KeyError(key)
+        return entry
+
+    def keys(self):
+        return list(self.key_list)
+
+    def values(self):
+        return [self[key] for key in self.key_list]
+
+    def items(self):
+        return [(key, self[key]) for key in self.key_list]
+
+    def get(self, key, default=None):
+        if key not in self.key_set:
+            return default
+        if key not in self.entries:
+            self.entries[key] = self._fetch_entry(key)
+        return self.entries[key]
+
+    def game_ids(self):
+        return dict(self.gcids)
+
+    def _connection(self):
+        # sqlite3 connections can't be shared between threads, and scans run on workers.
+        if not hasattr(self.local, 'conn'):
+            self.local.conn = sqlite3.connect(self.compiled_file)
+        return self.local.conn
+
+    def _fetch_entry(self, key):
+        fields = SUMMARY_FIELDS + ('input',)
+        values = self._connection().execute(f"SELECT {', '.join(fields)} FROM games WHERE key = ?", (key,)).fetchone()
+        entry = {field: value for field, value in zip(SUMMARY_FIELDS, values) if value is not None}
+        if values[-1] is not None:
+            entry['input'] = json.loads(values[-1])
+        return entry
+
+    def description(self, key):
+        if not key:
+            return NO_DESCRIPTION
+        if key not in self.descriptions:
+            row = None
+            if self.compiled_file:
+                row = self._connection().execute('SELECT description FROM descriptions WHERE key = ?', (key,)).fetchone()
+            self.descriptions[key] = row[0] if row else NO_DESCRIPTION
+        return self.descriptions[key]
+
+
+def genre_vocabulary(entries):
+    genre_set = set()
+    for entry in entries:
+        if 'genre' in entry and isinstance(entry['genre'], str):
+            for g in entry['genre'].split(','):
+                genre_set.add(g.strip())
+    return sorted(genre_set)
+
+
+def source_signature(json_file):
+    stat = os.stat(json_file)
+    return f"{FORMAT_VERSION}:{stat.st_size}:{stat.st_mtime_ns}"
+
+
+def build(json_file=WIITDB_FILE, compiled_file=COMPILED_FILE):
+    with open(json_file, 'r', encoding='utf-8') as f:
+        database = json.load(f)
+    temp_file = compiled_file + '.tmp'
+    if os.path.exists(temp_file):
+        os.remove(temp_file)
+    conn = sqlite3.connect(temp_file)
+    try:
+        columns = ', '.join(f"{field} TEXT" for field in SUMMARY_FIELDS)
+        conn.execute(f"CREATE TABLE games (key TEXT PRIMARY KEY, {columns}, input TEXT)")
+        conn.execute('CREATE INDEX games_gcid ON games (gcid)')
+        conn.execute('CREATE TABLE descriptions (key TEXT PRIMARY KEY, description TEXT)')
+        conn.execute('CREATE TABLE genres (name TEXT PRIMARY KEY)')
+        conn.execute('CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT)')
+        placeholders = ', '.join('?' * (len(SUMMARY_FIELDS) + 2))
+        conn.executemany(f"INSERT INTO games VALUES ({placeholders})", [
+            (key,) + tuple(entry.get(field) for field in SUMMARY_FIELDS)
+            + (json.dumps(entry['input']) if 'input' in entry else None,)
+            for key, entry in database.items()
+        ])
+        conn.executemany('INSERT INTO descriptions VALUES (?, ?)',
+                         [(key, entry['description']) for key, entry in database.items() if 'description' in entry])
+        conn.executemany('INSERT INTO genres VALUES (?)', [(g,) for g in genre_vocabulary(database.values())])
+        conn.execute("INSERT INTO meta VALUES ('source', ?)", (source_signature(json_file),))
+        conn.commit()
+    finally:
+        conn.close()
+    os.replace(temp_file, compiled_file)
+
+
+def load_compiled(compiled_file, signature):
+    conn = sqlite3.connect(compiled_file)
+    try:
+        row = conn.execute("SELECT value FROM meta WHERE key = 'source'").fetchone()
+        if row is None or row[0] != signature:
+            return None
+        # rowid order is the JSON's key order, which the title matcher relies on for ties.
+        rows = conn.execute('SELECT key, gcid FROM games ORDER BY rowid').fetchall()
+        game_ids = {}
+        for key, gcid in rows:
+            if gcid:
+                game_ids.setdefault(gcid.upper(), key)
+        genres = [name for name, in conn.execute('SELECT name FROM genres ORDER BY name')]
+        return WiiTDB([key for key, gcid in rows], game_ids, genres, compiled_file)
+    finally:
+        conn.close()
+
+
+def load_wiitdb(json_file=WIITDB_FILE, compiled_file=COMPILED_FILE):
+    # Uses the compiled file when it matches the JSON, rebuilding it if not. Falls back to
+    # the plain JSON if the compiled file can't be written.
+    if not os.path.exists(json_file):
+        return WiiTDB([], {}, [])
+    signature = source_signature(json_file)
+    try:
+        if os.path.exists(compiled_file):
+            database = load_compiled(compiled_file, signature)
+            if database is not None:
+                return database
+        build(json_file, compiled_file)
+        return load_compiled(compiled_file, signature)
+    except (OSError, sqlite3.Error):
+        with open(json_file, 'r', encoding='utf-8') as f:
+            database = json.load(f)
+        descriptions = {key: entry.pop('description') for key, entry in database.items() if 'description' in entry}
+        return WiiTDB(database, index_by_game_id(database), genre_vocabulary(database.values()),
+                      entries=database, descriptions=descriptions)
+
+
+if __name__ == '__main__':
+    json_file = sys.argv[1] if len(sys.argv) > 1 else WIITDB_FILE
+    compiled_file = sys.argv[2] if len(sys.argv) > 2 else COMPILED_FILE
+    build(json_file, compiled_file)
+    print(f"Compiled {json_file} -> {compiled_file}")